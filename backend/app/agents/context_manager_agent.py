@@ -1,8 +1,64 @@
-from typing import List, Dict, Any, Optional, Set
+from typing import List, Dict, Any, Optional, Set, Tuple
 from collections import defaultdict
 import json
 import time
 
+from app.core.call_graph import CallGraph
+from app.core.module_index import ModuleIndex
+
+class CrossReferenceIndex:
+    """Function usage map and cross-references for one analysis snapshot, indexed for lookup."""
+    
+    def __init__(self, usage_map: Dict[str, List[Dict[str, Any]]]):
+        self.usage_map = usage_map
+        self.cross_references: List[Dict[str, Any]] = []
+        self.by_function: Dict[str, Dict[str, Any]] = {}
+        self.by_file: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        # (defining file, function name) -> cross-reference of that definition alone
+        self.by_definition: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        
+        for func_name, usages in usage_map.items():
+            # Only functions reached from a file other than where they are defined
+            defined_in = {usage['file'] for usage in usages if usage['type'] == 'defined'}
+            if defined_in and any(usage['type'] != 'defined' and usage['file'] not in defined_in
+                                  for usage in usages):
+                files_used_in = [usage['file'] for usage in usages]
+                cross_ref = {
+                    'function': func_name,
+                    'used_in': files_used_in,
+                    'usage_types': [usage['type'] for usage in usages]
+                }
+                self.cross_references.append(cross_ref)
+                self.by_function[func_name] = cross_ref
+                for filename in dict.fromkeys(files_used_in):
+                    self.by_file[filename].append(cross_ref)
+            
+            # Calls resolved by the call graph carry their target file; imports
+            # without call data apply to every definition of the name
+            for defining_file in defined_in:
+                own_usages = [
+                    usage for usage in usages
+                    if (usage['file'] if usage['type'] == 'defined' else usage.get('target', defining_file)) == defining_file
+                ]
+                if any(usage['type'] != 'defined' and usage['file'] != defining_file for usage in own_usages):
+                    self.by_definition[(defining_file, func_name)] = {
+                        'function': func_name,
+                        'used_in': [usage['file'] for usage in own_usages],
+                        'usage_types': [usage['type'] for usage in own_usages]
+                    }
+    
+    def for_functions(self, filename: str, functions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Cross-references for the given functions of filename, in function order.
+        
+        Keyed by (file, name), so a same-named function elsewhere does not
+        lend this file its cross-references.
+        """
+        return [
+            self.by_definition[(filename, func['name'])]
+            for func in functions
+            if (filename, func['name']) in self.by_definition
+        ]
+
 class ContextManagerAgent:
     """Agent responsible for maintaining context across files and managing agent coordination."""
     
@@ -26,26 +82,30 @@ class ContextManagerAgent:
         self.analysis_progress = min(progress, 1.0)
     
     def build_function_usage_map(self, all_files: List[Dict[str, Any]]) -> Dict[str, List[str]]:
-        """Build a map of function names to files where they're used."""
-        usage_map = defaultdict(list)
+        """Build a map of function names to the files that define and call them.
+        
+        Files carrying 'calls' (call sites recorded by FileParser) go through a
+        CallGraph, so a usage is an actual call resolved to the defining file.
+        Files without call data fall back to treating imports as usages.
+        """
+        call_graph = CallGraph()
+        legacy_imports = []
         
         for file_data in all_files:
             filename = file_data['filename']
-            
-            # Track functions defined in this file
-            for func in file_data.get('functions', []):
-                func_name = func['name']
-                usage_map[func_name].append({
-                    'file': filename,
-                    'type': 'defined',
-                    'line': func.get('line_number')
-                })
-            
-            # Track imports that might indicate function usage
-            imports = file_data.get('imports', [])
+            definitions = [
+                (func['name'], func.get('line_number'))
+                for func in file_data.get('functions', [])
+            ]
+            if 'calls' in file_data:
+                call_graph.add_file(filename, definitions, file_data['calls'], file_data.get('imports', []))
+            else:
+                call_graph.add_file(filename, definitions, [])
+                legacy_imports.append((filename, file_data.get('imports', [])))
+        
+        usage_map = defaultdict(list, call_graph.usage_map())
+        for filename, imports in legacy_imports:
             for import_name in imports:
-                # This is a simplified approach - in a real implementation,
-                # you'd analyze actual function calls in the code
                 usage_map[import_name].append({
                     'file': filename,
                     'type': 'imported',
@@ -54,51 +114,53 @@ class ContextManagerAgent:
         
         return dict(usage_map)
     
-    def find_cross_references(self, all_files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Find cross-references between functions across files."""
-        cross_refs = []
-        function_map = self.build_function_usage_map(all_files)
-        
-        for func_name, usages in function_map.items():
-            if len(usages) > 1:
-                files_used_in = [usage['file'] for usage in usages]
-                cross_refs.append({
-                    'function': func_name,
-                    'used_in': files_used_in,
-                    'usage_types': [usage['type'] for usage in usages]
-                })
+    @staticmethod
+    def reference_files(parsed_files: List[Dict[str, Any]], analyzed_files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Call graph input for one analysis, each file keyed by its path inside the upload.
         
-        return cross_refs
+        Basenames repeat (every package has an index.js), and calls resolve
+        through the caller's own file and the files it imports, so keying
+        by basename would merge such files and drop their edges.
+        """
+        return [
+            {
+                'filename': file_analysis['path'],
+                'functions': file_analysis.get('functions', []),
+                'imports': parsed_file['parsed_data'].get('imports', []),
+                'calls': parsed_file['parsed_data'].get('calls', [])
+            }
+            for parsed_file, file_analysis in zip(parsed_files, analyzed_files)
+        ]
     
-    def analyze_file_dependencies(self, all_files: List[Dict[str, Any]]) -> Dict[str, Set[str]]:
-        """Analyze dependencies between files based on imports."""
-        dependencies = defaultdict(set)
+    def build_reference_index(self, all_files: List[Dict[str, Any]]) -> CrossReferenceIndex:
+        """Build the usage map and cross-references for these files, indexed by function name.
         
-        for file_data in all_files:
-            filename = file_data['filename']
-            imports = file_data.get('imports', [])
-            
-            for import_name in imports:
-                # Try to find which file this import refers to
-                for other_file in all_files:
-                    other_filename = other_file['filename']
-                    if other_filename != filename:
-                        # Check if the import might refer to this file
-                        if self._import_matches_file(import_name, other_filename):
-                            dependencies[filename].add(other_filename)
-        
-        return dict(dependencies)
+        Nothing is kept on the agent: one instance serves concurrent analyses
+        from worker threads, so each caller gets its own index.
+        """
+        return CrossReferenceIndex(self.build_function_usage_map(all_files))
     
-    def _import_matches_file(self, import_name: str, filename: str) -> bool:
-        """Check if an import statement might refer to a specific file."""
-        # Remove file extension for comparison
-        base_filename = filename.split('.')[0]
-        
-        # Handle different import patterns
-        import_parts = import_name.split('/')
-        last_part = import_parts[-1].split('.')[0]  # Remove extension if present
+    def find_cross_references(self, all_files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Find cross-references between functions across files."""
+        return self.build_reference_index(all_files).cross_references
+    
+    @staticmethod
+    def build_module_index(all_files: List[Dict[str, Any]]) -> ModuleIndex:
+        """Build a ModuleIndex over these files' names, one per analysis."""
+        return ModuleIndex(file_data['filename'] for file_data in all_files)
+    
+    def analyze_file_dependencies(self, all_files: List[Dict[str, Any]],
+                                  module_index: Optional[ModuleIndex] = None) -> Dict[str, Set[str]]:
+        """Analyze dependencies between files based on imports.
         
-        return base_filename.lower() == last_part.lower()
+        Resolves through a ModuleIndex, so each import is a few hash lookups
+        instead of a comparison with every other file. The index is the
+        caller's (see build_module_index) or built for this call; nothing
+        is kept on the agent, which concurrent analyses share.
+        """
+        if module_index is None:
+            module_index = self.build_module_index(all_files)
+        return module_index.resolve_dependencies(all_files)
     
     def generate_project_summary(self, all_files: List[Dict[str, Any]], libraries: List[Dict[str, Any]]) -> str:
         """Generate a comprehensive project summary."""
@@ -181,8 +243,12 @@ class ContextManagerAgent:
                 'context_manager_agent': 'idle'
             }
     
-    def get_analysis_statistics(self, all_files: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Generate comprehensive analysis statistics."""
+    def get_analysis_statistics(self, all_files: List[Dict[str, Any]],
+                                reference_index: CrossReferenceIndex) -> Dict[str, Any]:
+        """Generate comprehensive analysis statistics.
+        
+        Cross-references are counted from the analysis's prebuilt reference_index.
+        """
         stats = {
             'total_files': len(all_files),
             'total_functions': 0,
@@ -211,8 +277,7 @@ class ContextManagerAgent:
         stats['total_libraries'] = len(all_libraries)
         
         # Count cross-references
-        cross_refs = self.find_cross_references(all_files)
-        stats['cross_references_count'] = len(cross_refs)
+        stats['cross_references_count'] = len(reference_index.cross_references)
         
         return stats
     
@@ -1,14 +1,40 @@
-from typing import List, Dict, Any, Optional
+from collections import deque
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from langchain.llms.base import LLM
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
+from langchain.schema import LLMResult, Generation
 import json
 import re
 
+from app.config import Config
+from app.core.generation_cache import get_generation_cache
+
 class MockNeMoLLM(LLM):
     """Mock NeMo LLM for hackathon demo - replace with actual NeMo integration"""
     
     def _call(self, prompt: str, stop: Optional[List[str]] = None) -> str:
+        """Mock LLM response, served from the generation cache when possible."""
+        return self._generate_texts([prompt])[0]
+    
+    def _generate(self, prompts: List[str], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> LLMResult:
+        """Answer a whole batch with one backend request instead of one _call per prompt."""
+        return LLMResult(generations=[[Generation(text=text)] for text in self._generate_texts(prompts)])
+    
+    def _generate_texts(self, prompts: List[str]) -> List[str]:
+        """Generations for prompts, with only the uncached ones sent to the backend."""
+        cache = get_generation_cache()
+        if cache is None:
+            return self._generate_responses(prompts)
+        return cache.get_or_generate_many(
+            self._llm_type, Config.NEMOTRON_TEMPERATURE, prompts, self._generate_responses
+        )
+    
+    def _generate_responses(self, prompts: List[str]) -> List[str]:
+        """The model backend: one request answers every prompt in the batch."""
+        return [self._generate_response(prompt) for prompt in prompts]
+    
+    def _generate_response(self, prompt: str) -> str:
         """Mock LLM response for code documentation generation."""
         
         # Simple rule-based responses for demo
@@ -58,8 +84,9 @@ class MockNeMoLLM(LLM):
 class InternalDocAgent:
     """Agent responsible for analyzing code structure and generating internal documentation."""
     
-    def __init__(self):
-        self.llm = MockNeMoLLM()
+    def __init__(self, llm: Optional[LLM] = None, batch_size: Optional[int] = None):
+        self.llm = llm or MockNeMoLLM()
+        self.batch_size = max(1, batch_size or Config.BATCH_SIZE)
         self.function_doc_prompt = PromptTemplate(
             input_variables=["function_name", "parameters", "context"],
             template="""
@@ -89,19 +116,66 @@ class InternalDocAgent:
     
     def analyze_file(self, file_path: str, parsed_data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze a single file and generate documentation."""
-        filename = file_path.split('/')[-1]
-        file_type = self._get_file_type(filename)
+        return self.analyze_files([{'file_path': file_path, 'parsed_data': parsed_data}])[0]
+    
+    def analyze_files(self, parsed_files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Analyze several files, batching function documentation across all of them."""
+        return [file_analysis for _, file_analysis in self.iter_analyze_files(parsed_files)]
+    
+    def iter_analyze_files(self, parsed_files: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Yield (parsed_file, file_analysis) as soon as each file's functions are documented.
+        
+        Function prompts and file summary prompts go out batch_size per LLM
+        call across file boundaries: a file whose prompts straddle a batch
+        waits for the next one, and only the final batch can be short.
+        Files come out in input order.
+        """
+        waiting = deque()  # files in input order, with their docs as they arrive
+        pending = []  # (prompt, entry, index) not yet sent to the LLM; the last index is the summary
+        for parsed_file in parsed_files:
+            filename = parsed_file['file_path'].split('/')[-1]
+            file_type = self._get_file_type(filename)
+            parsed_data = parsed_file['parsed_data']
+            functions = parsed_data.get('functions', [])
+            entry = {'parsed_file': parsed_file, 'file_type': file_type,
+                     'docs': [None] * (len(functions) + 1), 'missing': len(functions) + 1}
+            waiting.append(entry)
+            for index, func in enumerate(functions):
+                pending.append((self._build_function_prompt(func, file_type), entry, index))
+            pending.append((self._build_file_summary_prompt(filename, parsed_data, file_type), entry, len(functions)))
+            while len(pending) >= self.batch_size:
+                self._document_pending(pending[:self.batch_size])
+                del pending[:self.batch_size]
+            yield from self._finished_files(waiting)
         
-        # Generate file summary
-        file_summary = self._generate_file_summary(filename, parsed_data, file_type)
+        if pending:
+            self._document_pending(pending)
+        yield from self._finished_files(waiting)
+    
+    def _document_pending(self, pending: List[Tuple[str, Dict[str, Any], int]]):
+        """Send one batch of queued prompts and file the docs under their files."""
+        docs = self._generate_batches([prompt for prompt, _, _ in pending])
+        for (_, entry, index), doc in zip(pending, docs):
+            entry['docs'][index] = doc
+            entry['missing'] -= 1
+    
+    def _finished_files(self, waiting: deque) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Pop and build the leading files whose functions are all documented."""
+        while waiting and waiting[0]['missing'] == 0:
+            entry = waiting.popleft()
+            yield entry['parsed_file'], self._build_file_analysis(entry['parsed_file'], entry['file_type'], entry['docs'])
+    
+    def _build_file_analysis(self, parsed_file: Dict[str, Any], file_type: str, docs: List[str]) -> Dict[str, Any]:
+        parsed_data = parsed_file['parsed_data']
+        filename = parsed_file['file_path'].split('/')[-1]
         
-        # Generate function documentation
+        # Docs are indexed in the order the functions were queued, followed by the file summary
+        file_summary = docs[-1]
         functions = []
-        for func in parsed_data.get('functions', []):
-            func_doc = self._generate_function_documentation(func, file_type)
+        for func, doc in zip(parsed_data.get('functions', []), docs):
             functions.append({
                 'name': func['name'],
-                'doc': func_doc,
+                'doc': doc,
                 'parameters': func.get('parameters', []),
                 'returns': self._infer_return_type(func, file_type),
                 'line_number': func.get('line_number')
@@ -128,23 +202,43 @@ class InternalDocAgent:
     
     def _generate_file_summary(self, filename: str, parsed_data: Dict[str, Any], file_type: str) -> str:
         """Generate a summary of the file's purpose."""
+        return self._generate_batches([self._build_file_summary_prompt(filename, parsed_data, file_type)])[0]
+    
+    def _build_file_summary_prompt(self, filename: str, parsed_data: Dict[str, Any], file_type: str) -> str:
+        """Format the summary prompt for a single file."""
         functions = [f['name'] for f in parsed_data.get('functions', [])]
         imports = parsed_data.get('imports', [])
         
-        chain = LLMChain(llm=self.llm, prompt=self.file_summary_prompt)
-        
-        result = chain.run({
-            'filename': filename,
-            'functions': ', '.join(functions),
-            'imports': ', '.join(imports),
-            'file_type': file_type
-        })
-        
-        return result.strip()
+        return self.file_summary_prompt.format(
+            filename=filename,
+            functions=', '.join(functions),
+            imports=', '.join(imports),
+            file_type=file_type
+        )
     
     def _generate_function_documentation(self, func: Dict[str, Any], file_type: str) -> str:
         """Generate documentation for a specific function."""
-        func_name = func['name']
+        return self._generate_function_documentation_batch([(func, file_type)])[0]
+    
+    def _generate_function_documentation_batch(self, funcs: List[Tuple[Dict[str, Any], str]]) -> List[str]:
+        """Generate documentation for many functions, batch_size prompts per LLM call.
+        
+        Returns one doc per (function, file_type) pair, in input order.
+        """
+        return self._generate_batches([self._build_function_prompt(func, file_type) for func, file_type in funcs])
+    
+    def _generate_batches(self, prompts: List[str]) -> List[str]:
+        """Send prompts to the LLM batch_size per call and return the stripped texts in order."""
+        docs = []
+        for start in range(0, len(prompts), self.batch_size):
+            batch = prompts[start:start + self.batch_size]
+            result = self.llm.generate(batch)
+            docs.extend(generations[0].text.strip() for generations in result.generations)
+        
+        return docs
+    
+    def _build_function_prompt(self, func: Dict[str, Any], file_type: str) -> str:
+        """Format the documentation prompt for a single function."""
         parameters = func.get('parameters', [])
         
         # Create context based on function name and parameters
@@ -152,15 +246,11 @@ class InternalDocAgent:
         if parameters:
             context += f" with parameters: {', '.join(parameters)}"
         
-        chain = LLMChain(llm=self.llm, prompt=self.function_doc_prompt)
-        
-        result = chain.run({
-            'function_name': func_name,
-            'parameters': ', '.join(parameters),
-            'context': context
-        })
-        
-        return result.strip()
+        return self.function_doc_prompt.format(
+            function_name=func['name'],
+            parameters=', '.join(parameters),
+            context=context
+        )
     
     def _infer_return_type(self, func: Dict[str, Any], file_type: str) -> Optional[str]:
         """Infer the return type of a function based on naming patterns."""
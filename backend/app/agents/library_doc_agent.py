@@ -1,13 +1,23 @@
 import requests
+import asyncio
 from typing import List, Dict, Any, Optional
 from bs4 import BeautifulSoup
 import re
 import json
 
+from app.core.registry_client import RegistryClient
+from app.core.package_index import PackageIndex
+
 class LibraryDocAgent:
     """Agent responsible for identifying external libraries and fetching their documentation."""
     
-    def __init__(self):
+    def __init__(self, registry_client: Optional[RegistryClient] = None,
+                 package_index: Optional[PackageIndex] = None, offline: bool = False):
+        self.registry_client = registry_client or RegistryClient()
+        # Local metadata index consulted before any registry call
+        self.package_index = package_index
+        # Skip live npm/PyPI lookups entirely, e.g. on air-gapped nodes
+        self.offline = offline
         self.npm_base_url = "https://www.npmjs.com/package/"
         self.pypi_base_url = "https://pypi.org/project/"
         self.mdn_base_url = "https://developer.mozilla.org/en-US/docs/Web/"
@@ -81,6 +91,35 @@ class LibraryDocAgent:
         
         return list(library_map.values())
     
+    async def analyze_libraries_async(self, all_files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Async version of analyze_libraries that resolves all unique names concurrently."""
+        clean_names = []
+        for file_data in all_files:
+            for import_name in file_data.get('imports', []):
+                clean_name = self._clean_import_name(import_name)
+                if clean_name and clean_name not in clean_names:
+                    clean_names.append(clean_name)
+        
+        results = await asyncio.gather(
+            *(self._get_library_info_async(name) for name in clean_names)
+        )
+        return [info for info in results if info]
+    
+    def libraries_for_imports(self, imports: List[str],
+                              libraries_by_name: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The resolved libraries one file imports, each once, in import order.
+        
+        libraries_by_name maps lowercased library names to their info, built
+        once per analysis from the analyze_libraries_async result.
+        """
+        file_libraries = {}
+        for import_name in imports:
+            clean_name = self._clean_import_name(import_name)
+            library = libraries_by_name.get(clean_name) if clean_name else None
+            if library is not None:
+                file_libraries.setdefault(library['name'], library)
+        return list(file_libraries.values())
+    
     def _clean_import_name(self, import_name: str) -> Optional[str]:
         """Clean and extract the base library name from import statement."""
         if not import_name:
@@ -116,15 +155,21 @@ class LibraryDocAgent:
         if library_name in self.library_docs:
             return self.library_docs[library_name]
         
-        # Try to fetch from npm (for JavaScript libraries)
-        npm_info = self._fetch_npm_info(library_name)
-        if npm_info:
-            return npm_info
+        # Then the offline package index
+        index_info = self._lookup_package_index(library_name)
+        if index_info:
+            return index_info
         
-        # Try to fetch from PyPI (for Python libraries)
-        pypi_info = self._fetch_pypi_info(library_name)
-        if pypi_info:
-            return pypi_info
+        if not self.offline:
+            # Try to fetch from npm (for JavaScript libraries)
+            npm_info = self._fetch_npm_info(library_name)
+            if npm_info:
+                return npm_info
+            
+            # Try to fetch from PyPI (for Python libraries)
+            pypi_info = self._fetch_pypi_info(library_name)
+            if pypi_info:
+                return pypi_info
         
         # Check if it's a browser API
         browser_info = self._check_browser_api(library_name)
@@ -138,6 +183,68 @@ class LibraryDocAgent:
             'link': None
         }
     
+    async def _get_library_info_async(self, library_name: str) -> Optional[Dict[str, Any]]:
+        """Get library information without blocking the event loop."""
+        if library_name in self.library_docs:
+            return self.library_docs[library_name]
+        
+        index_info = self._lookup_package_index(library_name)
+        if index_info:
+            return index_info
+        
+        if not self.offline:
+            npm_data = await self.registry_client.fetch_npm(library_name)
+            if npm_data:
+                return self._format_npm_info(library_name, npm_data)
+            
+            pypi_data = await self.registry_client.fetch_pypi(library_name)
+            if pypi_data:
+                return self._format_pypi_info(library_name, pypi_data)
+        
+        browser_info = self._check_browser_api(library_name)
+        if browser_info:
+            return browser_info
+        
+        return {
+            'name': library_name,
+            'doc_summary': f'External library: {library_name}',
+            'link': None
+        }
+    
+    def _lookup_package_index(self, library_name: str) -> Optional[Dict[str, Any]]:
+        """Resolve a library from the offline package index, if one is loaded."""
+        if self.package_index is None:
+            return None
+        record = self.package_index.get(library_name)
+        if record is None:
+            return None
+        base_url = self.npm_base_url if record['ecosystem'] == 'npm' else self.pypi_base_url
+        return {
+            'name': record['name'],
+            'doc_summary': record['summary'] or f"External library: {record['name']}",
+            'link': record['docs'] or f"{base_url}{record['name']}",
+            'version': record['version']
+        }
+    
+    def _format_npm_info(self, package_name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build library info from an npm latest-version document."""
+        return {
+            'name': data.get('name', package_name),
+            'doc_summary': data.get('description', f'NPM package: {package_name}'),
+            'link': f"{self.npm_base_url}{package_name}",
+            'version': data.get('version')
+        }
+    
+    def _format_pypi_info(self, package_name: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build library info from a PyPI JSON document."""
+        info = data.get('info', {})
+        return {
+            'name': info.get('name', package_name),
+            'doc_summary': info.get('summary', f'Python package: {package_name}'),
+            'link': info.get('home_page') or f"{self.pypi_base_url}{package_name}",
+            'version': info.get('version')
+        }
+    
     def _fetch_npm_info(self, package_name: str) -> Optional[Dict[str, Any]]:
         """Fetch package information from npm registry."""
         try:
@@ -145,13 +252,7 @@ class LibraryDocAgent:
             response = requests.get(url, timeout=5)
             
             if response.status_code == 200:
-                data = response.json()
-                return {
-                    'name': data.get('name', package_name),
-                    'doc_summary': data.get('description', f'NPM package: {package_name}'),
-                    'link': f"{self.npm_base_url}{package_name}",
-                    'version': data.get('version')
-                }
+                return self._format_npm_info(package_name, response.json())
         except Exception as e:
             print(f"Error fetching npm info for {package_name}: {e}")
         
@@ -164,14 +265,7 @@ class LibraryDocAgent:
             response = requests.get(url, timeout=5)
             
             if response.status_code == 200:
-                data = response.json()
-                info = data.get('info', {})
-                return {
-                    'name': info.get('name', package_name),
-                    'doc_summary': info.get('summary', f'Python package: {package_name}'),
-                    'link': info.get('home_page') or f"{self.pypi_base_url}{package_name}",
-                    'version': info.get('version')
-                }
+                return self._format_pypi_info(package_name, response.json())
         except Exception as e:
             print(f"Error fetching PyPI info for {package_name}: {e}")
         
@@ -1,46 +1,186 @@
 import re
-from typing import List, Dict, Any, Set
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Set, Optional
 from datetime import datetime
 
-class RealContextManagerAgent:
-    """Real ContextManagerAgent with status tracking and cross-references"""
+from app.config import Config
+from app.core.call_graph import CallGraph
+
+
+class ContextMemoryExceeded(Exception):
+    """Raised when storing a file would push upload contexts past their memory budget."""
+
+
+class AnalysisContext:
+    """State for one upload: its source files, status and results.
     
-    def __init__(self):
-        self.analysis_status = {}
-        self.file_contents = {}
-        self.cross_references = []
+    Lifecycle: open -> files stored -> finish (source released, results kept)
+    -> evicted once older than the TTL or beyond the finished-context limit.
+    memory_bytes tracks the resident size of the stored source.
+    """
+    
+    def __init__(self, upload_id: str):
+        self.upload_id = upload_id
+        self.state = "active"
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.status: Dict[str, Any] = {}
+        self.file_contents: Dict[str, str] = {}
+        self.memory_bytes = 0
+        self.cross_references: List[Dict[str, Any]] = []
         self.project_summary = ""
+    
+    def add_file(self, filename: str, content: str) -> int:
+        """Store a file and return the change in memory_bytes."""
+        previous = self.file_contents.get(filename)
+        delta = sys.getsizeof(content) - (sys.getsizeof(previous) if previous is not None else 0)
+        self.file_contents[filename] = content
+        self.memory_bytes += delta
+        return delta
+    
+    def release(self) -> int:
+        """Drop stored source and return the number of bytes freed."""
+        freed = self.memory_bytes
+        self.file_contents = {}
+        self.memory_bytes = 0
+        return freed
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "upload_id": self.upload_id,
+            "state": self.state,
+            "files": len(self.file_contents),
+            "memory_bytes": self.memory_bytes,
+            "age_seconds": time.time() - self.created_at
+        }
+
+
+class RealContextManagerAgent:
+    """Real ContextManagerAgent with status tracking and cross-references
+    
+    Every analysis opens its own AnalysisContext, so analyses never see each
+    other's files. Finished contexts release their source and are evicted
+    after ttl seconds or once more than max_finished are held.
+    """
+    
+    def __init__(self, ttl: Optional[float] = None, max_finished: Optional[int] = None,
+                 max_memory_bytes: Optional[int] = None):
+        self.ttl = Config.ANALYSIS_CONTEXT_TTL if ttl is None else ttl
+        self.max_finished = Config.ANALYSIS_CONTEXT_MAX_FINISHED if max_finished is None else max_finished
+        self.max_memory_bytes = (Config.ANALYSIS_CONTEXT_MAX_MB * 1024 * 1024
+                                 if max_memory_bytes is None else max_memory_bytes)
+        self.contexts: "OrderedDict[str, AnalysisContext]" = OrderedDict()
+        self.memory_bytes = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
         self.external_libraries = []
     
-    def update_status(self, upload_id: str, status: str, progress: int = 0, message: str = ""):
-        """Update analysis status"""
-        if upload_id not in self.analysis_status:
-            self.analysis_status[upload_id] = {}
+    def open_context(self, upload_id: str) -> AnalysisContext:
+        """Return the context for upload_id, creating it if needed."""
+        with self._lock:
+            context = self.contexts.get(upload_id)
+            if context is None:
+                self._evict()
+                context = AnalysisContext(upload_id)
+                self.contexts[upload_id] = context
+            return context
+    
+    def get_context(self, upload_id: str) -> Optional[AnalysisContext]:
+        return self.contexts.get(upload_id)
+    
+    def finish_context(self, upload_id: str):
+        """Release an upload's source once its analysis is done; results stay until eviction."""
+        with self._lock:
+            context = self.contexts.get(upload_id)
+            if context is None or context.state == "finished":
+                return
+            self.memory_bytes -= context.release()
+            context.state = "finished"
+            context.finished_at = time.time()
+            self._evict()
+    
+    def _evict(self):
+        """Drop finished contexts past their TTL or beyond max_finished, oldest first."""
+        now = time.time()
+        finished = [context for context in self.contexts.values() if context.state == "finished"]
+        finished.sort(key=lambda context: context.finished_at)
+        excess = len(finished) - self.max_finished
+        for index, context in enumerate(finished):
+            if index < excess or now - context.finished_at > self.ttl:
+                self.memory_bytes -= context.release()
+                del self.contexts[context.upload_id]
+                self.evicted += 1
+    
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """Memory accounting across all upload contexts"""
+        with self._lock:
+            self._evict()
+            contexts = [context.get_stats() for context in self.contexts.values()]
+        return {
+            "contexts": len(contexts),
+            "active": sum(1 for context in contexts if context["state"] == "active"),
+            "memory_bytes": self.memory_bytes,
+            "max_memory_bytes": self.max_memory_bytes,
+            "evicted": self.evicted,
+            "per_context": contexts
+        }
+    
+    def update_status(self, upload_id: str, status: str, progress: int = 0, message: str = "") -> Dict[str, Any]:
+        """Update analysis status and return it
         
-        self.analysis_status[upload_id].update({
+        Only an analysis opens a context; before that (uploaded, queued) the
+        status is returned for the caller to store without creating one, so
+        uploads that are never analyzed leave nothing behind.
+        """
+        update = {
             "status": status,
             "progress": progress,
             "message": message,
             "timestamp": datetime.now().isoformat()
-        })
+        }
+        context = self.get_context(upload_id)
+        if context is None:
+            return update
+        context.status.update(update)
+        return dict(context.status)
     
     def get_status(self, upload_id: str) -> Dict[str, Any]:
         """Get current analysis status"""
-        return self.analysis_status.get(upload_id, {
-            "status": "not_found",
-            "progress": 0,
-            "message": "Upload not found"
-        })
-    
-    def store_file_content(self, filename: str, content: str):
-        """Store file content for cross-reference analysis"""
-        self.file_contents[filename] = content
+        context = self.contexts.get(upload_id)
+        if context is None or not context.status:
+            return {
+                "status": "not_found",
+                "progress": 0,
+                "message": "Upload not found"
+            }
+        return context.status
     
-    def find_cross_references(self) -> List[Dict[str, Any]]:
-        """Find cross-references between files"""
+    def store_file_content(self, upload_id: str, filename: str, content: str):
+        """Store file content in the upload's context for cross-reference analysis"""
+        context = self.open_context(upload_id)
+        with self._lock:
+            incoming = sys.getsizeof(content)
+            if self.memory_bytes + incoming > self.max_memory_bytes:
+                self._evict()
+                if self.memory_bytes + incoming > self.max_memory_bytes:
+                    raise ContextMemoryExceeded(
+                        f"Storing {filename} would exceed the {self.max_memory_bytes} byte context budget"
+                    )
+            self.memory_bytes += context.add_file(filename, content)
+    
+    def find_cross_references(self, upload_id: str) -> List[Dict[str, Any]]:
+        """Find cross-references between one upload's files: local imports plus resolved call sites"""
+        context = self.open_context(upload_id)
+        file_contents = context.file_contents
         cross_refs = []
+        call_graph = CallGraph()
         
-        for filename, content in self.file_contents.items():
+        for filename, content in file_contents.items():
+            call_graph.add_source(filename, content)
+            
             # Find import statements
             import_patterns = [
                 r'import\s+.*?from\s+[\'"]([^\'"]+)[\'"]',  # import x from 'y'
@@ -56,7 +196,7 @@ class RealContextManagerAgent:
                     # Check if it's a local import
                     if import_path.startswith('./') or import_path.startswith('../'):
                         imported_file = self._resolve_import_path(filename, import_path)
-                        if imported_file and imported_file in self.file_contents:
+                        if imported_file and imported_file in file_contents:
                             cross_refs.append({
                                 "from": filename,
                                 "to": imported_file,
@@ -64,7 +204,17 @@ class RealContextManagerAgent:
                                 "description": f"{filename} imports {imported_file}"
                             })
         
-        self.cross_references = cross_refs
+        for edge in call_graph.call_edges():
+            cross_refs.append({
+                "from": edge["from"],
+                "to": edge["to"],
+                "type": "call",
+                "function": edge["function"],
+                "line": edge["line"],
+                "description": f"{edge['from']} calls {edge['function']}() from {edge['to']}"
+            })
+        
+        context.cross_references = cross_refs
         return cross_refs
     
     def _resolve_import_path(self, current_file: str, import_path: str) -> str:
@@ -89,7 +239,7 @@ class RealContextManagerAgent:
         
         return None
     
-    def generate_project_summary(self, files: List[Dict[str, Any]]) -> str:
+    def generate_project_summary(self, files: List[Dict[str, Any]], upload_id: Optional[str] = None) -> str:
         """Generate comprehensive project summary"""
         if not files:
             return "No files analyzed"
@@ -137,7 +287,8 @@ class RealContextManagerAgent:
             summary_parts.append("including debounced input handling")
         
         summary = " ".join(summary_parts)
-        self.project_summary = summary
+        if upload_id is not None:
+            self.open_context(upload_id).project_summary = summary
         return summary
     
     def build_function_usage_map(self, files: List[Dict[str, Any]]) -> Dict[str, List[str]]:
@@ -157,15 +308,17 @@ class RealContextManagerAgent:
         
         return usage_map
     
-    def analyze_code_complexity(self, files: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def analyze_code_complexity(self, files: List[Dict[str, Any]], upload_id: Optional[str] = None) -> Dict[str, Any]:
         """Analyze code complexity metrics"""
+        context = self.contexts.get(upload_id) if upload_id is not None else None
+        file_contents = context.file_contents if context is not None else {}
         total_lines = 0
         total_functions = 0
         total_imports = 0
         
         for file_info in files:
             filename = file_info.get('filename', '')
-            content = self.file_contents.get(filename, '')
+            content = file_contents.get(filename, '')
             
             if content:
                 lines = content.split('\n')
@@ -190,10 +343,11 @@ class RealContextManagerAgent:
     
     def get_comprehensive_analysis(self, upload_id: str) -> Dict[str, Any]:
         """Get comprehensive analysis results"""
+        context = self.contexts.get(upload_id)
         return {
-            "project_summary": self.project_summary,
+            "project_summary": context.project_summary if context else "",
             "analysis_status": self.get_status(upload_id),
-            "cross_references": self.cross_references,
+            "cross_references": context.cross_references if context else [],
             "complexity_metrics": self.analyze_code_complexity([]),  # Will be populated with actual files
             "external_libraries_summary": self.external_libraries,
             "timestamp": datetime.now().isoformat()
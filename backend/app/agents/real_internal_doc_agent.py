@@ -1,12 +1,20 @@
 from langchain.llms.base import LLM
 from langchain.prompts import PromptTemplate
+from langchain.schema import LLMResult, Generation
 import ast
-import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from app.config import Config
+from app.core.generation_cache import get_generation_cache
+from app.core.js_extractor import JSStructure, extract_js_structure, function_code
+from app.core.prompt_budget import FilePromptBuilder, content_budget, estimate_tokens
 
 class NemotronLLM(LLM):
     """Real Nemotron LLM wrapper"""
     
+    # Declared as a field so the pydantic model accepts it; also part of the generation cache key
+    model_name: str = "llama-3.3-nemotron-super-49b-v1"
+    
     def __init__(self):
         super().__init__()
         # For demo, we'll use a sophisticated rule-based system
@@ -19,6 +27,28 @@ class NemotronLLM(LLM):
         return "nemotron"
     
     def _call(self, prompt: str, stop: List[str] = None) -> str:
+        """Generate response, served from the generation cache when possible"""
+        return self._generate_texts([prompt])[0]
+    
+    def _generate(self, prompts: List[str], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> LLMResult:
+        """Answer a whole batch with one backend request instead of one _call per prompt"""
+        return LLMResult(generations=[[Generation(text=text)] for text in self._generate_texts(prompts)])
+    
+    def _generate_texts(self, prompts: List[str]) -> List[str]:
+        """Generations for prompts, with only the uncached ones sent to the backend"""
+        cache = get_generation_cache()
+        if cache is None:
+            return self._generate_responses(prompts)
+        return cache.get_or_generate_many(
+            self.model_name, Config.NEMOTRON_TEMPERATURE, prompts, self._generate_responses
+        )
+    
+    def _generate_responses(self, prompts: List[str]) -> List[str]:
+        """The model backend: one request answers every prompt in the batch"""
+        return [self._generate_response(prompt) for prompt in prompts]
+    
+    def _generate_response(self, prompt: str) -> str:
         """Generate response using Nemotron reasoning"""
         # Simulate Nemotron's reasoning capabilities
         if "function" in prompt.lower():
@@ -90,7 +120,12 @@ class RealInternalDocAgent:
             Provide a comprehensive summary of this file's purpose, its main components/functions, and its role in the application.
             """
         )
-    
+        # File content gets what the context window leaves after the template and the reply
+        self.file_prompt_builder = FilePromptBuilder(content_budget(
+            self.file_prompt.template, Config.NEMOTRON_CONTEXT_TOKENS,
+            Config.NEMOTRON_MAX_LENGTH, Config.FILE_PROMPT_MAX_TOKENS
+        ))
+
     def analyze_function(self, function_name: str, function_code: str) -> Dict[str, str]:
         """Analyze a function using Nemotron"""
         prompt = self.function_prompt.format(
@@ -106,21 +141,35 @@ class RealInternalDocAgent:
         }
     
     def analyze_file(self, filename: str, file_content: str) -> Dict[str, Any]:
-        """Analyze a file using Nemotron"""
+        """Analyze a file using Nemotron
+        
+        Files over the prompt budget are summarized from their skeleton
+        (imports, signatures, doc comments) instead of the full source.
+        """
+        structure = extract_js_structure(file_content)
         prompt = self.file_prompt.format(
             filename=filename,
-            file_content=file_content
+            file_content=self.file_prompt_builder.build(
+                file_content, structure,
+                max_tokens=self.file_prompt_builder.max_tokens - estimate_tokens(filename),
+                filename=filename
+            )
         )
         
-        summary = self.llm._call(prompt)
-        
         # Extract functions from the file
-        functions = self._extract_functions(file_content)
-        analyzed_functions = []
+        functions = self._extract_functions(file_content, structure)
         
-        for func in functions:
-            analyzed_func = self.analyze_function(func["name"], func["code"])
-            analyzed_functions.append(analyzed_func)
+        # The file summary and every function go to the LLM as one batch
+        prompts = [prompt] + [
+            self.function_prompt.format(function_name=func["name"], function_code=func["code"])
+            for func in functions
+        ]
+        texts = [generations[0].text for generations in self.llm.generate(prompts).generations]
+        summary = texts[0]
+        analyzed_functions = [
+            {"name": func["name"], "summary": text}
+            for func, text in zip(functions, texts[1:])
+        ]
         
         return {
             "filename": filename,
@@ -128,25 +177,13 @@ class RealInternalDocAgent:
             "functions": analyzed_functions
         }
     
-    def _extract_functions(self, content: str) -> List[Dict[str, str]]:
+    def _extract_functions(self, content: str, structure: Optional[JSStructure] = None) -> List[Dict[str, str]]:
         """Extract functions from JavaScript/React code"""
-        functions = []
-        
-        # Pattern for function declarations
-        patterns = [
-            r'function\s+(\w+)\s*\([^)]*\)\s*\{[^}]*\}',  # function name() {}
-            r'const\s+(\w+)\s*=\s*\([^)]*\)\s*=>\s*\{[^}]*\}',  # const name = () => {}
-            r'(\w+)\s*:\s*\([^)]*\)\s*=>\s*\{[^}]*\}',  # name: () => {}
-        ]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, content, re.DOTALL)
-            for match in matches:
-                function_name = match.group(1)
-                function_code = match.group(0)
-                functions.append({
-                    "name": function_name,
-                    "code": function_code
-                })
-        
-        return functions 
\ No newline at end of file
+        structure = structure if structure is not None else extract_js_structure(content)
+        return [
+            {
+                "name": func["name"],
+                "code": function_code(content, func)
+            }
+            for func in structure.functions
+        ] 
\ No newline at end of file
@@ -1,12 +1,37 @@
 import requests
-import re
-from typing import List, Dict, Any
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
 from bs4 import BeautifulSoup
 
+from app.core.js_extractor import extract_js_structure
+from app.core.package_index import PackageIndex
+from app.core.registry_client import MISSING, TTLCache
+
 class RealLibraryDocAgent:
     """Real LibraryDocAgent that fetches actual documentation"""
     
-    def __init__(self):
+    # Upper bound on a single registry response we are willing to buffer
+    MAX_METADATA_BYTES = 1024 * 1024
+    
+    def __init__(self, package_index: Optional[PackageIndex] = None, offline: bool = False,
+                 lightweight_metadata: bool = True,
+                 npm_registry_url: str = "https://registry.npmjs.org",
+                 metadata_ttl: float = 3600.0, negative_ttl: float = 600.0,
+                 max_cached: int = 10000):
+        # Local metadata index consulted before any registry call
+        self.package_index = package_index
+        # Skip live npm/PyPI lookups entirely, e.g. on air-gapped nodes
+        self.offline = offline
+        # Fetch only the /latest manifest instead of the full packument
+        self.lightweight_metadata = lightweight_metadata
+        self.npm_registry_url = npm_registry_url.rstrip('/')
+        self.session = requests.Session()
+        # Registry lookups by "npm:<name>" / "pypi:<name>"; packages that do not exist
+        # are remembered for negative_ttl, transient failures are not cached
+        self.metadata_cache = TTLCache(max_cached)
+        self.metadata_ttl = metadata_ttl
+        self.negative_ttl = negative_ttl
         self.npm_base_url = "https://www.npmjs.com/package/"
         self.pypi_base_url = "https://pypi.org/project/"
         self.github_base_url = "https://github.com/"
@@ -55,26 +80,33 @@ class RealLibraryDocAgent:
         
         return analyzed_libraries
     
+    def resolve_libraries(self, library_names: List[str], max_workers: int = 8) -> Dict[str, Dict[str, Any]]:
+        """Resolve each unique library name once, concurrently.
+        
+        Returns a name -> library info map so callers can share the same
+        info objects across every file that imports the library.
+        """
+        unique_names = list(dict.fromkeys(library_names))
+        if not unique_names:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_names))) as executor:
+            infos = executor.map(self._get_library_info, unique_names)
+            return {
+                name: info
+                for name, info in zip(unique_names, infos)
+                if info
+            }
+    
     def _extract_libraries(self, content: str) -> List[str]:
         """Extract library imports from JavaScript/React code"""
         libraries = []
         
-        # Pattern for import statements
-        import_patterns = [
-            r'import\s+.*?from\s+[\'"]([^\'"]+)[\'"]',  # import x from 'y'
-            r'import\s+[\'"]([^\'"]+)[\'"]',  # import 'y'
-            r'require\s*\(\s*[\'"]([^\'"]+)[\'"]\s*\)',  # require('y')
-        ]
-        
-        for pattern in import_patterns:
-            matches = re.finditer(pattern, content)
-            for match in matches:
-                import_path = match.group(1)
-                
-                # Extract library name from import path
-                library_name = self._extract_library_name(import_path)
-                if library_name and library_name not in libraries:
-                    libraries.append(library_name)
+        for import_path in extract_js_structure(content).imports:
+            # Extract library name from import path
+            library_name = self._extract_library_name(import_path)
+            if library_name and library_name not in libraries:
+                libraries.append(library_name)
         
         return libraries
     
@@ -96,15 +128,22 @@ class RealLibraryDocAgent:
         if library_name in self.library_mappings:
             return self.library_mappings[library_name]
         
-        # Try to fetch from npm
-        npm_info = self._fetch_npm_info(library_name)
-        if npm_info:
-            return npm_info
+        # Check the offline package index
+        index_info = self._lookup_package_index(library_name)
+        if index_info:
+            return index_info
         
-        # Try to fetch from PyPI
-        pypi_info = self._fetch_pypi_info(library_name)
-        if pypi_info:
-            return pypi_info
+        if not self.offline:
+            # Try to fetch from npm
+            npm_info = self._fetch_npm_info(library_name)
+            if npm_info is not MISSING and npm_info:
+                return npm_info
+            
+            # Try to fetch from PyPI, unless npm could not say whether the package is there
+            if npm_info is None:
+                pypi_info = self._fetch_pypi_info(library_name)
+                if pypi_info is not MISSING and pypi_info:
+                    return pypi_info
         
         # Fallback
         return {
@@ -115,36 +154,122 @@ class RealLibraryDocAgent:
             "docs": f"https://www.npmjs.com/package/{library_name}"
         }
     
+    def _lookup_package_index(self, library_name: str) -> Dict[str, Any]:
+        """Resolve a library from the offline package index, if one is loaded"""
+        if self.package_index is None:
+            return None
+        record = self.package_index.get(library_name)
+        if record is None:
+            return None
+        
+        if record["ecosystem"] == "npm":
+            link = f"https://www.npmjs.com/package/{library_name}"
+        else:
+            link = f"https://pypi.org/project/{library_name}/"
+        
+        return {
+            "name": library_name,
+            "type": record["ecosystem"],
+            "description": record["summary"] or f"Library: {library_name}",
+            "link": link,
+            "docs": record["docs"] or link,
+            "version": record["version"] or ""
+        }
+    
+    def _cached_lookup(self, key: str, fetch) -> Optional[Dict[str, Any]]:
+        """Serve a registry lookup from metadata_cache, calling fetch on a miss.
+        
+        fetch returns the info, None when the package does not exist, or
+        MISSING when the registry could not answer (an error or an oversized
+        response). MISSING is passed back to the caller and not cached.
+        """
+        cached = self.metadata_cache.get(key)
+        if cached is not MISSING:
+            return cached
+        info = fetch()
+        if info is MISSING:
+            return MISSING
+        self.metadata_cache.put(key, info, self.metadata_ttl if info else self.negative_ttl)
+        return info
+    
     def _fetch_npm_info(self, package_name: str) -> Dict[str, Any]:
         """Fetch package information from npm"""
+        fetch = self._fetch_npm_latest if self.lightweight_metadata else self._fetch_npm_packument
+        return self._cached_lookup(f"npm:{package_name}", lambda: fetch(package_name))
+    
+    def _fetch_npm_latest(self, package_name: str) -> Dict[str, Any]:
+        """Fetch only the latest-version manifest (a few KB) from npm"""
+        try:
+            url = f"{self.npm_registry_url}/{package_name}/latest"
+            with self.session.get(url, timeout=5, stream=True) as response:
+                if response.status_code == 404:
+                    return None
+                if response.status_code != 200:
+                    return MISSING
+                data = self._read_json_limited(response)
+            
+            if data is not MISSING:
+                return self._format_npm_info(package_name, data.get('description'), data.get('version', ''))
+        except Exception as e:
+            print(f"Error fetching npm info for {package_name}: {e}")
+        
+        return MISSING
+    
+    def _fetch_npm_packument(self, package_name: str) -> Dict[str, Any]:
+        """Fetch the full packument with every version (legacy mode)"""
         try:
-            url = f"https://registry.npmjs.org/{package_name}"
-            response = requests.get(url, timeout=5)
+            url = f"{self.npm_registry_url}/{package_name}"
+            response = self.session.get(url, timeout=5)
             
+            if response.status_code == 404:
+                return None
             if response.status_code == 200:
                 data = response.json()
                 latest_version = data.get('dist-tags', {}).get('latest', '')
                 version_data = data.get('versions', {}).get(latest_version, {})
                 
-                return {
-                    "name": package_name,
-                    "type": "npm",
-                    "description": version_data.get('description', f'NPM package: {package_name}'),
-                    "link": f"https://www.npmjs.com/package/{package_name}",
-                    "docs": f"https://www.npmjs.com/package/{package_name}",
-                    "version": latest_version
-                }
+                return self._format_npm_info(package_name, version_data.get('description'), latest_version)
         except Exception as e:
             print(f"Error fetching npm info for {package_name}: {e}")
         
-        return None
+        return MISSING
+    
+    def _read_json_limited(self, response) -> Dict[str, Any]:
+        """Stream a response body and parse it, giving up past MAX_METADATA_BYTES
+        
+        An oversized body returns MISSING: the package exists, its metadata is unknown.
+        """
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=16384):
+            body += chunk
+            if len(body) > self.MAX_METADATA_BYTES:
+                print(f"Registry response for {response.url} exceeds {self.MAX_METADATA_BYTES} bytes, skipping")
+                return MISSING
+        return json.loads(body)
+    
+    def _format_npm_info(self, package_name: str, description: Optional[str], version: str) -> Dict[str, Any]:
+        """Build library info from npm metadata fields"""
+        return {
+            "name": package_name,
+            "type": "npm",
+            "description": description or f'NPM package: {package_name}',
+            "link": f"https://www.npmjs.com/package/{package_name}",
+            "docs": f"https://www.npmjs.com/package/{package_name}",
+            "version": version
+        }
     
     def _fetch_pypi_info(self, package_name: str) -> Dict[str, Any]:
         """Fetch package information from PyPI"""
+        return self._cached_lookup(f"pypi:{package_name}", lambda: self._fetch_pypi_json(package_name))
+    
+    def _fetch_pypi_json(self, package_name: str) -> Dict[str, Any]:
+        """Fetch the PyPI JSON document for a package"""
         try:
             url = f"https://pypi.org/pypi/{package_name}/json"
-            response = requests.get(url, timeout=5)
+            response = self.session.get(url, timeout=5)
             
+            if response.status_code == 404:
+                return None
             if response.status_code == 200:
                 data = response.json()
                 info = data.get('info', {})
@@ -160,7 +285,7 @@ class RealLibraryDocAgent:
         except Exception as e:
             print(f"Error fetching PyPI info for {package_name}: {e}")
         
-        return None
+        return MISSING
     
     def get_library_summary(self, libraries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Create a summary of all libraries used"""
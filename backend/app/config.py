@@ -8,6 +8,8 @@ class Config:
     NEMOTRON_MODEL_NAME: str = os.getenv("NEMOTRON_MODEL_NAME", "nvidia/nemotron-3-49b-super")
     NEMOTRON_DEVICE: str = os.getenv("NEMOTRON_DEVICE", "cuda" if os.getenv("CUDA_VISIBLE_DEVICES") else "cpu")
     NEMOTRON_MAX_LENGTH: int = int(os.getenv("NEMOTRON_MAX_LENGTH", "150"))
+    NEMOTRON_CONTEXT_TOKENS: int = int(os.getenv("NEMOTRON_CONTEXT_TOKENS", "8192"))
+    FILE_PROMPT_MAX_TOKENS: int = int(os.getenv("FILE_PROMPT_MAX_TOKENS", "2048"))  # 0 = whatever the context leaves
     NEMOTRON_TEMPERATURE: float = float(os.getenv("NEMOTRON_TEMPERATURE", "0.7"))
     NEMOTRON_API_ENDPOINT: str = os.getenv("NEMOTRON_API_ENDPOINT", "")
     
@@ -16,8 +18,58 @@ class Config:
     ENHANCED_RULE_BASED: bool = os.getenv("ENHANCED_RULE_BASED", "true").lower() == "true"
     
     # Performance Configuration
-    BATCH_SIZE: int = int(os.getenv("BATCH_SIZE", "1"))
+    BATCH_SIZE: int = int(os.getenv("BATCH_SIZE", "16"))
     CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    PARSE_WORKERS: int = int(os.getenv("PARSE_WORKERS", "0"))  # 0 = one per CPU
+    PARSE_CHUNK_SIZE: int = int(os.getenv("PARSE_CHUNK_SIZE", "64"))
+    PARSE_CACHE_PATH: str = os.path.expanduser(os.getenv("PARSE_CACHE_PATH", "~/.cache/docusynth/parse_cache.db"))
+    PARSE_CACHE_MAX_MB: int = int(os.getenv("PARSE_CACHE_MAX_MB", "256"))
+    GENERATION_CACHE_MAX_ENTRIES: int = int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "10000"))
+    GENERATION_CACHE_PATH: str = os.path.expanduser(os.getenv("GENERATION_CACHE_PATH", ""))  # empty = memory only
+    GENERATION_CACHE_DISK_MAX_MB: int = int(os.getenv("GENERATION_CACHE_DISK_MAX_MB", "512"))
+    FILE_RECORD_CACHE_PATH: str = os.path.expanduser(os.getenv("FILE_RECORD_CACHE_PATH", "~/.cache/docusynth/file_records.db"))
+    FILE_RECORD_CACHE_MAX_MB: int = int(os.getenv("FILE_RECORD_CACHE_MAX_MB", "512"))
+    DEDUP_UPLOADS: bool = os.getenv("DEDUP_UPLOADS", "true").lower() == "true"
+    STREAM_ZIP_INGESTION: bool = os.getenv("STREAM_ZIP_INGESTION", "true").lower() == "true"
+    REGISTRY_MAX_CONCURRENCY: int = int(os.getenv("REGISTRY_MAX_CONCURRENCY", "8"))
+    REGISTRY_CACHE_TTL: float = float(os.getenv("REGISTRY_CACHE_TTL", "3600"))
+    REGISTRY_NEGATIVE_TTL: float = float(os.getenv("REGISTRY_NEGATIVE_TTL", "600"))
+    PACKAGE_INDEX_PATH: str = os.getenv("PACKAGE_INDEX_PATH", "")
+    LIBRARY_LOOKUP_OFFLINE: bool = os.getenv("LIBRARY_LOOKUP_OFFLINE", "false").lower() == "true"
+    NPM_LIGHTWEIGHT_METADATA: bool = os.getenv("NPM_LIGHTWEIGHT_METADATA", "true").lower() == "true"
+    FILE_CLASSIFICATION_ENABLED: bool = os.getenv("FILE_CLASSIFICATION_ENABLED", "true").lower() == "true"
+    CLASSIFIER_SAMPLE_BYTES: int = int(os.getenv("CLASSIFIER_SAMPLE_BYTES", "8192"))
+    CLASSIFIER_MAX_AVG_LINE_LENGTH: int = int(os.getenv("CLASSIFIER_MAX_AVG_LINE_LENGTH", "300"))
+    CLASSIFIER_MAX_LINE_LENGTH: int = int(os.getenv("CLASSIFIER_MAX_LINE_LENGTH", "5000"))
+    CLASSIFIER_MAX_ENTROPY: float = float(os.getenv("CLASSIFIER_MAX_ENTROPY", "5.8"))
+    
+    # Analysis Executor Configuration
+    MAX_CONCURRENT_ANALYSES: int = int(os.getenv("MAX_CONCURRENT_ANALYSES", "2"))
+    ANALYSIS_QUEUE_SIZE: int = int(os.getenv("ANALYSIS_QUEUE_SIZE", "16"))
+    ANALYSIS_STAGE_WORKERS: int = int(os.getenv("ANALYSIS_STAGE_WORKERS", "4"))
+    ANALYSIS_LEASE_SECONDS: float = float(os.getenv("ANALYSIS_LEASE_SECONDS", "120"))
+    ANALYSIS_CONTEXT_TTL: float = float(os.getenv("ANALYSIS_CONTEXT_TTL", "3600"))
+    ANALYSIS_CONTEXT_MAX_FINISHED: int = int(os.getenv("ANALYSIS_CONTEXT_MAX_FINISHED", "64"))
+    ANALYSIS_CONTEXT_MAX_MB: int = int(os.getenv("ANALYSIS_CONTEXT_MAX_MB", "256"))
+    ANALYSIS_STORE_BACKEND: str = os.getenv("ANALYSIS_STORE_BACKEND", "sqlite")  # sqlite or memory
+    ANALYSIS_STORE_PATH: str = os.path.expanduser(os.getenv("ANALYSIS_STORE_PATH", "~/.cache/docusynth/analysis.db"))
+    RESULT_PAGE_SIZE: int = int(os.getenv("RESULT_PAGE_SIZE", "100"))
+    RESULT_MAX_PAGE_SIZE: int = int(os.getenv("RESULT_MAX_PAGE_SIZE", "1000"))
+    PROGRESS_HEARTBEAT_SECONDS: float = float(os.getenv("PROGRESS_HEARTBEAT_SECONDS", "15"))
+    PROGRESS_HISTORY_SIZE: int = int(os.getenv("PROGRESS_HISTORY_SIZE", "256"))
+    PROGRESS_QUEUE_SIZE: int = int(os.getenv("PROGRESS_QUEUE_SIZE", "256"))
+    PROGRESS_POLL_INTERVAL: float = float(os.getenv("PROGRESS_POLL_INTERVAL", "1.0"))
+    PROGRESS_RETAIN_SECONDS: float = float(os.getenv("PROGRESS_RETAIN_SECONDS", "300"))
+    PROGRESS_STORE_INTERVAL: float = float(os.getenv("PROGRESS_STORE_INTERVAL", "1.0"))
+    MAX_UPLOAD_MB: int = int(os.getenv("MAX_UPLOAD_MB", "5120"))
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+    UPLOAD_DIR: str = os.path.expanduser(os.getenv("UPLOAD_DIR", ""))  # empty = system temp dir
+    UPLOAD_SESSION_TTL: float = float(os.getenv("UPLOAD_SESSION_TTL", "86400"))
+    
+    # GitHub Configuration
+    GITHUB_TOKEN: str = os.getenv("GITHUB_TOKEN", "")  # for fetching changed files of private repos
+    GITHUB_WEBHOOK_SECRET: str = os.getenv("GITHUB_WEBHOOK_SECRET", "")  # webhooks are refused while unset
+    GITHUB_RAW_URL: str = os.getenv("GITHUB_RAW_URL", "https://raw.githubusercontent.com")
     
     # API Configuration
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
@@ -42,5 +94,21 @@ class Config:
         """Get performance configuration."""
         return {
             "batch_size": cls.BATCH_SIZE,
-            "cache_enabled": cls.CACHE_ENABLED
+            "cache_enabled": cls.CACHE_ENABLED,
+            "parse_workers": cls.PARSE_WORKERS,
+            "parse_chunk_size": cls.PARSE_CHUNK_SIZE,
+            "generation_cache_max_entries": cls.GENERATION_CACHE_MAX_ENTRIES,
+            "generation_cache_path": cls.GENERATION_CACHE_PATH,
+            "generation_cache_disk_max_mb": cls.GENERATION_CACHE_DISK_MAX_MB,
+            "stream_zip_ingestion": cls.STREAM_ZIP_INGESTION,
+            "parse_cache_path": cls.PARSE_CACHE_PATH,
+            "parse_cache_max_mb": cls.PARSE_CACHE_MAX_MB,
+            "registry_max_concurrency": cls.REGISTRY_MAX_CONCURRENCY,
+            "registry_cache_ttl": cls.REGISTRY_CACHE_TTL,
+            "registry_negative_ttl": cls.REGISTRY_NEGATIVE_TTL,
+            "package_index_path": cls.PACKAGE_INDEX_PATH,
+            "library_lookup_offline": cls.LIBRARY_LOOKUP_OFFLINE,
+            "npm_lightweight_metadata": cls.NPM_LIGHTWEIGHT_METADATA,
+            "file_classification_enabled": cls.FILE_CLASSIFICATION_ENABLED,
+            "classifier_sample_bytes": cls.CLASSIFIER_SAMPLE_BYTES
         } 
\ No newline at end of file
@@ -0,0 +1,218 @@
+import asyncio
+import functools
+import math
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Coroutine, Dict, Iterator, List, Optional
+
+
+class AnalysisQueueFull(Exception):
+    """Raised when an analysis is submitted while the job queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Analysis queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AnalysisExecutor:
+    """Runs analysis jobs off the request path with bounded concurrency.
+
+    Jobs are coroutine functions placed on a bounded asyncio queue and
+    drained by max_concurrent worker tasks. Inside a job, blocking or
+    CPU-bound stages go through run_stage, which hands them to a bounded
+    thread pool so the event loop keeps serving /status and /analyze.
+    stream_stage does the same for generator stages, handing each item
+    back to the job as soon as it is produced.
+    """
+
+    def __init__(self, max_concurrent: int = 2, max_queued: int = 16, stage_workers: int = 4):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(1, max_queued)
+        self._stage_pool = ThreadPoolExecutor(max_workers=max(1, stage_workers),
+                                              thread_name_prefix="analysis-stage")
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._running = 0
+        self._durations = []
+        # Job ids queued or running in this process; the queue itself dies with it
+        self._jobs: Counter = Counter()
+        # Names this process in stored leases; pids repeat across container restarts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    def _ensure_workers(self):
+        """Start the queue and worker tasks on the running event loop."""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queued)
+            self._workers = [
+                asyncio.create_task(self._worker()) for _ in range(self.max_concurrent)
+            ]
+
+    async def _worker(self):
+        while True:
+            job_id, job, args = await self._queue.get()
+            self._running += 1
+            started = time.monotonic()
+            try:
+                await job(*args)
+                self.stats["completed"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"Analysis job {job_id} failed: {e}")
+            finally:
+                self._running -= 1
+                self._jobs -= Counter({job_id: 1})
+                # Keep a short window of durations for the Retry-After estimate
+                self._durations = (self._durations + [time.monotonic() - started])[-20:]
+                self._queue.task_done()
+
+    def submit(self, job_id: str, job: Callable[..., Coroutine[Any, Any, Any]], *args):
+        """Queue a job, raising AnalysisQueueFull when the queue has no room."""
+        self._ensure_workers()
+        try:
+            self._queue.put_nowait((job_id, job, args))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise AnalysisQueueFull(self.retry_after())
+        self._jobs[job_id] += 1
+        self.stats["submitted"] += 1
+
+    def holds(self, job_id: str) -> bool:
+        """Whether job_id is queued or running in this process."""
+        return self._jobs[job_id] > 0
+
+    def job_ids(self) -> List[str]:
+        """Ids of the jobs queued or running in this process."""
+        return list(self._jobs)
+
+    async def run_stage(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking pipeline stage in the stage thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._stage_pool, functools.partial(fn, *args, **kwargs))
+
+    async def stream_stage(self, fn: Callable[..., Iterator[Any]], *args,
+                           buffer: int = 16, **kwargs) -> AsyncIterator[Any]:
+        """Run a blocking generator in the stage thread pool and yield its items as they are produced.
+
+        At most buffer items wait for the consumer; beyond that the generator
+        blocks, so a slow consumer holds back the pipeline instead of memory
+        growing. Exceptions from the generator are raised here. If the
+        consumer stops early, the generator stops at its next item.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, buffer))
+        finished = object()
+        stopped = threading.Event()
+
+        def produce():
+            try:
+                for item in fn(*args, **kwargs):
+                    if stopped.is_set():
+                        return
+                    asyncio.run_coroutine_threadsafe(queue.put((item, None)), loop).result()
+                outcome = (finished, None)
+            except Exception as e:
+                outcome = (finished, e)
+            if not stopped.is_set():
+                asyncio.run_coroutine_threadsafe(queue.put(outcome), loop).result()
+
+        loop.run_in_executor(self._stage_pool, produce)
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is finished:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            stopped.set()
+            # Unblock a producer waiting on a full queue so it sees stopped
+            while not queue.empty():
+                queue.get_nowait()
+
+    def retry_after(self) -> int:
+        """Estimate seconds until a queue slot frees up."""
+        average = sum(self._durations) / len(self._durations) if self._durations else 5.0
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return max(1, math.ceil(average * (queued + 1) / self.max_concurrent))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return queue depth and job counters."""
+        return {
+            **self.stats,
+            "running": self._running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued
+        }
+
+    async def shutdown(self):
+        """Cancel idle workers and stop the stage pool."""
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        self._queue = None
+        self._stage_pool.shutdown(wait=False)
+
+
+class AnalysisLease:
+    """Records which worker process holds an upload's queued or running analysis.
+
+    The executor's queue lives in one process's memory, but the "queued" or
+    running status an upload gets lives in the shared store and outlives a
+    restart or a crashed worker. acquire() puts a lease (worker id, expiry)
+    on the upload, renewed by a heartbeat while the job is queued or
+    running. is_held() tells whether a stored in-flight status is still
+    backed by a live job: this worker's leases count while its executor has
+    the job, other workers' until they expire. A status that is not held
+    can be resubmitted.
+    """
+
+    def __init__(self, store, executor: AnalysisExecutor, lease_seconds: float = 120.0):
+        self.store = store
+        self.executor = executor
+        self.lease_seconds = max(1.0, lease_seconds)
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    def _lease(self) -> Dict[str, Any]:
+        return {"worker": self.executor.worker_id, "expires": time.time() + self.lease_seconds}
+
+    def acquire(self, upload_id: str):
+        """Lease upload_id to this worker for a job just submitted to the executor."""
+        self.store.update_upload(upload_id, analysis_lease=self._lease())
+        if self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._renew_forever())
+
+    def is_held(self, upload_id: str, upload: Dict[str, Any]) -> bool:
+        """Whether a live worker still holds the analysis of upload (its stored row)."""
+        lease = upload.get("analysis_lease") or {}
+        if lease.get("worker") == self.executor.worker_id:
+            return self.executor.holds(upload_id)
+        return lease.get("expires", 0) > time.time()
+
+    def renew(self):
+        """Extend the leases of the uploads whose jobs this worker holds (runs in the stage pool)."""
+        lease = self._lease()
+        for job_id in self.executor.job_ids():
+            if self.store.has_upload(job_id):
+                self.store.update_upload(job_id, analysis_lease=lease)
+
+    async def _renew_forever(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.executor.run_stage(self.renew)
+            except Exception as e:
+                print(f"Could not renew analysis leases: {e}")
+
+    def stop(self):
+        """Stop the heartbeat; call before shutting the executor down."""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
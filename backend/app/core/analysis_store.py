@@ -0,0 +1,403 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class AnalysisStore:
+    """Storage for uploads, per-file analysis rows and library records.
+
+    Upload metadata is a small JSON document merged by update_upload on
+    every progress change. An upload's code file list, which can run to
+    thousands of paths, is stored apart from it once by put_code_files. Analysis
+    results are split so they can be written as pipeline stages finish and
+    read back a page at a time:
+    - files: one row per (upload_id, filename), ordered by insertion position
+    - libraries: one row per (upload_id, library name)
+    - result: project-level fields (summary, cross-references, metadata)
+    get_result reassembles the full document when a caller needs it.
+    """
+
+    def next_upload_number(self) -> int:
+        """Monotonic counter for sequential upload ids, shared by every worker."""
+        raise NotImplementedError
+
+    def create_upload(self, upload_id: str, metadata: Dict[str, Any]):
+        raise NotImplementedError
+
+    def get_upload(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """Upload metadata, or None if the upload does not exist."""
+        raise NotImplementedError
+
+    def has_upload(self, upload_id: str) -> bool:
+        return self.get_upload(upload_id) is not None
+
+    def update_upload(self, upload_id: str, **fields: Any):
+        """Merge fields into the upload's metadata."""
+        raise NotImplementedError
+
+    def delete_upload(self, upload_id: str):
+        """Remove an upload with all of its files, libraries and result."""
+        raise NotImplementedError
+
+    def put_code_files(self, upload_id: str, code_files: List[str]):
+        """Store the paths an upload's analysis will read, once, outside its metadata."""
+        raise NotImplementedError
+
+    def get_code_files(self, upload_id: str) -> List[str]:
+        raise NotImplementedError
+
+    def count_uploads(self) -> int:
+        raise NotImplementedError
+
+    def find_uploads(self, sha256: str) -> List[str]:
+        """Ids of uploads whose archive has this SHA-256, newest first."""
+        raise NotImplementedError
+
+    def put_files(self, upload_id: str, files: Iterable[Dict[str, Any]], key: str = "filename"):
+        """Insert or replace per-file rows; replaced files keep their position."""
+        raise NotImplementedError
+
+    def delete_files(self, upload_id: str, filenames: Iterable[str]):
+        raise NotImplementedError
+
+    def get_file(self, upload_id: str, filename: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def list_files(self, upload_id: str, after: int = 0,
+                   limit: Optional[int] = None) -> List[Tuple[int, Dict[str, Any]]]:
+        """(position, file) pairs with position > after, in insertion order."""
+        raise NotImplementedError
+
+    def count_files(self, upload_id: str) -> int:
+        raise NotImplementedError
+
+    def put_libraries(self, upload_id: str, libraries: Iterable[Dict[str, Any]]):
+        """Insert or replace library records keyed by their 'name'."""
+        raise NotImplementedError
+
+    def get_libraries(self, upload_id: str) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def set_result(self, upload_id: str, result: Dict[str, Any]):
+        """Store project-level result fields; a 'files' list is stored as file rows instead."""
+        raise NotImplementedError
+
+    def get_result_fields(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """Project-level result fields without files, or None if no result yet."""
+        raise NotImplementedError
+
+    def get_result(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        """The full result document with its files, or None if no result yet."""
+        result = self.get_result_fields(upload_id)
+        if result is None:
+            return None
+        result["files"] = [data for _, data in self.list_files(upload_id)]
+        return result
+
+    def close(self):
+        pass
+
+
+class MemoryAnalysisStore(AnalysisStore):
+    """Process-local store; state is lost on restart and not shared between workers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._uploads: Dict[str, Dict[str, Any]] = {}
+        self._code_files: Dict[str, List[str]] = {}
+        self._files: Dict[str, Dict[str, Tuple[int, Dict[str, Any]]]] = {}
+        self._libraries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+
+    def next_upload_number(self) -> int:
+        with self._lock:
+            self._counter += 1
+            return self._counter
+
+    def create_upload(self, upload_id: str, metadata: Dict[str, Any]):
+        with self._lock:
+            self._uploads[upload_id] = copy.deepcopy(metadata)
+            self._files[upload_id] = {}
+            self._libraries[upload_id] = {}
+
+    def get_upload(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            metadata = self._uploads.get(upload_id)
+            return copy.deepcopy(metadata) if metadata is not None else None
+
+    def update_upload(self, upload_id: str, **fields: Any):
+        with self._lock:
+            if upload_id in self._uploads:
+                self._uploads[upload_id].update(copy.deepcopy(fields))
+
+    def delete_upload(self, upload_id: str):
+        with self._lock:
+            for table in (self._uploads, self._code_files, self._files, self._libraries, self._results):
+                table.pop(upload_id, None)
+
+    def put_code_files(self, upload_id: str, code_files: List[str]):
+        with self._lock:
+            self._code_files[upload_id] = list(code_files)
+
+    def get_code_files(self, upload_id: str) -> List[str]:
+        with self._lock:
+            return list(self._code_files.get(upload_id, []))
+
+    def count_uploads(self) -> int:
+        return len(self._uploads)
+
+    def find_uploads(self, sha256: str) -> List[str]:
+        with self._lock:
+            # Dicts keep insertion order, so reversed is newest first
+            return [upload_id for upload_id, metadata in reversed(self._uploads.items())
+                    if metadata.get("sha256") == sha256]
+
+    def put_files(self, upload_id: str, files: Iterable[Dict[str, Any]], key: str = "filename"):
+        with self._lock:
+            rows = self._files.setdefault(upload_id, {})
+            position = max((existing for existing, _ in rows.values()), default=0)
+            for data in files:
+                filename = data[key]
+                if filename in rows:
+                    rows[filename] = (rows[filename][0], copy.deepcopy(data))
+                else:
+                    position += 1
+                    rows[filename] = (position, copy.deepcopy(data))
+
+    def delete_files(self, upload_id: str, filenames: Iterable[str]):
+        with self._lock:
+            rows = self._files.get(upload_id, {})
+            for filename in filenames:
+                rows.pop(filename, None)
+
+    def get_file(self, upload_id: str, filename: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._files.get(upload_id, {}).get(filename)
+            return copy.deepcopy(row[1]) if row else None
+
+    def list_files(self, upload_id: str, after: int = 0,
+                   limit: Optional[int] = None) -> List[Tuple[int, Dict[str, Any]]]:
+        with self._lock:
+            rows = sorted(row for row in self._files.get(upload_id, {}).values() if row[0] > after)
+            rows = rows[:limit] if limit is not None else rows
+            return [(position, copy.deepcopy(data)) for position, data in rows]
+
+    def count_files(self, upload_id: str) -> int:
+        return len(self._files.get(upload_id, {}))
+
+    def put_libraries(self, upload_id: str, libraries: Iterable[Dict[str, Any]]):
+        with self._lock:
+            rows = self._libraries.setdefault(upload_id, {})
+            for library in libraries:
+                rows[library["name"]] = copy.deepcopy(library)
+
+    def get_libraries(self, upload_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return copy.deepcopy(list(self._libraries.get(upload_id, {}).values()))
+
+    def set_result(self, upload_id: str, result: Dict[str, Any]):
+        fields = {name: value for name, value in result.items() if name != "files"}
+        if "files" in result:
+            self.put_files(upload_id, result["files"])
+        with self._lock:
+            self._results[upload_id] = copy.deepcopy(fields)
+
+    def get_result_fields(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            fields = self._results.get(upload_id)
+            return copy.deepcopy(fields) if fields is not None else None
+
+
+class SQLiteAnalysisStore(AnalysisStore):
+    """SQLite-backed store shared by every worker process using the same file.
+
+    Uses WAL so readers never block the writer. Each process holds one
+    connection guarded by a lock, like ParseCache. update_upload sets the
+    given metadata fields with one json_set statement, so concurrent workers
+    cannot lose each other's updates and progress writes never read the
+    document back into Python.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS uploads ("
+            "upload_id TEXT PRIMARY KEY, created_at REAL NOT NULL, "
+            "metadata TEXT NOT NULL, result TEXT);"
+            "CREATE TABLE IF NOT EXISTS files ("
+            "upload_id TEXT NOT NULL REFERENCES uploads(upload_id) ON DELETE CASCADE, "
+            "filename TEXT NOT NULL, position INTEGER NOT NULL, data TEXT NOT NULL, "
+            "PRIMARY KEY (upload_id, filename));"
+            "CREATE INDEX IF NOT EXISTS idx_files_upload_position ON files(upload_id, position);"
+            "CREATE INDEX IF NOT EXISTS idx_uploads_sha256 ON uploads(json_extract(metadata, '$.sha256'));"
+            "CREATE TABLE IF NOT EXISTS code_files ("
+            "upload_id TEXT PRIMARY KEY REFERENCES uploads(upload_id) ON DELETE CASCADE, "
+            "paths TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS libraries ("
+            "upload_id TEXT NOT NULL REFERENCES uploads(upload_id) ON DELETE CASCADE, "
+            "name TEXT NOT NULL, data TEXT NOT NULL, "
+            "PRIMARY KEY (upload_id, name));"
+            "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+            "INSERT OR IGNORE INTO counters (name, value) VALUES ('uploads', 0);"
+        )
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def next_upload_number(self) -> int:
+        with self._transaction() as conn:
+            conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'uploads'")
+            return conn.execute("SELECT value FROM counters WHERE name = 'uploads'").fetchone()[0]
+
+    def create_upload(self, upload_id: str, metadata: Dict[str, Any]):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM uploads WHERE upload_id = ?", (upload_id,))
+            conn.execute(
+                "INSERT INTO uploads (upload_id, created_at, metadata) VALUES (?, ?, ?)",
+                (upload_id, time.time(), json.dumps(metadata))
+            )
+
+    def get_upload(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT metadata FROM uploads WHERE upload_id = ?", (upload_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def has_upload(self, upload_id: str) -> bool:
+        return bool(self._query("SELECT 1 FROM uploads WHERE upload_id = ?", (upload_id,)))
+
+    def update_upload(self, upload_id: str, **fields: Any):
+        if not fields:
+            return
+        # One '$."name"', json(value) pair per field; a single statement needs no read-modify-write
+        paths = ", ".join("?, json(?)" for _ in fields)
+        params = []
+        for name, value in fields.items():
+            params += [f'$."{name}"', json.dumps(value)]
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE uploads SET metadata = json_set(metadata, {paths}) WHERE upload_id = ?",
+                (*params, upload_id)
+            )
+
+    def put_code_files(self, upload_id: str, code_files: List[str]):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO code_files (upload_id, paths) VALUES (?, ?)",
+                (upload_id, json.dumps(list(code_files)))
+            )
+
+    def get_code_files(self, upload_id: str) -> List[str]:
+        rows = self._query("SELECT paths FROM code_files WHERE upload_id = ?", (upload_id,))
+        return json.loads(rows[0][0]) if rows else []
+
+    def delete_upload(self, upload_id: str):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM uploads WHERE upload_id = ?", (upload_id,))
+
+    def count_uploads(self) -> int:
+        return self._query("SELECT COUNT(*) FROM uploads")[0][0]
+
+    def find_uploads(self, sha256: str) -> List[str]:
+        rows = self._query(
+            "SELECT upload_id FROM uploads WHERE json_extract(metadata, '$.sha256') = ? "
+            "ORDER BY created_at DESC, rowid DESC",
+            (sha256,)
+        )
+        return [upload_id for upload_id, in rows]
+
+    def put_files(self, upload_id: str, files: Iterable[Dict[str, Any]], key: str = "filename"):
+        with self._transaction() as conn:
+            position = conn.execute(
+                "SELECT COALESCE(MAX(position), 0) FROM files WHERE upload_id = ?", (upload_id,)
+            ).fetchone()[0]
+            rows = []
+            for data in files:
+                position += 1
+                rows.append((upload_id, data[key], position, json.dumps(data)))
+            conn.executemany(
+                "INSERT INTO files (upload_id, filename, position, data) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(upload_id, filename) DO UPDATE SET data = excluded.data",
+                rows
+            )
+
+    def delete_files(self, upload_id: str, filenames: Iterable[str]):
+        with self._transaction() as conn:
+            conn.executemany(
+                "DELETE FROM files WHERE upload_id = ? AND filename = ?",
+                [(upload_id, filename) for filename in filenames]
+            )
+
+    def get_file(self, upload_id: str, filename: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT data FROM files WHERE upload_id = ? AND filename = ?", (upload_id, filename))
+        return json.loads(rows[0][0]) if rows else None
+
+    def list_files(self, upload_id: str, after: int = 0,
+                   limit: Optional[int] = None) -> List[Tuple[int, Dict[str, Any]]]:
+        rows = self._query(
+            "SELECT position, data FROM files WHERE upload_id = ? AND position > ? ORDER BY position LIMIT ?",
+            (upload_id, after, -1 if limit is None else limit)
+        )
+        return [(position, json.loads(data)) for position, data in rows]
+
+    def count_files(self, upload_id: str) -> int:
+        return self._query("SELECT COUNT(*) FROM files WHERE upload_id = ?", (upload_id,))[0][0]
+
+    def put_libraries(self, upload_id: str, libraries: Iterable[Dict[str, Any]]):
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO libraries (upload_id, name, data) VALUES (?, ?, ?)",
+                [(upload_id, library["name"], json.dumps(library)) for library in libraries]
+            )
+
+    def get_libraries(self, upload_id: str) -> List[Dict[str, Any]]:
+        rows = self._query("SELECT data FROM libraries WHERE upload_id = ? ORDER BY rowid", (upload_id,))
+        return [json.loads(data) for data, in rows]
+
+    def set_result(self, upload_id: str, result: Dict[str, Any]):
+        fields = {name: value for name, value in result.items() if name != "files"}
+        if "files" in result:
+            self.put_files(upload_id, result["files"])
+        with self._transaction() as conn:
+            conn.execute("UPDATE uploads SET result = ? WHERE upload_id = ?", (json.dumps(fields), upload_id))
+
+    def get_result_fields(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT result FROM uploads WHERE upload_id = ?", (upload_id,))
+        return json.loads(rows[0][0]) if rows and rows[0][0] is not None else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_analysis_store(backend: str, path: str) -> AnalysisStore:
+    """Build the store named by ANALYSIS_STORE_BACKEND ('sqlite' or 'memory')."""
+    if backend == "memory":
+        return MemoryAnalysisStore()
+    if backend == "sqlite":
+        return SQLiteAnalysisStore(path)
+    raise ValueError(f"Unknown analysis store backend: {backend}")
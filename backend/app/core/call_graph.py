@@ -0,0 +1,149 @@
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.js_extractor import extract_js_structure
+from app.core.module_index import ModuleIndex
+from app.core.python_extractor import extract_python_structure
+
+
+class SymbolTable:
+    """Interns strings to dense integer IDs."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+
+    def intern(self, name: str) -> int:
+        symbol_id = self._ids.get(name)
+        if symbol_id is None:
+            symbol_id = len(self._names)
+            self._ids[name] = symbol_id
+            self._names.append(name)
+        return symbol_id
+
+    def lookup(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def name(self, symbol_id: int) -> str:
+        return self._names[symbol_id]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+class CallGraph:
+    """Project call graph built from per-file definitions and call sites.
+
+    Files and symbols are interned to integer IDs. Call sites are kept once
+    per (file, symbol) with their first line in flat arrays, so memory grows
+    with distinct calls rather than source size. resolve() maps each call to
+    the files defining the callee: the caller's own file, or the files it
+    imports. Calls are recorded by name only (a method call by its attribute),
+    so a project function is never matched from a file that does not import
+    it; d.get() is not a call to some module's get().
+    """
+
+    def __init__(self):
+        self.symbols = SymbolTable()
+        self.files = SymbolTable()
+        self._definitions: Dict[int, List[Tuple[int, int]]] = defaultdict(list)  # symbol -> [(file, line)]
+        self._call_file = array('I')
+        self._call_symbol = array('I')
+        self._call_line = array('I')
+        self._imports: Dict[int, List[str]] = {}
+        self._edges: Optional[List[Tuple[int, int, int, int]]] = None
+
+    def add_file(self, filename: str, definitions: Iterable[Tuple[str, Optional[int]]],
+                 calls: Iterable[Tuple[str, int]], imports: Iterable[str] = ()):
+        """Record one file's function definitions, call sites and imports."""
+        file_id = self.files.intern(filename)
+        for name, line in definitions:
+            self._definitions[self.symbols.intern(name)].append((file_id, line or 0))
+
+        seen: Set[int] = set()
+        for name, line in calls:
+            symbol_id = self.symbols.intern(name)
+            if symbol_id in seen:
+                continue
+            seen.add(symbol_id)
+            self._call_file.append(file_id)
+            self._call_symbol.append(symbol_id)
+            self._call_line.append(line or 0)
+
+        self._imports[file_id] = list(imports)
+        self._edges = None
+
+    def add_source(self, filename: str, content: str):
+        """Extract definitions, calls and imports from raw source and record them."""
+        if filename.endswith(('.py', '.pyx')):
+            try:
+                structure = extract_python_structure(content)
+            except SyntaxError:
+                return
+            definitions = [(func['name'], func['line_number']) for func in structure.functions]
+            self.add_file(filename, definitions, structure.calls, structure.module_imports)
+        else:
+            structure = extract_js_structure(content)
+            definitions = [(func['name'], func['line_number']) for func in structure.functions]
+            self.add_file(filename, definitions, structure.calls, structure.imports)
+
+    def resolve(self) -> List[Tuple[int, int, int, int]]:
+        """Return (caller file, symbol, defining file, line) edges for project-defined callees."""
+        if self._edges is not None:
+            return self._edges
+
+        module_index = ModuleIndex(self.files.name(i) for i in range(len(self.files)))
+        imported_files: Dict[int, Set[int]] = {}
+        for file_id, imports in self._imports.items():
+            importer = self.files.name(file_id)
+            targets = set()
+            for import_name in imports:
+                for target in module_index.resolve(import_name, importer):
+                    targets.add(self.files.lookup(target))
+            imported_files[file_id] = targets
+
+        edges = []
+        for caller, symbol_id, line in zip(self._call_file, self._call_symbol, self._call_line):
+            candidates = self._definitions.get(symbol_id)
+            if not candidates:
+                continue
+            defining_files = {file_id for file_id, _ in candidates}
+            if caller in defining_files:
+                targets = {caller}
+            else:
+                targets = defining_files & imported_files.get(caller, set())
+            for target in targets:
+                edges.append((caller, symbol_id, target, line))
+
+        self._edges = edges
+        return edges
+
+    def usage_map(self) -> Dict[str, List[Dict[str, object]]]:
+        """Function name -> definitions and resolved call sites, in ContextManagerAgent's shape."""
+        usage = defaultdict(list)
+        for symbol_id, definitions in self._definitions.items():
+            name = self.symbols.name(symbol_id)
+            for file_id, line in definitions:
+                usage[name].append({'file': self.files.name(file_id), 'type': 'defined', 'line': line or None})
+        for caller, symbol_id, target, line in self.resolve():
+            usage[self.symbols.name(symbol_id)].append({
+                'file': self.files.name(caller),
+                'type': 'called',
+                'line': line or None,
+                'target': self.files.name(target)
+            })
+        return dict(usage)
+
+    def call_edges(self) -> List[Dict[str, object]]:
+        """Cross-file call edges as dicts (calls within one file are left out)."""
+        return [
+            {
+                'from': self.files.name(caller),
+                'to': self.files.name(target),
+                'function': self.symbols.name(symbol_id),
+                'line': line or None
+            }
+            for caller, symbol_id, target, line in self.resolve()
+            if caller != target
+        ]
@@ -0,0 +1,350 @@
+import math
+import os
+import posixpath
+import re
+import zipfile
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Directories whose contents are third-party wherever they appear
+VENDORED_DIRS = {
+    'node_modules', 'bower_components', 'jspm_packages',
+    'third_party', 'third-party', 'site-packages', '.venv', 'venv', '__pycache__'
+}
+# Vendor and build output directories. These are also ordinary package names
+# (src/build/, tools/out/), so they only count directly inside a project root
+PROJECT_VENDORED_DIRS = {'vendor', 'vendors'}
+BUILD_DIRS = {'dist', 'build', 'out', '.next', '.nuxt', 'coverage', '.cache', 'public/build'}
+# Files that mark the directory holding them as a project root
+MANIFEST_FILES = {
+    'package.json', 'pyproject.toml', 'setup.py', 'setup.cfg', 'requirements.txt', 'Pipfile',
+    'tsconfig.json', 'composer.json', 'go.mod', 'Cargo.toml', 'Gemfile', 'pom.xml', 'build.gradle'
+}
+
+# Filenames that are minified or generated by convention
+GENERATED_NAME_PATTERNS = re.compile(
+    r'(\.min\.(js|mjs|cjs)$|[-.]bundle\.js$|\.chunk\.js$|-min\.js$|\.pack\.js$'
+    r'|_pb2(_grpc)?\.py$|\.generated\.\w+$|\.g\.(ts|js)$)',
+    re.IGNORECASE
+)
+
+# Markers code generators put in a comment in the first lines of their output
+GENERATED_MARKERS = (
+    '@generated', 'do not edit', 'code generated by', 'autogenerated',
+    'auto-generated', 'this file is automatically generated', 'webpackbootstrap',
+    '/*! for license information'
+)
+COMMENT_PREFIXES = ('#', '//', '/*', '*', '<!--', '"""', "'''")
+HEADER_LINES = 10
+
+# Category -> what happens to the file
+SKIP = 'skip'
+METADATA_ONLY = 'metadata_only'
+
+
+class GitignoreRules:
+    """gitignore-style patterns read from .gitignore files inside an archive.
+
+    Supports negation (!), directory-only patterns (trailing /), anchoring
+    (leading or inner /) and ** wildcards. Rules apply relative to the
+    directory of the .gitignore they came from; later rules win.
+    """
+
+    def __init__(self):
+        self._rules: List[Tuple[str, re.Pattern, bool, bool]] = []  # (base dir, regex, negate, dir_only)
+
+    def add_file(self, gitignore_path: str, text: str):
+        base = posixpath.dirname(gitignore_path)
+        for raw in text.splitlines():
+            line = raw.strip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            anchored = line.startswith('/') or '/' in line
+            line = line.lstrip('/')
+            if line:
+                self._rules.append((base, self._compile(line, anchored), negate, dir_only))
+
+    @staticmethod
+    def _compile(pattern: str, anchored: bool) -> re.Pattern:
+        parts = []
+        index = 0
+        while index < len(pattern):
+            char = pattern[index]
+            if pattern.startswith('**/', index):
+                parts.append('(?:.*/)?')
+                index += 3
+                continue
+            if pattern.startswith('**', index):
+                parts.append('.*')
+                index += 2
+                continue
+            if char == '*':
+                parts.append('[^/]*')
+            elif char == '?':
+                parts.append('[^/]')
+            else:
+                parts.append(re.escape(char))
+            index += 1
+        body = ''.join(parts)
+        prefix = '' if anchored else '(?:.*/)?'
+        # A match on a directory also covers everything beneath it
+        return re.compile(f'^{prefix}{body}(?:/.*)?$')
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def matches(self, path: str) -> Optional[str]:
+        """Return the matching pattern's .gitignore directory if path is ignored, else None."""
+        ignored_by = None
+        for base, regex, negate, dir_only in self._rules:
+            if base:
+                if not path.startswith(base + '/'):
+                    continue
+                relative = path[len(base) + 1:]
+            else:
+                relative = path
+            # Directory-only rules must match a parent directory, not the file itself
+            target = posixpath.dirname(relative) if dir_only else relative
+            if target and regex.match(target):
+                ignored_by = None if negate else (base or '.')
+        return ignored_by
+
+
+def _normalize(path: str) -> str:
+    normalized = path.replace('\\', '/')
+    while normalized.startswith('./'):
+        normalized = normalized[2:]
+    return normalized
+
+
+def find_project_roots(names: Iterable[str]) -> Set[str]:
+    """Directories in which build and vendor directory names are skipped.
+
+    These are the archive root, the one top-level directory wrapping
+    everything (as in GitHub archives), and every directory holding a
+    package manifest.
+    """
+    roots = {''}
+    top_levels = set()
+    for name in names:
+        normalized = _normalize(name).rstrip('/')
+        directory, basename = posixpath.split(normalized)
+        if basename in MANIFEST_FILES:
+            roots.add(directory)
+        top_levels.add(normalized.split('/', 1)[0] if '/' in normalized else '')
+    if len(top_levels) == 1:
+        roots |= top_levels
+    return roots
+
+
+def shannon_entropy(sample: str) -> float:
+    """Bits per character of sample."""
+    if not sample:
+        return 0.0
+    total = len(sample)
+    return -sum(count / total * math.log2(count / total) for count in Counter(sample).values())
+
+
+class ClassificationReport:
+    """Per-upload record of files that were skipped or reduced to metadata, and why."""
+
+    def __init__(self):
+        self.scanned = 0
+        self.analyzed = 0
+        self.entries: List[Dict[str, Any]] = []
+
+    def add(self, path: str, action: str, category: str, reason: str, size: int = 0):
+        self.entries.append({
+            'path': path,
+            'action': action,
+            'category': category,
+            'reason': reason,
+            'size': size
+        })
+
+    def to_dict(self) -> Dict[str, Any]:
+        by_category = Counter(entry['category'] for entry in self.entries)
+        return {
+            'scanned': self.scanned,
+            'analyzed': self.analyzed,
+            'skipped': [entry for entry in self.entries if entry['action'] == SKIP],
+            'metadata_only': [entry for entry in self.entries if entry['action'] == METADATA_ONLY],
+            'by_category': dict(by_category),
+            'bytes_skipped': sum(entry['size'] for entry in self.entries)
+        }
+
+
+class FileClassifier:
+    """Cheap triage of code files before parsing or LLM work.
+
+    Checks run cheapest first and stop at the first hit:
+    1. path: vendored directories, and build and vendor directories directly
+       inside a project root, are skipped; conventional minified/generated
+       names (*.min.js, *_pb2.py, ...) go metadata-only
+    2. .gitignore rules shipped in the archive: matching files are skipped
+    3. a sample of the first sample_bytes: generator markers, long lines and
+       character entropy flag generated or minified files as metadata-only
+    """
+
+    def __init__(self, sample_bytes: int = 8192, max_avg_line_length: int = 300,
+                 max_line_length: int = 5000, max_entropy: float = 5.8):
+        self.sample_bytes = sample_bytes
+        self.max_avg_line_length = max_avg_line_length
+        self.max_line_length = max_line_length
+        self.max_entropy = max_entropy
+
+    def classify_path(self, path: str, gitignore: Optional[GitignoreRules] = None,
+                      project_roots: Optional[Set[str]] = None) -> Optional[Tuple[str, str, str]]:
+        """Return (action, category, reason) from the path alone, or None.
+
+        project_roots (see find_project_roots) defaults to the archive root only.
+        """
+        normalized = _normalize(path)
+        directories = normalized.split('/')[:-1]
+        for directory in directories:
+            if directory in VENDORED_DIRS:
+                return SKIP, 'vendored', f"inside {directory}/"
+        roots = project_roots if project_roots is not None else {''}
+        for index, directory in enumerate(directories):
+            if '/'.join(directories[:index]) not in roots:
+                continue
+            if directory in PROJECT_VENDORED_DIRS:
+                return SKIP, 'vendored', f"inside {'/'.join(directories[:index + 1])}/"
+            if '/'.join(directories[index:index + 2]) in BUILD_DIRS or directory in BUILD_DIRS:
+                return SKIP, 'build_output', f"inside {'/'.join(directories[:index + 1])}/"
+        match = GENERATED_NAME_PATTERNS.search(normalized)
+        if match:
+            return METADATA_ONLY, 'generated_name', f"filename matches {match.group(0)}"
+        if gitignore:
+            ignored_by = gitignore.matches(normalized)
+            if ignored_by:
+                return SKIP, 'gitignored', f"matched .gitignore in {ignored_by}"
+        return None
+
+    def classify_sample(self, sample: str) -> Optional[Tuple[str, str, str]]:
+        """Return (action, category, reason) from the start of the file, or None."""
+        if not sample:
+            return None
+        for line in sample.split('\n', HEADER_LINES)[:HEADER_LINES]:
+            line = line[:1024].strip().lower()
+            if not line.startswith(COMMENT_PREFIXES):
+                continue
+            for marker in GENERATED_MARKERS:
+                if marker in line:
+                    return METADATA_ONLY, 'generated', f"header contains '{marker}'"
+
+        lines = sample.split('\n')
+        # A truncated last line is only partial, so judge on complete lines when there are any
+        complete = lines[:-1] if len(lines) > 1 else lines
+        longest = max(len(line) for line in complete)
+        average = sum(len(line) for line in complete) / len(complete)
+        if longest > self.max_line_length or average > self.max_avg_line_length:
+            return METADATA_ONLY, 'minified', f"line length avg {average:.0f}, max {longest}"
+
+        entropy = shannon_entropy(sample)
+        if entropy > self.max_entropy:
+            return METADATA_ONLY, 'high_entropy', f"entropy {entropy:.2f} bits/char"
+        return None
+
+    def classify(self, path: str, sample: Optional[str], gitignore: Optional[GitignoreRules] = None,
+                 project_roots: Optional[Set[str]] = None) -> Optional[Tuple[str, str, str]]:
+        return self.classify_path(path, gitignore, project_roots) or self.classify_sample(sample or '')
+
+    def load_zip_gitignore(self, zip_ref: zipfile.ZipFile) -> GitignoreRules:
+        """Collect every .gitignore inside an open archive, shallowest first."""
+        rules = GitignoreRules()
+        names = [name for name in zip_ref.namelist() if posixpath.basename(name) == '.gitignore']
+        for name in sorted(names, key=lambda name: name.count('/')):
+            rules.add_file(name, zip_ref.read(name).decode('utf-8', errors='ignore'))
+        return rules
+
+    def load_dir_gitignore(self, root: str) -> GitignoreRules:
+        """Collect every .gitignore under an extracted directory, shallowest first."""
+        rules = GitignoreRules()
+        found = []
+        for directory, _, files in os.walk(root):
+            if '.gitignore' in files:
+                found.append(os.path.relpath(os.path.join(directory, '.gitignore'), root).replace(os.sep, '/'))
+        for name in sorted(found, key=lambda name: name.count('/')):
+            with open(os.path.join(root, name), encoding='utf-8', errors='ignore') as f:
+                rules.add_file(name, f.read())
+        return rules
+
+    def filter_zip(self, zip_path: str, members: Iterable[str],
+                   report: ClassificationReport) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Split archive members into (files to analyze, metadata-only entries).
+
+        Only the first sample_bytes of each member are decompressed.
+        """
+        keep = []
+        metadata = []
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            gitignore = self.load_zip_gitignore(zip_ref)
+            roots = find_project_roots(zip_ref.namelist())
+            for member in members:
+                report.scanned += 1
+                size = zip_ref.getinfo(member).file_size
+                verdict = self.classify_path(member, gitignore, roots)
+                if verdict is None:
+                    with zip_ref.open(member) as f:
+                        sample = f.read(self.sample_bytes).decode('utf-8', errors='ignore')
+                    verdict = self.classify_sample(sample)
+                if self._record(member, size, verdict, report, metadata):
+                    keep.append(member)
+        report.analyzed = len(keep)
+        return keep, metadata
+
+    def filter_paths(self, root: str, file_paths: Iterable[str],
+                     report: ClassificationReport) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Split extracted files under root into (files to analyze, metadata-only entries)."""
+        keep = []
+        metadata = []
+        gitignore = self.load_dir_gitignore(root)
+        roots = find_project_roots(
+            os.path.relpath(os.path.join(directory, name), root).replace(os.sep, '/')
+            for directory, _, files in os.walk(root) for name in files
+        )
+        for file_path in file_paths:
+            report.scanned += 1
+            relative = os.path.relpath(file_path, root).replace(os.sep, '/')
+            size = os.path.getsize(file_path)
+            verdict = self.classify_path(relative, gitignore, roots)
+            if verdict is None:
+                with open(file_path, 'rb') as f:
+                    sample = f.read(self.sample_bytes).decode('utf-8', errors='ignore')
+                verdict = self.classify_sample(sample)
+            if self._record(file_path, size, verdict, report, metadata):
+                keep.append(file_path)
+        report.analyzed = len(keep)
+        return keep, metadata
+
+    def filter_contents(self, files: Dict[str, str], report: ClassificationReport,
+                        gitignore: Optional[GitignoreRules] = None) -> Tuple[Dict[str, str], List[Dict[str, Any]]]:
+        """Split already-read {path: content} into (files to analyze, metadata-only entries)."""
+        keep = {}
+        metadata = []
+        roots = find_project_roots(files)
+        for path, content in files.items():
+            report.scanned += 1
+            verdict = self.classify(path, content[:self.sample_bytes], gitignore, roots)
+            if self._record(path, len(content), verdict, report, metadata):
+                keep[path] = content
+        report.analyzed = len(keep)
+        return keep, metadata
+
+    @staticmethod
+    def _record(path: str, size: int, verdict: Optional[Tuple[str, str, str]],
+                report: ClassificationReport, metadata: List[Dict[str, Any]]) -> bool:
+        """Log a verdict in the report; True if the file should be fully analyzed."""
+        if verdict is None:
+            return True
+        action, category, reason = verdict
+        report.add(path, action, category, reason, size)
+        if action == METADATA_ONLY:
+            metadata.append({'path': path, 'size': size, 'category': category, 'reason': reason})
+        return False
@@ -1,16 +1,22 @@
-import ast
-import re
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Union
 from pathlib import Path
 import zipfile
 import tempfile
 import shutil
 
+from app.core.js_extractor import extract_js_structure
+from app.core.parse_cache import ParseCache
+from app.core.python_extractor import extract_python_structure
+
 class FileParser:
     """Handles parsing of code files and extraction of structural information."""
     
-    def __init__(self):
+    # Bump whenever parse output changes so cached results are invalidated
+    PARSER_VERSION = "4"
+    
+    def __init__(self, cache: Optional[ParseCache] = None):
+        self.cache = cache
         self.supported_extensions = {
             '.js': 'javascript',
             '.jsx': 'react',
@@ -35,6 +41,38 @@ class FileParser:
         
         return code_files
     
+    def list_zip_code_files(self, zip_path: str) -> List[str]:
+        """List code files in a zip by reading only its central directory."""
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            return [
+                info.filename for info in zip_ref.infolist()
+                if not info.is_dir() and self._is_code_file(info.filename)
+            ]
+    
+    def iter_zip_files(self, zip_path: str, members: Optional[List[str]] = None) -> Iterator[Tuple[str, bytes]]:
+        """Yield (path, bytes) for code files in a zip without extracting to disk.
+        
+        Entries are filtered on extension before anything is decompressed.
+        Pass members to read a known subset, e.g. one parse chunk.
+        """
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            if members is None:
+                members = [
+                    info.filename for info in zip_ref.infolist()
+                    if not info.is_dir() and self._is_code_file(info.filename)
+                ]
+            for member in members:
+                yield member, zip_ref.read(member)
+    
+    def _read_content(self, file_path: str, content: Optional[Union[str, bytes]]) -> str:
+        """Return file content, reading from disk only when none was passed in."""
+        if content is None:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        if isinstance(content, bytes):
+            return content.decode('utf-8')
+        return content
+    
     def _is_code_file(self, file_path: str) -> bool:
         """Check if file is a supported code file."""
         ext = Path(file_path).suffix.lower()
@@ -45,45 +83,42 @@ class FileParser:
         ext = Path(file_path).suffix.lower()
         return self.supported_extensions.get(ext, 'unknown')
     
-    def parse_python_file(self, file_path: str) -> Dict[str, Any]:
-        """Parse Python file using AST."""
+    def parse_python_file(self, file_path: str, content: Optional[Union[str, bytes]] = None) -> Dict[str, Any]:
+        """Parse Python file with a single-pass AST visitor."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = self._read_content(file_path, content)
             
-            tree = ast.parse(content)
+            cache_key = None
+            if self.cache is not None:
+                cache_key = ParseCache.make_key('file_parser.python', self.PARSER_VERSION, content)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
             
-            functions = []
-            classes = []
-            imports = []
+            structure = extract_python_structure(content)
             
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    functions.append({
-                        'name': node.name,
-                        'line_number': node.lineno,
-                        'parameters': [arg.arg for arg in node.args.args],
-                        'docstring': ast.get_docstring(node) or ""
-                    })
-                elif isinstance(node, ast.ClassDef):
-                    classes.append({
-                        'name': node.name,
-                        'line_number': node.lineno,
-                        'docstring': ast.get_docstring(node) or ""
-                    })
-                elif isinstance(node, ast.Import):
-                    for alias in node.names:
-                        imports.append(alias.name)
-                elif isinstance(node, ast.ImportFrom):
-                    if node.module:
-                        imports.append(node.module)
+            functions = [
+                {
+                    'name': func['name'],
+                    'line_number': func['line_number'],
+                    'parameters': func['parameters'],
+                    'docstring': func['docstring'],
+                    'is_async': func['is_async'],
+                    'class_name': func['class_name']
+                }
+                for func in structure.functions
+            ]
             
-            return {
+            result = {
                 'functions': functions,
-                'classes': classes,
-                'imports': imports,
+                'classes': structure.classes,
+                'imports': structure.imports,
+                'calls': structure.calls,
                 'line_count': len(content.split('\n'))
             }
+            if cache_key is not None:
+                self.cache.put(cache_key, result)
+            return result
         except Exception as e:
             return {
                 'functions': [],
@@ -93,60 +128,39 @@ class FileParser:
                 'error': str(e)
             }
     
-    def parse_javascript_file(self, file_path: str) -> Dict[str, Any]:
-        """Parse JavaScript/React file using regex patterns."""
+    def parse_javascript_file(self, file_path: str, content: Optional[Union[str, bytes]] = None) -> Dict[str, Any]:
+        """Parse JavaScript/React file with the linear JS/TS scanner."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            functions = []
-            imports = []
+            content = self._read_content(file_path, content)
             
-            # Extract function declarations
-            function_pattern = r'function\s+(\w+)\s*\(([^)]*)\)'
-            arrow_function_pattern = r'const\s+(\w+)\s*=\s*\([^)]*\)\s*=>'
-            method_pattern = r'(\w+)\s*\([^)]*\)\s*{'
+            cache_key = None
+            if self.cache is not None:
+                cache_key = ParseCache.make_key('file_parser.javascript', self.PARSER_VERSION, content)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
             
-            # Find regular functions
-            for match in re.finditer(function_pattern, content):
-                functions.append({
-                    'name': match.group(1),
-                    'parameters': [p.strip() for p in match.group(2).split(',') if p.strip()],
-                    'type': 'function'
-                })
+            structure = extract_js_structure(content)
             
-            # Find arrow functions
-            for match in re.finditer(arrow_function_pattern, content):
-                functions.append({
-                    'name': match.group(1),
-                    'parameters': [],
-                    'type': 'arrow_function'
-                })
-            
-            # Find method-like patterns
-            for match in re.finditer(method_pattern, content):
-                functions.append({
-                    'name': match.group(1),
-                    'parameters': [],
-                    'type': 'method'
-                })
-            
-            # Extract imports
-            import_patterns = [
-                r'import\s+.*?from\s+[\'"]([^\'"]+)[\'"]',
-                r'require\s*\(\s*[\'"]([^\'"]+)[\'"]',
-                r'import\s+[\'"]([^\'"]+)[\'"]'
+            functions = [
+                {
+                    'name': func['name'],
+                    'line_number': func['line_number'],
+                    'parameters': self._js_parameters(content, func),
+                    'type': func['type'],
+                    'class_name': func['class_name']
+                }
+                for func in structure.functions
             ]
-            
-            for pattern in import_patterns:
-                for match in re.finditer(pattern, content):
-                    imports.append(match.group(1))
-            
-            return {
+            result = {
                 'functions': functions,
-                'imports': list(set(imports)),
+                'imports': list(dict.fromkeys(structure.imports)),
+                'calls': structure.calls,
                 'line_count': len(content.split('\n'))
             }
+            if cache_key is not None:
+                self.cache.put(cache_key, result)
+            return result
         except Exception as e:
             return {
                 'functions': [],
@@ -155,14 +169,26 @@ class FileParser:
                 'error': str(e)
             }
     
-    def parse_file(self, file_path: str) -> Dict[str, Any]:
-        """Parse file based on its type."""
+    def _js_parameters(self, content: str, func: Dict[str, Any]) -> List[str]:
+        """Parameter names from the text between a function's parentheses."""
+        signature = content[func['start']:func['params_end']]
+        if '(' in signature:
+            params = signature[signature.find('(') + 1:-1]
+        else:
+            params = signature.split('=')[-1]  # single-parameter arrow function
+        return [p.strip() for p in params.split(',') if p.strip()]
+    
+    def parse_file(self, file_path: str, content: Optional[Union[str, bytes]] = None) -> Dict[str, Any]:
+        """Parse file based on its type.
+        
+        If content is given (e.g. from iter_zip_files) the file is not read from disk.
+        """
         file_type = self.get_file_type(file_path)
         
         if file_type == 'python':
-            return self.parse_python_file(file_path)
+            return self.parse_python_file(file_path, content)
         elif file_type in ['javascript', 'react', 'typescript']:
-            return self.parse_javascript_file(file_path)
+            return self.parse_javascript_file(file_path, content)
         else:
             return {
                 'functions': [],
@@ -0,0 +1,38 @@
+from typing import Any, Dict, Optional, Union
+
+from app.core.parse_cache import ParseCache
+
+# Bump when the shape or content of stored file records changes
+FILE_RECORD_VERSION = "2"
+
+
+class FileRecordCache:
+    """Content-addressed per-file analysis records shared across uploads.
+
+    A record is keyed by the analyzer namespace, a version (record format
+    and model), the file's path and its content hash, so a file that is
+    byte-identical at the same path in a later upload reuses its analysis
+    instead of being parsed and documented again. The path is part of the
+    key because it appears in prompts and in the record itself; a moved
+    file is analyzed anew. Records live in a ParseCache, which bounds them
+    by size and lets every worker share them.
+    """
+
+    def __init__(self, cache: ParseCache, namespace: str, version: str):
+        self.cache = cache
+        self.namespace = namespace
+        self.version = f"{FILE_RECORD_VERSION}:{version}"
+
+    def key(self, path: str, content: Union[str, bytes]) -> str:
+        if isinstance(content, str):
+            content = content.encode('utf-8', errors='surrogatepass')
+        return ParseCache.make_key(self.namespace, self.version, path.encode('utf-8') + b'\0' + content)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.cache.get(key)
+
+    def put(self, key: str, record: Dict[str, Any]):
+        self.cache.put(key, record)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
@@ -0,0 +1,136 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable
+
+from app.config import Config
+from app.core.parse_cache import ParseCache
+
+
+class GenerationCache:
+    """Two-tier cache for LLM generations.
+
+    Keys combine the model name, sampling temperature and a hash of the
+    whitespace-normalized prompt, so re-documenting an unchanged function
+    costs no inference. The memory tier is an LRU bounded by entry count;
+    the optional disk tier reuses the SQLite LRU behind ParseCache and
+    survives restarts.
+    """
+
+    def __init__(self, max_entries: int = 10000, disk_cache: Optional[ParseCache] = None):
+        self.max_entries = max_entries
+        self.disk_cache = disk_cache
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(model_name: str, temperature: float, prompt: str) -> str:
+        """Hash the normalized prompt together with the model settings."""
+        normalized = re.sub(r"\s+", " ", prompt).strip()
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"generation:{model_name}:{temperature}:{digest}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached generation, promoting disk hits into memory."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._memory[key]
+
+        if self.disk_cache is not None:
+            cached = self.disk_cache.get(key)
+            if cached is not None:
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                    self._remember(key, cached["text"])
+                return cached["text"]
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, text: str):
+        """Store a generation in both tiers."""
+        with self._lock:
+            self._remember(key, text)
+        if self.disk_cache is not None:
+            self.disk_cache.put(key, {"text": text})
+
+    def _remember(self, key: str, text: str):
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get_or_generate(self, model_name: str, temperature: float, prompt: str,
+                        generate: Callable[[], str]) -> str:
+        """Return the cached generation for prompt, calling generate() on a miss."""
+        key = self.make_key(model_name, temperature, prompt)
+        text = self.get(key)
+        if text is None:
+            text = generate()
+            self.put(key, text)
+        return text
+
+    def get_or_generate_many(self, model_name: str, temperature: float, prompts: List[str],
+                             generate_many: Callable[[List[str]], List[str]]) -> List[str]:
+        """Return generations for prompts in order, sending only the uncached ones to one generate_many() call."""
+        keys = [self.make_key(model_name, temperature, prompt) for prompt in prompts]
+        texts = [self.get(key) for key in keys]
+        # Each distinct uncached prompt is generated once, even if repeated in the batch
+        missing = {}
+        for key, prompt, text in zip(keys, prompts, texts):
+            if text is None:
+                missing.setdefault(key, prompt)
+        if missing:
+            for key, text in zip(missing, generate_many(list(missing.values()))):
+                self.put(key, text)
+                missing[key] = text
+            texts = [missing[key] if text is None else text for key, text in zip(keys, texts)]
+        return texts
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit-rate metrics for both tiers."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["disk"] = self.disk_cache.stats() if self.disk_cache is not None else None
+        return stats
+
+    def clear(self):
+        """Drop all cached generations."""
+        with self._lock:
+            self._memory.clear()
+        if self.disk_cache is not None:
+            self.disk_cache.clear()
+
+
+_generation_cache: Optional[GenerationCache] = None
+_generation_cache_lock = threading.Lock()
+
+
+def get_generation_cache() -> Optional[GenerationCache]:
+    """Return the process-wide generation cache, or None if CACHE_ENABLED is off."""
+    global _generation_cache
+    if not Config.CACHE_ENABLED:
+        return None
+    with _generation_cache_lock:
+        if _generation_cache is None:
+            disk_cache = None
+            if Config.GENERATION_CACHE_PATH:
+                disk_cache = ParseCache(
+                    Config.GENERATION_CACHE_PATH,
+                    Config.GENERATION_CACHE_DISK_MAX_MB * 1024 * 1024
+                )
+            _generation_cache = GenerationCache(
+                max_entries=Config.GENERATION_CACHE_MAX_ENTRIES,
+                disk_cache=disk_cache
+            )
+    return _generation_cache
@@ -0,0 +1,232 @@
+import hashlib
+import hmac
+import posixpath
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.module_index import ModuleIndex, _strip_extension
+from app.core.stage_graph import ProjectAggregate
+
+# analyze_file(filename, content) -> (file analysis, import strings)
+FileAnalyzer = Callable[[str, str], Tuple[Dict[str, Any], List[str]]]
+
+_TOKEN_SPLIT = re.compile(r'[/.]+')
+
+
+def _file_tokens(filename: str) -> Set[str]:
+    """Names ModuleIndex can find filename by: its basename, and its directory for index/__init__ files."""
+    parts = [part for part in _strip_extension(filename.replace('\\', '/')).split('/') if part]
+    if not parts:
+        return set()
+    tokens = {parts[-1].lower()}
+    if parts[-1] in ('__init__', 'index') and len(parts) > 1:
+        tokens.add(parts[-2].lower())
+    return tokens
+
+
+def _import_tokens(import_name: str, importer: str) -> Set[str]:
+    """Every name an import could resolve through; a superset is fine, it only widens re-resolution."""
+    tokens = {part.lower() for part in _TOKEN_SPLIT.split(_strip_extension(import_name)) if part}
+    if not tokens:
+        # '.' or '..' resolve to a directory of the importer
+        tokens = {part.lower() for part in importer.replace('\\', '/').split('/')[:-1] if part}
+    return tokens
+
+
+def verify_github_signature(secret: str, body: bytes, signature: str) -> bool:
+    """Check an X-Hub-Signature-256 header against the HMAC-SHA256 of the raw request body."""
+    if not secret or not signature:
+        return False
+    expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def changed_paths_from_push(payload: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """Net (changed, removed) repository paths across the commits of a push payload.
+
+    Commits are applied in order, so a file added and later removed counts
+    only as removed, and a file removed and re-added counts as changed.
+    """
+    changed: Dict[str, None] = {}
+    removed: Dict[str, None] = {}
+    for commit in payload.get('commits', []):
+        for path in commit.get('added', []) + commit.get('modified', []):
+            removed.pop(path, None)
+            changed[path] = None
+        for path in commit.get('removed', []):
+            changed.pop(path, None)
+            removed[path] = None
+    return list(changed), list(removed)
+
+
+class ProjectSnapshot:
+    """Per-file analysis and the import graph of one project, patchable in place.
+
+    build() analyzes every file once. apply() takes the files a push touched
+    and re-runs analyze_file only for those, then re-resolves imports only
+    for the touched files and for files whose imports could name a file that
+    was added or removed. Project totals (aggregate) and each importer's
+    cross-references are patched along the way. Work is proportional to the
+    diff, not the repo.
+
+    Filenames keep the archive's layout. When every archived file sits under
+    one top-level directory (GitHub archives add "repo-sha/"), repository
+    paths from webhooks are mapped under it.
+    """
+
+    def __init__(self, analyze_file: FileAnalyzer):
+        self.analyze_file = analyze_file
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.digests: Dict[str, str] = {}
+        self.imports: Dict[str, List[str]] = {}
+        self.dependencies: Dict[str, Set[str]] = {}
+        self.dependents: Dict[str, Set[str]] = defaultdict(set)
+        self.module_index = ModuleIndex([])
+        self.aggregate = ProjectAggregate()
+        # importer -> its import cross-references, rebuilt only when its dependencies change
+        self._references: Dict[str, List[Dict[str, Any]]] = {}
+        self.root_prefix = ""
+        self.revision: Optional[str] = None
+        self._importers_by_token: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(content: str) -> str:
+        return hashlib.sha256(content.encode('utf-8', errors='ignore')).hexdigest()
+
+    def build(self, files: Dict[str, str], revision: Optional[str] = None):
+        """Analyze every file and resolve the full import graph."""
+        with self._lock:
+            top_levels = {filename.split('/', 1)[0] for filename in files if '/' in filename}
+            if len(top_levels) == 1 and all('/' in filename for filename in files):
+                self.root_prefix = top_levels.pop() + '/'
+            for filename, content in files.items():
+                self._store(filename, content)
+            for filename in files:
+                self._resolve(filename)
+            self.revision = revision
+
+    def path_for(self, repo_path: str) -> str:
+        """Snapshot filename for a repository-relative path."""
+        return self.root_prefix + repo_path
+
+    def apply(self, changed: Dict[str, str], removed: Iterable[str],
+              revision: Optional[str] = None) -> Dict[str, Any]:
+        """Patch the snapshot with changed file contents and removed filenames.
+
+        Returns which files were re-analyzed, removed, skipped as unchanged,
+        and which other files had their dependencies re-resolved.
+        """
+        with self._lock:
+            reanalyzed = []
+            unchanged = []
+            removed_files = []
+            # Files whose appearance or disappearance can change other files' resolution
+            membership_changes = set()
+
+            for filename in removed:
+                if filename in self.files:
+                    self._drop(filename)
+                    removed_files.append(filename)
+                    membership_changes.add(filename)
+
+            for filename, content in changed.items():
+                if self.digests.get(filename) == self._digest(content):
+                    unchanged.append(filename)
+                    continue
+                if filename not in self.files:
+                    membership_changes.add(filename)
+                else:
+                    self._forget_imports(filename)
+                self._store(filename, content)
+                reanalyzed.append(filename)
+
+            affected = set(reanalyzed)
+            for filename in membership_changes:
+                for token in _file_tokens(filename):
+                    affected.update(self._importers_by_token.get(token, ()))
+            affected.difference_update(removed_files)
+            for filename in affected:
+                self._resolve(filename)
+            for filename in removed_files:
+                if not self.dependents.get(filename):
+                    self.dependents.pop(filename, None)
+
+            if revision:
+                self.revision = revision
+            return {
+                'reanalyzed': reanalyzed,
+                'removed': removed_files,
+                'unchanged': unchanged,
+                'reresolved': sorted(affected.difference(reanalyzed)),
+                'total_files': len(self.files)
+            }
+
+    def _store(self, filename: str, content: str):
+        """Analyze one file and register it in the index."""
+        file_analysis, imports = self.analyze_file(filename, content)
+        if filename not in self.files:
+            self.module_index.add(filename)
+        else:
+            self.aggregate.remove(self.files[filename])
+        self.aggregate.add(file_analysis)
+        self.files[filename] = file_analysis
+        self.digests[filename] = self._digest(content)
+        self.imports[filename] = list(imports)
+        for import_name in imports:
+            for token in _import_tokens(import_name, filename):
+                self._importers_by_token[token].add(filename)
+
+    def _forget_imports(self, filename: str):
+        for import_name in self.imports.get(filename, []):
+            for token in _import_tokens(import_name, filename):
+                importers = self._importers_by_token.get(token)
+                if importers:
+                    importers.discard(filename)
+
+    def _drop(self, filename: str):
+        self._forget_imports(filename)
+        self._set_dependencies(filename, set())
+        self.dependencies.pop(filename, None)
+        self.module_index.remove(filename)
+        self.aggregate.remove(self.files.pop(filename))
+        del self.digests[filename]
+        del self.imports[filename]
+
+    def _resolve(self, filename: str):
+        """Re-resolve one file's imports and patch both edge directions."""
+        targets = set()
+        for import_name in self.imports.get(filename, []):
+            for target in self.module_index.resolve(import_name, filename):
+                if target != filename:
+                    targets.add(target)
+        self._set_dependencies(filename, targets)
+
+    def _set_dependencies(self, filename: str, targets: Set[str]):
+        for target in self.dependencies.get(filename, set()) - targets:
+            self.dependents[target].discard(filename)
+        for target in targets:
+            self.dependents[target].add(filename)
+        if targets != self.dependencies.get(filename):
+            self._references[filename] = [
+                {
+                    'from': filename,
+                    'to': target,
+                    'type': 'import',
+                    'description': f"{posixpath.basename(filename)} imports {posixpath.basename(target)}"
+                }
+                for target in sorted(targets)
+            ]
+        if not targets:
+            self._references.pop(filename, None)
+        self.dependencies[filename] = targets
+
+    def cross_references(self) -> List[Dict[str, Any]]:
+        """One import edge per (importer, imported file) pair, importers in the order they were added."""
+        with self._lock:
+            return [reference for references in self._references.values() for reference in references]
+
+    def analyzed_files(self) -> List[Dict[str, Any]]:
+        return list(self.files.values())
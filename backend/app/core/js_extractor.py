@@ -0,0 +1,402 @@
+import re
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+# Longest regex literal we try to match. Bounding it keeps a stray "/" on a
+# huge minified line from rescanning the rest of that line.
+MAX_REGEX_LITERAL = 1024
+
+# Longest string value kept on the token; imports are always short
+MAX_STRING_VALUE = 512
+
+# How far past a ")" we look for a function body, to skip TS return types
+MAX_RETURN_TYPE_TOKENS = 32
+
+# How far an expression-bodied arrow function is followed to find its end
+MAX_EXPRESSION_TOKENS = 512
+
+_TOKEN = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>'(?:[^'\\\n]|\\.)*'?|"(?:[^"\\\n]|\\.)*"?)
+  | (?P<ident>[A-Za-z_$][\w$]*)
+  | (?P<number>\d[\w.]*|\.\d\w*)
+  | (?P<punct>=>|\.\.\.|\?\.|\S)
+""", re.S | re.X)
+
+_TEMPLATE_CHUNK = re.compile(r'(?:[^`\\$]|\\.|\$(?!\{))*', re.S)
+_REGEX_LITERAL = re.compile(
+    r'/(?![*/])(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\]){1,%d}/[A-Za-z]*' % MAX_REGEX_LITERAL
+)
+
+# After these a "/" starts a regex literal rather than a division
+_REGEX_PREFIX_KEYWORDS = {
+    'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+    'void', 'throw', 'instanceof', 'yield', 'await'
+}
+
+# Identifiers followed by "(" that are syntax rather than calls or methods
+KEYWORDS = {
+    'if', 'for', 'while', 'switch', 'catch', 'function', 'return', 'typeof',
+    'instanceof', 'do', 'else', 'with', 'super', 'import', 'require', 'await',
+    'yield', 'delete', 'void', 'in', 'of', 'case', 'async', 'new', 'class'
+}
+
+# Modifiers that may precede a method name
+_METHOD_MODIFIERS = {'static', 'async', 'get', 'set', '*', 'public', 'private',
+                     'protected', 'override', 'readonly'}
+
+# Tokens after which "name(...) {" is a method definition rather than a call
+_METHOD_PREFIX = {None, '{', '}', ';', ','} | _METHOD_MODIFIERS
+
+_OPENERS = {'(': ')', '[': ']', '{': '}'}
+_CLOSERS = {')': '(', ']': '[', '}': '{'}
+
+
+class JSTokens:
+    """Parallel token arrays for one JS/TS source string.
+
+    kinds/values/starts/ends are indexed together. Offsets are positions
+    in the decoded source string, so content[start:end] slices a token.
+    Comments and whitespace are dropped; string and template tokens keep
+    their text only when it is short. closing maps each "(", "[" and "{"
+    token to its matching closer. Line numbers are computed on demand.
+    """
+
+    __slots__ = ('content', 'kinds', 'values', 'starts', 'ends', 'closing', '_newlines')
+
+    def __init__(self, content: str):
+        self.content = content
+        self.kinds: List[str] = []
+        self.values: List[Optional[str]] = []
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.closing: Dict[int, int] = {}
+        self._newlines: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def line_at(self, index: int) -> int:
+        """1-based line number of token index."""
+        if self._newlines is None:
+            self._newlines = [match.start() for match in re.finditer('\n', self.content)]
+        return bisect_right(self._newlines, self.starts[index]) + 1
+
+
+def tokenize(content: str) -> JSTokens:
+    """Split JS/TS source into tokens in a single left-to-right pass.
+
+    Ordinary code is matched by one compiled pattern via finditer, which
+    skips whitespace in C. Template literals and regex literals need
+    context, so the scan handles them by hand and restarts after them.
+    Every match either consumes what it scans or is bounded by
+    MAX_REGEX_LITERAL, so total work is O(len(content)). Brackets are
+    matched during the same pass.
+    """
+    tokens = JSTokens(content)
+    kinds, values, starts, ends, closing = tokens.kinds, tokens.values, tokens.starts, tokens.ends, tokens.closing
+    add_kind, add_value, add_start, add_end = kinds.append, values.append, starts.append, ends.append
+    length = len(content)
+    open_stack: List[int] = []
+    template_stack: List[int] = []  # "{" nesting inside each open "${"
+    pos = 0
+
+    while pos < length:
+        restart = None
+        for match in _TOKEN.finditer(content, pos):
+            kind = match.lastgroup
+            start, end = match.span()
+            if kind == 'ident' or kind == 'number':
+                value = match.group()
+            elif kind == 'comment':
+                continue
+            elif kind == 'string':
+                value = content[start:end] if end - start <= MAX_STRING_VALUE else None
+            else:
+                value = match.group()
+                if value == '`':
+                    restart = _emit_template(content, start, template_stack, tokens)
+                    break
+                if value == '/' and _regex_allowed(kinds, values):
+                    regex_match = _REGEX_LITERAL.match(content, start)
+                    if regex_match:
+                        add_kind('regex')
+                        add_value(None)
+                        add_start(start)
+                        add_end(regex_match.end())
+                        restart = regex_match.end()
+                        break
+                elif template_stack and value in ('{', '}'):
+                    if value == '{':
+                        template_stack[-1] += 1
+                    elif template_stack[-1] == 0:
+                        # End of a ${...} expression: resume the template text
+                        template_stack.pop()
+                        restart = _emit_template(content, start, template_stack, tokens)
+                        break
+                    else:
+                        template_stack[-1] -= 1
+                if value in _OPENERS:
+                    open_stack.append(len(kinds))
+                elif value in _CLOSERS:
+                    opener = _CLOSERS[value]
+                    while open_stack and values[open_stack[-1]] != opener:
+                        open_stack.pop()
+                    if open_stack:
+                        closing[open_stack.pop()] = len(kinds)
+            add_kind(kind)
+            add_value(value)
+            add_start(start)
+            add_end(end)
+        if restart is None:
+            break
+        pos = restart
+
+    return tokens
+
+
+def _emit_template(content: str, start: int, template_stack: List[int], tokens: JSTokens) -> int:
+    """Record template text starting at a backtick or "}" and return where tokenizing resumes."""
+    end = _TEMPLATE_CHUNK.match(content, start + 1).end()
+    if content.startswith('${', end):
+        template_stack.append(0)
+        end += 2
+    elif end < len(content):
+        end += 1  # closing backtick
+    tokens.kinds.append('template')
+    tokens.values.append(content[start:end] if end - start <= MAX_STRING_VALUE else None)
+    tokens.starts.append(start)
+    tokens.ends.append(end)
+    return end
+
+
+def _regex_allowed(kinds: List[str], values: List[Optional[str]]) -> bool:
+    """True when a "/" at this point starts a regex literal instead of a division."""
+    if not kinds:
+        return True
+    kind, value = kinds[-1], values[-1]
+    if kind == 'punct':
+        return value not in (')', ']', '}')
+    if kind == 'ident':
+        return value in _REGEX_PREFIX_KEYWORDS
+    return False
+
+
+def _string_value(value: Optional[str]) -> Optional[str]:
+    """Unquote a short string token; None for long or templated strings."""
+    if value is None or len(value) < 2 or '${' in value:
+        return None
+    return value[1:-1]
+
+
+class JSStructure:
+    """Functions, classes, imports and call sites found in one JS/TS file."""
+
+    def __init__(self):
+        self.functions: List[Dict[str, Any]] = []
+        self.classes: List[Dict[str, Any]] = []
+        self.imports: List[str] = []
+        self.calls: List[Tuple[str, int]] = []
+
+
+def extract_js_structure(content: str) -> JSStructure:
+    """Tokenize content once and walk its identifiers once to collect its structure.
+
+    Each function, arrow function (named by assignment or property), method
+    and class gets start/end offsets covering its whole body, found through
+    the bracket matches from tokenize(), plus the offset where its parameter
+    list ends. Only identifier and "=>" tokens are visited, and lookahead is
+    bounded by MAX_RETURN_TYPE_TOKENS and MAX_EXPRESSION_TOKENS, so
+    worst-case time is O(len(content)).
+    """
+    tokens = tokenize(content)
+    kinds, values, starts, ends = tokens.kinds, tokens.values, tokens.starts, tokens.ends
+    closing = tokens.closing
+    count = len(tokens)
+    line_at = tokens.line_at
+
+    structure = JSStructure()
+    pending_classes: List[Tuple[int, str]] = []  # ("{" index, class name) in token order
+    next_class = 0  # first pending class body not yet entered
+    class_stack: List[Tuple[int, str]] = []  # (closing "}" index, class name)
+    opening: Optional[Dict[int, int]] = None
+
+    def value_at(index: int) -> Optional[str]:
+        return values[index] if 0 <= index < count else None
+
+    def find_body(close_paren: int) -> Optional[int]:
+        """Index of the "{" opening a body after a parameter list, skipping TS return types."""
+        index = close_paren + 1
+        if value_at(index) == '{':
+            return index
+        if value_at(index) != ':':
+            return None
+        for index in range(close_paren + 2, min(count, close_paren + 2 + MAX_RETURN_TYPE_TOKENS)):
+            value = values[index]
+            if value in (';', '=>', ')'):
+                return None
+            # A "{" right after ":" or a type operator is an object type, not the body
+            if value == '{' and values[index - 1] not in (':', '|', '&', '<', ','):
+                return index
+        return None
+
+    def expression_end(index: int) -> int:
+        """Token index ending an arrow's expression body: the last token before ; , or a closer."""
+        last = index
+        steps = 0
+        while index < count and steps < MAX_EXPRESSION_TOKENS:
+            if kinds[index] == 'punct' and values[index] in (';', ',', ')', ']', '}'):
+                break
+            last = closing.get(index, index)
+            index = last + 1
+            steps += 1
+        return last
+
+    def add_function(name: str, kind: str, start_index: int, params_close: int,
+                     body_index: Optional[int], class_name: Optional[str] = None) -> Dict[str, Any]:
+        record = {
+            'name': name,
+            'type': kind,
+            'line_number': line_at(start_index),
+            'start': starts[start_index],
+            'params_end': ends[params_close],
+            'end': ends[params_close],
+            'class_name': class_name
+        }
+        if body_index is not None and body_index in closing:
+            record['end'] = ends[closing[body_index]]
+        structure.functions.append(record)
+        return record
+
+    def add_import(string_index: int):
+        if 0 <= string_index < count and kinds[string_index] == 'string':
+            path = _string_value(values[string_index])
+            if path:
+                structure.imports.append(path)
+
+    candidates = [index for index, kind in enumerate(kinds) if kind == 'ident' or values[index] == '=>']
+    for index in candidates:
+        value = values[index]
+        prev_value = values[index - 1] if index else None
+        next_value = values[index + 1] if index + 1 < count else None
+
+        if value == '=>':
+            # Parameters are either "(...)" or a single identifier
+            params_close = index - 1
+            if prev_value == ')':
+                if opening is None:
+                    opening = {close: open_ for open_, close in closing.items()}
+                if params_close not in opening:
+                    continue
+                params_open = opening[params_close]
+            elif kinds[params_close] == 'ident':
+                params_open = params_close
+            else:
+                continue
+            head = params_open - 1
+            if value_at(head) == 'async':
+                head -= 1
+            if value_at(head) in ('=', ':') and head >= 1 and kinds[head - 1] == 'ident':
+                name_index = head - 1
+                start_index = name_index - 1 if value_at(name_index - 1) in ('const', 'let', 'var') else name_index
+                if next_value == '{':
+                    add_function(values[name_index], 'arrow_function', start_index, params_close, index + 1)
+                else:
+                    record = add_function(values[name_index], 'arrow_function', start_index, params_close, None)
+                    if index + 1 < count:
+                        record['end'] = ends[expression_end(index + 1)]
+            continue
+
+        if prev_value == '.':
+            # Property access: only calls matter
+            if next_value == '(':
+                structure.calls.append((value, line_at(index)))
+            continue
+
+        if value == 'import':
+            add_import(index + 2 if next_value == '(' else index + 1)
+            continue
+
+        if value == 'from' or (value == 'require' and next_value == '('):
+            add_import(index + 1 if value == 'from' else index + 2)
+            continue
+
+        if value == 'class':
+            if next_value is not None and kinds[index + 1] == 'ident' and next_value != 'extends':
+                # Body is the first "{" after the heritage clause
+                body_index = index + 2
+                limit = min(count, index + MAX_RETURN_TYPE_TOKENS)
+                while body_index < limit and values[body_index] != '{':
+                    body_index += 1
+                if body_index < count and values[body_index] == '{':
+                    structure.classes.append({
+                        'name': next_value,
+                        'line_number': line_at(index),
+                        'start': starts[index],
+                        'end': ends[closing.get(body_index, body_index)]
+                    })
+                    pending_classes.append((body_index, next_value))
+            continue
+
+        if value == 'function':
+            name_index = index + 1
+            if value_at(name_index) == '*':
+                name_index += 1
+            if name_index < count and kinds[name_index] == 'ident' and value_at(name_index + 1) in ('(', '<'):
+                name = values[name_index]
+                paren = name_index + 1
+                kind_name = 'function'
+                start_index = index - 1 if prev_value == 'async' else index
+            elif value_at(name_index) == '(' and prev_value in ('=', ':') and index >= 2 and kinds[index - 2] == 'ident':
+                # const name = function (...) / name: function (...)
+                name = values[index - 2]
+                paren = name_index
+                kind_name = 'function_expression'
+                start_index = index - 2
+            else:
+                continue
+            if values[paren] == '<':
+                # Skip TS type parameters
+                limit = min(count, paren + MAX_RETURN_TYPE_TOKENS)
+                while paren < limit and values[paren] != '(':
+                    paren += 1
+            if paren < count and values[paren] == '(' and paren in closing:
+                params_close = closing[paren]
+                add_function(name, kind_name, start_index, params_close, find_body(params_close))
+            continue
+
+        if next_value != '(' or value in KEYWORDS:
+            continue
+
+        params_close = closing.get(index + 1)
+        body_index = find_body(params_close) if params_close is not None else None
+        if body_index is not None and prev_value in _METHOD_PREFIX:
+            # Track which class body we are in, entering bodies lazily in token order
+            while class_stack and class_stack[-1][0] < index:
+                class_stack.pop()
+            while next_class < len(pending_classes) and pending_classes[next_class][0] < index:
+                open_index, class_name = pending_classes[next_class]
+                next_class += 1
+                while class_stack and class_stack[-1][0] < open_index:
+                    class_stack.pop()
+                if closing.get(open_index, count) > index:
+                    class_stack.append((closing.get(open_index, count), class_name))
+            start_index = index
+            while value_at(start_index - 1) in _METHOD_MODIFIERS:
+                start_index -= 1
+            class_name = class_stack[-1][1] if class_stack else None
+            add_function(value, 'method', start_index, params_close, body_index, class_name)
+        elif prev_value != 'function':
+            structure.calls.append((value, line_at(index)))
+
+    return structure
+
+
+def function_signature(content: str, function: Dict[str, Any]) -> str:
+    """Source text from the start of a function up to the end of its parameters."""
+    return ' '.join(content[function['start']:function['params_end']].split())
+
+
+def function_code(content: str, function: Dict[str, Any]) -> str:
+    """Full source text of a function, from its start offset to the end of its body."""
+    return content[function['start']:function['end']].strip()
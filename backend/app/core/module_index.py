@@ -0,0 +1,139 @@
+import posixpath
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Extensions stripped when turning a filename into a module path
+MODULE_EXTENSIONS = ('.py', '.pyx', '.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs')
+
+# Common bundler path aliases that point at the source root
+ALIAS_PREFIXES = ('@/', '~/', '#/')
+
+
+def _clean_path(path: str) -> str:
+    """Normalize separators and drop leading './' and '/'."""
+    path = path.replace('\\', '/')
+    while path.startswith('./'):
+        path = path[2:]
+    return path.lstrip('/')
+
+
+def _strip_extension(path: str) -> str:
+    for ext in MODULE_EXTENSIONS:
+        if path.endswith(ext):
+            return path[:-len(ext)]
+    return path
+
+
+class ModuleIndex:
+    """Hash-map index that resolves import strings to project files.
+
+    Built once per analysis. Every file is registered under:
+    - its path suffixes without extension ("src/ui/Button", "ui/Button", "Button"),
+      which resolves JS relative and aliased imports
+    - the dotted form of the same suffixes ("app.core.parser"), for Python imports
+    - its lowercased basename, matching the old name-only heuristic as a fallback
+    - its full path without extension, which relative imports resolve against
+    Package entry points (__init__.py, index.js) are also registered under
+    their directory. Each resolution is a handful of dict lookups.
+    """
+
+    def __init__(self, filenames: Iterable[str]):
+        self.by_path: Dict[str, List[str]] = defaultdict(list)
+        self.by_dotted: Dict[str, List[str]] = defaultdict(list)
+        self.by_basename: Dict[str, List[str]] = defaultdict(list)
+        self.by_full_path: Dict[str, List[str]] = defaultdict(list)
+        for filename in filenames:
+            self.add(filename)
+
+    def add(self, filename: str):
+        """Register one file under all of its keys."""
+        for index, key in self._keys(filename):
+            index[key].append(filename)
+
+    def remove(self, filename: str):
+        """Unregister one file, the inverse of add."""
+        for index, key in self._keys(filename):
+            matches = index.get(key)
+            if matches and filename in matches:
+                matches.remove(filename)
+                if not matches:
+                    del index[key]
+
+    def _keys(self, filename: str) -> List[Tuple[Dict[str, List[str]], str]]:
+        """(index, key) pairs add registers filename under."""
+        module_path = _strip_extension(_clean_path(filename))
+        parts = [part for part in module_path.split('/') if part]
+        if not parts:
+            return []
+        keys = [(self.by_basename, parts[-1].lower())]
+        key_paths = [parts]
+        if parts[-1] in ('__init__', 'index') and len(parts) > 1:
+            key_paths.append(parts[:-1])
+        for key_parts in key_paths:
+            keys.append((self.by_full_path, '/'.join(key_parts)))
+            for start in range(len(key_parts)):
+                suffix = key_parts[start:]
+                keys.append((self.by_path, '/'.join(suffix)))
+                keys.append((self.by_dotted, '.'.join(suffix)))
+        return keys
+
+    def resolve(self, import_name: str, importer: str) -> List[str]:
+        """Return the project files an import from importer may refer to."""
+        if not import_name:
+            return []
+
+        if import_name.startswith('.'):
+            if '/' in import_name or import_name in ('.', '..'):
+                return self._resolve_relative_path(import_name, importer)
+            return self._resolve_relative_dotted(import_name, importer)
+
+        for prefix in ALIAS_PREFIXES:
+            if import_name.startswith(prefix):
+                return self.by_path.get(_strip_extension(import_name[len(prefix):]), [])
+
+        if '/' in import_name:
+            matches = self.by_path.get(_strip_extension(import_name))
+            if matches:
+                return matches
+        elif '.' in import_name:
+            # "from a.b import c" may arrive as "a.b.c" where c is a symbol
+            parts = import_name.split('.')
+            for end in range(len(parts), 0, -1):
+                matches = self.by_dotted.get('.'.join(parts[:end]))
+                if matches:
+                    return matches
+
+        last_part = _strip_extension(import_name.split('/')[-1]).split('.')[0]
+        return self.by_basename.get(last_part.lower(), [])
+
+    def _resolve_relative_path(self, import_name: str, importer: str) -> List[str]:
+        """Resolve './x' or '../y/z' against the importing file's directory.
+
+        Only the exact target path matches; by_path also holds path suffixes,
+        which would let a deeper file ending the same way (lib/src/utils.js
+        for src/utils.js) answer the import.
+        """
+        base_dir = posixpath.dirname(_clean_path(importer))
+        target = posixpath.normpath(posixpath.join(base_dir, import_name))
+        return self.by_full_path.get(_clean_path(_strip_extension(target)), [])
+
+    def _resolve_relative_dotted(self, import_name: str, importer: str) -> List[str]:
+        """Resolve Python relative imports such as '.utils' or '..models.user'."""
+        level = len(import_name) - len(import_name.lstrip('.'))
+        module = import_name[level:]
+        package_parts = _clean_path(importer).split('/')[:-1]
+        if level > 1:
+            package_parts = package_parts[:-(level - 1)] if level - 1 <= len(package_parts) else []
+        target_parts = package_parts + (module.split('.') if module else [])
+        return self.by_full_path.get('/'.join(target_parts), [])
+
+    def resolve_dependencies(self, all_files: List[Dict]) -> Dict[str, Set[str]]:
+        """Map each filename to the set of other project files it imports."""
+        dependencies = defaultdict(set)
+        for file_data in all_files:
+            filename = file_data['filename']
+            for import_name in file_data.get('imports', []):
+                for target in self.resolve(import_name, filename):
+                    if target != filename:
+                        dependencies[filename].add(target)
+        return dict(dependencies)
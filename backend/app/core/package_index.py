@@ -0,0 +1,197 @@
+"""
+Offline package metadata index.
+
+Built from a JSON Lines dump with one package per line:
+
+    {"name": "lodash", "ecosystem": "npm", "summary": "...", "docs": "https://...", "version": "4.17.21"}
+
+The index is a single file read through mmap: a fixed-size open-addressing
+hash table of (key hash, record offset) slots followed by the JSON records,
+so a lookup is one hash, a short probe and one record decode.
+
+Rebuild it with:
+
+    python -m app.core.package_index build packages.jsonl packages.idx
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from typing import Dict, Any, Optional, Iterator
+
+MAGIC = b"DSPI"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sIQ")     # magic, format version, slot count
+SLOT = struct.Struct("<QQ")         # key hash, record offset (0 = empty)
+RECORD_LENGTH = struct.Struct("<I")
+
+ECOSYSTEMS = ("npm", "pypi")
+
+
+def normalize_name(name: str, ecosystem: str) -> str:
+    """Normalize a package name the way its registry compares names."""
+    name = name.strip().lower()
+    if ecosystem == "pypi":
+        # PEP 503: runs of -, _ and . are equivalent
+        name = re.sub(r"[-_.]+", "-", name)
+    return name
+
+
+def _key_hash(ecosystem: str, name: str) -> int:
+    digest = hashlib.blake2b(f"{ecosystem}:{name}".encode("utf-8"), digest_size=8).digest()
+    # Zero marks an empty slot
+    return int.from_bytes(digest, "little") or 1
+
+
+def _iter_dump(dump_path: str) -> Iterator[Dict[str, Any]]:
+    with open(dump_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                print(f"Skipping line {line_number} of {dump_path}: {e}")
+                continue
+            if record.get("name") and record.get("ecosystem") in ECOSYSTEMS:
+                yield record
+
+
+def build_index(dump_path: str, index_path: str) -> int:
+    """Build an index file from a JSON Lines dump and return the package count."""
+    records = {}
+    for record in _iter_dump(dump_path):
+        ecosystem = record["ecosystem"]
+        key = (ecosystem, normalize_name(record["name"], ecosystem))
+        # Later lines win so a dump can be appended to
+        records[key] = {
+            "name": record["name"],
+            "ecosystem": ecosystem,
+            "summary": record.get("summary") or "",
+            "docs": record.get("docs"),
+            "version": record.get("version")
+        }
+
+    slot_count = max(8, 1 << (len(records) * 2 - 1).bit_length())
+    slots = [(0, 0)] * slot_count
+    records_start = HEADER.size + SLOT.size * slot_count
+
+    body = bytearray()
+    for (ecosystem, name), record in records.items():
+        key_hash = _key_hash(ecosystem, name)
+        slot = key_hash & (slot_count - 1)
+        while slots[slot][0] != 0:
+            slot = (slot + 1) & (slot_count - 1)
+        payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+        slots[slot] = (key_hash, records_start + len(body))
+        body += RECORD_LENGTH.pack(len(payload)) + payload
+
+    # Write to a temp file and rename so readers never see a half-built index
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, slot_count))
+        for key_hash, offset in slots:
+            f.write(SLOT.pack(key_hash, offset))
+        f.write(body)
+    os.replace(tmp_path, index_path)
+    return len(records)
+
+
+class PackageIndex:
+    """Read-only, memory-mapped view of an index built by build_index."""
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self._file = open(index_path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._slot_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{index_path} is not a package index (format {FORMAT_VERSION})")
+
+    def _read_record(self, offset: int) -> Dict[str, Any]:
+        (length,) = RECORD_LENGTH.unpack_from(self._mmap, offset)
+        start = offset + RECORD_LENGTH.size
+        return json.loads(self._mmap[start:start + length])
+
+    def _lookup(self, ecosystem: str, name: str) -> Optional[Dict[str, Any]]:
+        key = normalize_name(name, ecosystem)
+        key_hash = _key_hash(ecosystem, key)
+        mask = self._slot_count - 1
+        slot = key_hash & mask
+        while True:
+            slot_hash, offset = SLOT.unpack_from(self._mmap, HEADER.size + slot * SLOT.size)
+            if slot_hash == 0:
+                return None
+            if slot_hash == key_hash:
+                record = self._read_record(offset)
+                # Guard against 64-bit hash collisions
+                if normalize_name(record["name"], ecosystem) == key:
+                    return record
+            slot = (slot + 1) & mask
+
+    def get(self, name: str, ecosystem: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Look up a package; without an ecosystem npm is tried before PyPI."""
+        for candidate in ([ecosystem] if ecosystem else ECOSYSTEMS):
+            record = self._lookup(candidate, name)
+            if record is not None:
+                return record
+        return None
+
+    def close(self):
+        """Unmap and close the index file."""
+        self._mmap.close()
+        self._file.close()
+
+
+def load_package_index(index_path: str) -> Optional[PackageIndex]:
+    """Open the index at index_path, or return None if none is configured or usable."""
+    if not index_path or not os.path.exists(index_path):
+        return None
+    try:
+        return PackageIndex(index_path)
+    except (OSError, ValueError) as e:
+        print(f"Error loading package index {index_path}: {e}")
+        return None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build or query the offline package metadata index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="build an index from a JSON Lines dump")
+    build_parser.add_argument("dump", help="path to the JSON Lines package dump")
+    build_parser.add_argument("index", help="path of the index file to write")
+
+    get_parser = subparsers.add_parser("get", help="look up a package in an index")
+    get_parser.add_argument("index", help="path to the index file")
+    get_parser.add_argument("name", help="package name")
+    get_parser.add_argument("--ecosystem", choices=ECOSYSTEMS)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build_index(args.dump, args.index)
+        print(f"Indexed {count} packages into {args.index}")
+        return 0
+
+    index = PackageIndex(args.index)
+    try:
+        record = index.get(args.name, args.ecosystem)
+    finally:
+        index.close()
+    if record is None:
+        print(f"{args.name} not found")
+        return 1
+    print(json.dumps(record, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
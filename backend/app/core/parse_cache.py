@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional, Union
+
+
+class ParseCache:
+    """Persistent, size-bounded LRU cache for parse results.
+
+    Entries are keyed by a hash of the parser namespace, parser version and
+    file content, so an unchanged file is never parsed twice and a parser
+    upgrade invalidates old entries automatically. Backed by SQLite so worker
+    processes can share one cache file. Values are any JSON-serializable
+    dict, which lets GenerationCache use it as its disk tier.
+
+    Reads stay read-only: a hit only rewrites last_access when the stored
+    one is older than touch_interval seconds, which is precise enough for
+    LRU eviction, and hit/miss counters are kept per process in memory.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, touch_interval: float = 60.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO stats (name, value) VALUES (?, 0)",
+            [("evictions",), ("size_bytes",)]
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(namespace: str, version: str, content: Union[str, bytes]) -> str:
+        """Build a cache key from parser namespace, parser version and content hash."""
+        if isinstance(content, str):
+            content = content.encode('utf-8', errors='surrogatepass')
+        digest = hashlib.sha256(content).hexdigest()
+        return f"{namespace}:{version}:{digest}"
+
+    def _bump(self, name: str, amount: int = 1):
+        self._conn.execute("UPDATE stats SET value = value + ? WHERE name = ?", (amount, name))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT value, last_access FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            now = time.time()
+            if now - row[1] >= self.touch_interval:
+                self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """Store a result and evict least recently used entries if over budget."""
+        payload = json.dumps(value)
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, size, time.time())
+            )
+            self._bump("size_bytes", size - (old[0] if old else 0))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop LRU entries until the cache is back under 90% of max_bytes."""
+        total = self._conn.execute("SELECT value FROM stats WHERE name = 'size_bytes'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY last_access")
+        evicted_keys = []
+        for key, size in rows:
+            if total <= target:
+                break
+            evicted_keys.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted_keys)
+        self._conn.execute("UPDATE stats SET value = ? WHERE name = 'size_bytes'", (total,))
+        self._bump("evictions", len(evicted_keys))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return this process's hit/miss counters and the shared size and evictions."""
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM stats").fetchall())
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            hits, misses = self._hits, self._misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "evictions": counters["evictions"],
+            "entries": entries,
+            "size_bytes": counters["size_bytes"],
+            "max_bytes": self.max_bytes
+        }
+
+    def clear(self):
+        """Remove all entries and reset counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("UPDATE stats SET value = 0")
+            self._conn.commit()
+            self._hits = 0
+            self._misses = 0
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from app.core.file_parser import FileParser
+from app.core.parse_cache import ParseCache
+
+# Each worker process builds its own parser once instead of pickling one per chunk
+_worker_parser: Optional[FileParser] = None
+
+
+def _build_parser(cache_path: Optional[str], cache_max_bytes: int) -> FileParser:
+    """Create a FileParser, attached to the shared parse cache if one is configured."""
+    cache = ParseCache(cache_path, cache_max_bytes) if cache_path else None
+    return FileParser(cache=cache)
+
+
+def _init_worker(cache_path: Optional[str], cache_max_bytes: int):
+    """Create the per-process FileParser."""
+    global _worker_parser
+    _worker_parser = _build_parser(cache_path, cache_max_bytes)
+
+
+def _parse_chunk(file_paths: List[str], parser: Optional[FileParser] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """Parse a chunk of files inside a worker process."""
+    parser = parser or _worker_parser or FileParser()
+    return [(file_path, parser.parse_file(file_path)) for file_path in file_paths]
+
+
+def _parse_zip_chunk(job: Tuple[str, List[str]], parser: Optional[FileParser] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """Read a chunk of members straight from the archive and parse them."""
+    zip_path, members = job
+    parser = parser or _worker_parser or FileParser()
+    return [
+        (member, parser.parse_file(member, content))
+        for member, content in parser.iter_zip_files(zip_path, members)
+    ]
+
+
+class ParseEngine:
+    """Parses code files in parallel using a pool of worker processes."""
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = 64,
+                 cache_path: Optional[str] = None, cache_max_bytes: int = 256 * 1024 * 1024):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.cache_path = cache_path
+        self.cache_max_bytes = cache_max_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Used for uploads small enough to parse in-process
+        self._local_parser = _build_parser(cache_path, cache_max_bytes)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Lazily start the worker pool so idle servers don't hold processes."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self.cache_path, self.cache_max_bytes)
+            )
+        return self._executor
+
+    def _chunk(self, code_files: List[str]) -> List[List[str]]:
+        """Split the file list into chunks of chunk_size."""
+        return [
+            code_files[i:i + self.chunk_size]
+            for i in range(0, len(code_files), self.chunk_size)
+        ]
+
+    def iter_parse(self, code_files: List[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Parse files and yield (file_path, parsed_data) in input order."""
+        # Small uploads don't pay for the pool round trip
+        if self.max_workers == 1 or len(code_files) <= self.chunk_size:
+            yield from _parse_chunk(code_files, self._local_parser)
+            return
+
+        executor = self._get_executor()
+        for chunk_result in executor.map(_parse_chunk, self._chunk(code_files)):
+            yield from chunk_result
+
+    def iter_parse_zip(self, zip_path: str, members: List[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Parse archive members without extracting them, yielding in input order."""
+        if self.max_workers == 1 or len(members) <= self.chunk_size:
+            yield from _parse_zip_chunk((zip_path, members), self._local_parser)
+            return
+
+        # Workers open the archive themselves so only member names cross processes
+        jobs = [(zip_path, chunk) for chunk in self._chunk(members)]
+        for chunk_result in self._get_executor().map(_parse_zip_chunk, jobs):
+            yield from chunk_result
+
+    def parse_files(self, code_files: List[str]) -> List[Dict[str, Any]]:
+        """Parse all files and return them in the shape used by the pipeline."""
+        return [
+            {'file_path': file_path, 'parsed_data': parsed_data}
+            for file_path, parsed_data in self.iter_parse(code_files)
+        ]
+
+    def parse_zip_files(self, zip_path: str, members: List[str]) -> List[Dict[str, Any]]:
+        """Parse archive members and return them in the shape used by the pipeline."""
+        return [
+            {'file_path': member, 'parsed_data': parsed_data}
+            for member, parsed_data in self.iter_parse_zip(zip_path, members)
+        ]
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Return parse cache counters, aggregated across all worker processes."""
+        if self._local_parser.cache is None:
+            return None
+        return self._local_parser.cache.stats()
+
+    def shutdown(self):
+        """Stop the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
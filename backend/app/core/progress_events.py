@@ -0,0 +1,239 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional, Set, Tuple
+
+from app.core.result_query import project
+
+# Stored status values that end an analysis, and the event that closes streams for each
+TERMINAL_STATUSES = {'completed': 'completed', 'failed': 'failed', 'error': 'failed'}
+TERMINAL_EVENTS = ('completed', 'failed')
+
+# (event id, event name, data)
+ProgressEvent = Tuple[int, str, Dict[str, Any]]
+# Reads an upload's current status from the store; None once the upload is gone
+StatusReader = Callable[[], Optional[Dict[str, Any]]]
+
+
+class ProgressChannel:
+    """Event history and live subscribers of one upload."""
+
+    def __init__(self, upload_id: str, history_size: int):
+        self.upload_id = upload_id
+        self.sequence = 0
+        self.history: Deque[ProgressEvent] = deque(maxlen=history_size)
+        self.latest_status: Optional[ProgressEvent] = None
+        self.subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        # True once this process publishes for the upload itself, i.e. runs its analysis
+        self.local = False
+        self.poller: Optional[asyncio.Task] = None
+        self.finished_at: Optional[float] = None
+
+    def replay(self, last_event_id: int) -> list:
+        """Buffered events after last_event_id, led by the latest status if the buffer dropped it."""
+        if last_event_id > self.sequence:
+            # An id from another process or an earlier run; start over
+            last_event_id = 0
+        events = [event for event in self.history if event[0] > last_event_id]
+        # Events of an earlier run of a persistent upload end at its terminal event
+        for index in range(len(events) - 2, -1, -1):
+            if events[index][1] in TERMINAL_EVENTS:
+                events = events[index + 1:]
+                break
+        status = self.latest_status
+        if status is not None and status[0] > last_event_id and status not in events:
+            events.insert(0, status)
+        if not events and self.finished_at is not None:
+            # Caught up with a finished upload: repeat the terminal event so the stream ends
+            events = [self.history[-1]]
+        return events
+
+
+class ProgressBroker:
+    """Fan-out of per-upload progress events to SSE and WebSocket subscribers.
+
+    Analyses publish status changes, per-file completions and the final
+    completed/failed event once; any number of viewers subscribe. Each
+    subscriber has its own bounded queue that drops its oldest event when
+    full, so a slow client never blocks the analysis or other clients.
+    A subscriber first gets the latest status plus buffered events after
+    its Last-Event-ID, then live events, and the stream ends after a
+    terminal event.
+
+    publish() is safe from stage threads. Events are process-local: for an
+    upload analyzed by another worker, the first subscriber starts one
+    store poll that all of this process's subscribers share.
+    """
+
+    def __init__(self, history_size: int = 256, queue_size: int = 256,
+                 poll_interval: float = 1.0, retain_seconds: float = 300.0):
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.retain_seconds = retain_seconds
+        self.channels: Dict[str, ProgressChannel] = {}
+        self._lock = threading.Lock()
+
+    def _channel(self, upload_id: str) -> ProgressChannel:
+        channel = self.channels.get(upload_id)
+        if channel is None:
+            self._evict()
+            channel = ProgressChannel(upload_id, self.history_size)
+            self.channels[upload_id] = channel
+        return channel
+
+    def _evict(self):
+        """Drop finished channels nobody listens to once retain_seconds have passed."""
+        now = time.time()
+        expired = [
+            upload_id for upload_id, channel in self.channels.items()
+            if channel.finished_at is not None and not channel.subscribers
+            and now - channel.finished_at > self.retain_seconds
+        ]
+        for upload_id in expired:
+            del self.channels[upload_id]
+
+    def publish(self, upload_id: str, event: str, data: Dict[str, Any]) -> int:
+        """Record an event and hand it to every subscriber; returns its id."""
+        return self._publish(upload_id, event, data, local=True)
+
+    def publish_status(self, upload_id: str, status: Dict[str, Any]) -> int:
+        """Publish a status change, followed by completed/failed if it is terminal."""
+        return self._publish_status(upload_id, status, local=True)
+
+    def publish_file(self, upload_id: str, file_analysis: Dict[str, Any],
+                     files_done: int, files_total: int, key: str = 'filename') -> int:
+        """Publish one finished file's result with the running completion count."""
+        return self.publish(upload_id, 'file', {
+            'filename': file_analysis.get(key),
+            'files_done': files_done,
+            'files_total': files_total,
+            'file': file_analysis
+        })
+
+    def _publish_status(self, upload_id: str, status: Dict[str, Any], local: bool) -> int:
+        event_id = self._publish(upload_id, 'status', status, local)
+        terminal = TERMINAL_STATUSES.get(status.get('status'))
+        if terminal:
+            event_id = self._publish(upload_id, terminal, status, local)
+        return event_id
+
+    def _publish(self, upload_id: str, event: str, data: Dict[str, Any], local: bool) -> int:
+        with self._lock:
+            channel = self._channel(upload_id)
+            if local:
+                channel.local = True
+            channel.sequence += 1
+            item = (channel.sequence, event, data)
+            channel.history.append(item)
+            if event == 'status':
+                channel.latest_status = item
+            # A new run of a persistent upload reopens its channel
+            channel.finished_at = time.time() if event in TERMINAL_EVENTS else None
+            subscribers = list(channel.subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, item)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                with self._lock:
+                    channel.subscribers.discard((loop, queue))
+        return item[0]
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, item: ProgressEvent):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(item)
+
+    async def subscribe(self, upload_id: str, last_event_id: int = 0,
+                        read_status: Optional[StatusReader] = None,
+                        heartbeat: Optional[float] = None) -> AsyncIterator[Optional[ProgressEvent]]:
+        """Yield an upload's events until a terminal one.
+
+        With heartbeat set, None is yielded after that many idle seconds so
+        the caller can keep the connection alive and notice disconnects.
+        read_status enables the shared store poll for remote analyses.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        subscriber = (loop, queue)
+        with self._lock:
+            channel = self._channel(upload_id)
+            backlog = channel.replay(last_event_id)
+            channel.subscribers.add(subscriber)
+            if read_status is not None and not channel.local and channel.poller is None:
+                channel.poller = loop.create_task(self._poll(channel, read_status))
+        try:
+            for item in backlog:
+                yield item
+                if item[1] in TERMINAL_EVENTS:
+                    return
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield item
+                if item[1] in TERMINAL_EVENTS:
+                    return
+        finally:
+            with self._lock:
+                channel.subscribers.discard(subscriber)
+                if not channel.subscribers:
+                    if channel.poller is not None:
+                        channel.poller.cancel()
+                        channel.poller = None
+                    if not channel.local and self.channels.get(upload_id) is channel:
+                        del self.channels[upload_id]
+
+    async def _poll(self, channel: ProgressChannel, read_status: StatusReader):
+        """Republish status read from the store until the analysis ends or runs here."""
+        loop = asyncio.get_running_loop()
+        last = channel.latest_status[2] if channel.latest_status else None
+        while not channel.local:
+            status = await loop.run_in_executor(None, read_status)
+            if status is None:
+                self._publish(channel.upload_id, 'failed', {'status': 'not_found'}, local=False)
+                return
+            if status != last:
+                last = status
+                self._publish_status(channel.upload_id, status, local=False)
+                if status.get('status') in TERMINAL_STATUSES:
+                    return
+            await asyncio.sleep(self.poll_interval)
+
+
+def project_event(event: Optional[ProgressEvent], tree: Optional[Dict[str, Any]]) -> Optional[ProgressEvent]:
+    """Apply a parse_fields projection to the result carried by a file event."""
+    if event is None or tree is None or event[1] != 'file':
+        return event
+    event_id, name, data = event
+    return event_id, name, {**data, 'file': project(data['file'], tree)}
+
+
+def event_message(event: Optional[ProgressEvent]) -> Dict[str, Any]:
+    """JSON WebSocket message for an event; None becomes a heartbeat."""
+    if event is None:
+        return {'event': 'heartbeat'}
+    event_id, name, data = event
+    return {'id': event_id, 'event': name, 'data': data}
+
+
+def format_sse(event: Optional[ProgressEvent]) -> str:
+    """One text/event-stream message; None becomes a keep-alive comment."""
+    if event is None:
+        return ": keep-alive\n\n"
+    event_id, name, data = event
+    return f"id: {event_id}\nevent: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def parse_last_event_id(value: Optional[str]) -> int:
+    """Last-Event-ID header or query value; anything malformed replays from the start."""
+    try:
+        return max(0, int(value)) if value else 0
+    except ValueError:
+        return 0
@@ -0,0 +1,292 @@
+import ast
+import bisect
+import io
+import re
+from typing import Dict, List, Optional, Tuple
+
+from app.core.js_extractor import JSStructure, extract_js_structure, function_signature
+
+# Words, numbers and single symbols; BPE vocabularies split long words, so
+# every CHARS_PER_WORD_TOKEN letters of a word count as one more token
+_TOKEN_PIECE = re.compile(r"[A-Za-z_]+|\d+|[^\sA-Za-z_\d]")
+CHARS_PER_WORD_TOKEN = 4
+# Skeleton lines longer than this (minified code, long literals) are cut
+MAX_LINE_CHARS = 240
+# Doc comment lines kept above each declaration
+MAX_DOC_LINES = 8
+
+_IMPORT_LINE = re.compile(r"^\s*(import\b|export\s+(\*|\{[^}]*\})\s+from\b|(const|let|var)\s+.*=\s*require\()")
+_COMMENT_LINE = re.compile(r"^\s*(//|/\*|\*)")
+
+PYTHON_SUFFIXES = ('.py', '.pyx')
+_PYTHON_IMPORT_LINE = re.compile(r"^\s*(import\s|cimport\s|from\s+\S+\s+c?import\b)")
+_PYTHON_DECLARATION_LINE = re.compile(r"^\s*(async\s+def|def|class|cdef|cpdef)\s")
+_PYTHON_COMMENT_LINE = re.compile(r"^\s*#")
+
+# Skeleton pieces are taken tier by tier until the budget is spent
+TIER_IMPORTS, TIER_HEADER, TIER_DECLARATIONS, TIER_DOCS, TIER_TOP_LEVEL, TIER_NESTED = range(6)
+# (tier, first line, [(line number, text)], tokens)
+Piece = Tuple[int, int, List[Tuple[int, str]], int]
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast local estimate of a text's token count, close to BPE tokenizers on source code."""
+    return sum(1 + (len(piece) - 1) // CHARS_PER_WORD_TOKEN for piece in _TOKEN_PIECE.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of text, cut at a line end where possible, estimated at max_tokens or fewer."""
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Code runs about 3 characters per token; shrink until the estimate fits
+    end = min(len(text), max_tokens * 3)
+    while end > 0 and estimate_tokens(text[:end]) > max_tokens:
+        end = int(end * 0.9)
+    line_end = text.rfind("\n", 0, end)
+    return text[:line_end if line_end > end // 2 else end]
+
+
+def content_budget(template: str, context_tokens: int, reply_tokens: int, max_tokens: int = 0) -> int:
+    """Tokens left for content in a prompt from template once the reply is reserved, capped at max_tokens if set."""
+    budget = context_tokens - reply_tokens - estimate_tokens(template)
+    return max(1, min(budget, max_tokens) if max_tokens > 0 else budget)
+
+
+class FilePromptBuilder:
+    """Fits a source file into a token budget for the file summary prompt.
+
+    A file within the budget is sent as is. A larger one is reduced to a
+    skeleton: imports, the header comment, class and function signatures
+    with bodies elided, their doc comments, other top-level statements and
+    finally nested functions such as event handlers, taken in that order
+    until the budget is spent and rendered in file order. Python files
+    (by filename) get the same skeleton from ast, with docstrings as their
+    doc comments. Work is linear in the file size, and the returned text
+    never exceeds max_tokens by the estimate, so per-file inference cost is
+    bounded however large the file.
+    """
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max(1, max_tokens)
+
+    def build(self, content: str, structure: Optional[JSStructure] = None,
+              max_tokens: Optional[int] = None, filename: str = "") -> str:
+        budget = self.max_tokens if max_tokens is None else max(1, max_tokens)
+        if estimate_tokens(content) <= budget:
+            return content
+        if filename.endswith(PYTHON_SUFFIXES):
+            # Universal newlines, so line numbers match ast's
+            lines = io.StringIO(content, newline=None).read().split("\n")
+            pieces = _python_pieces(content, lines)
+            comment = "#"
+        else:
+            structure = structure if structure is not None else extract_js_structure(content)
+            lines = content.split("\n")
+            pieces = self._pieces(content, lines, structure)
+            comment = "//"
+        header = f"{comment} Skeleton of a {len(lines)}-line file: bodies and some statements omitted"
+        skeleton_budget = budget - estimate_tokens(header)
+
+        chosen: Dict[int, str] = {}
+        spent = 0
+        for _, _, piece_lines, tokens in sorted(pieces, key=lambda piece: piece[:2]):
+            if spent + tokens > skeleton_budget or any(number in chosen for number, _ in piece_lines):
+                continue
+            chosen.update(piece_lines)
+            spent += tokens
+        if not chosen:
+            # Nothing structural fits, e.g. one minified line: send the start of the file
+            return truncate_to_tokens(content, budget)
+        return "\n".join([header] + [chosen[number] for number in sorted(chosen)])
+
+    def _pieces(self, content: str, lines: List[str], structure: JSStructure) -> List[Piece]:
+        """(tier, line, [(line number, text)], tokens) for every skeleton candidate."""
+        line_starts = [0]
+        for line in lines[:-1]:
+            line_starts.append(line_starts[-1] + len(line) + 1)
+
+        def line_of(offset: int) -> int:
+            return bisect.bisect_right(line_starts, offset) - 1
+
+        pieces = []
+        covered = [False] * len(lines)
+        # (start offset, end offset, first line, last line, text, is a function)
+        declarations = []
+        for cls in structure.classes:
+            first = line_of(cls['start'])
+            declarations.append((cls['start'], cls['end'], first, line_of(cls['end']), lines[first], False))
+        for function in structure.functions:
+            first = line_of(function['start'])
+            # Indent and modifiers before the signature, e.g. "export default ", stay on the line
+            prefix = lines[first][:function['start'] - line_starts[first]]
+            suffix = " => ..." if function['type'] == 'arrow_function' else " { ... }"
+            declarations.append((function['start'], function['end'], first, line_of(function['end']),
+                                 prefix + function_signature(content, function) + suffix, True))
+        declarations.sort(key=lambda declaration: (declaration[0], -declaration[1]))
+
+        # Functions inside other functions (handlers, callbacks) rank below methods and top-level ones
+        enclosing: List[Tuple[int, bool]] = []  # (end offset, inside a function) of open declarations
+        for start, end, first, last, text, is_function in declarations:
+            while enclosing and enclosing[-1][0] <= start:
+                enclosing.pop()
+            if not enclosing:
+                # Lines of outermost declarations are left out of the top-level statements
+                for number in range(first, last + 1):
+                    covered[number] = True
+            nested = bool(enclosing) and enclosing[-1][1]
+            enclosing.append((end, is_function or nested))
+            pieces.append(_piece(TIER_NESTED if nested else TIER_DECLARATIONS, [(first, text)]))
+            doc = _doc_comment(lines, first, _COMMENT_LINE)
+            if doc:
+                pieces.append(_piece(TIER_DOCS, doc))
+
+        # The header is the comment block the file starts with, up to the first blank line
+        in_header = True
+        header_lines = 0
+        for number, line in enumerate(lines):
+            if not line.strip():
+                in_header = in_header and not header_lines
+                continue
+            if in_header and _COMMENT_LINE.match(line):
+                pieces.append(_piece(TIER_HEADER, [(number, line)]))
+                covered[number] = True
+                header_lines += 1
+                continue
+            in_header = False
+            if covered[number]:
+                continue
+            if _IMPORT_LINE.match(line):
+                pieces.append(_piece(TIER_IMPORTS, [(number, line)]))
+            elif not _COMMENT_LINE.match(line):
+                pieces.append(_piece(TIER_TOP_LEVEL, [(number, line)]))
+        return pieces
+
+
+def _python_pieces(content: str, lines: List[str]) -> List[Piece]:
+    """(tier, line, [(line number, text)], tokens) for every skeleton candidate of a Python file."""
+    try:
+        tree = ast.parse(content)
+    except SyntaxError:
+        # Cython (.pyx) or broken source
+        return _python_line_pieces(lines)
+
+    pieces = []
+    covered = [False] * len(lines)
+
+    def cover(first: int, last: int):
+        for number in range(first, last + 1):
+            covered[number] = True
+
+    def docstring(node) -> Optional[ast.AST]:
+        first = node.body[0] if node.body else None
+        if isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant) and isinstance(first.value.value, str):
+            return first
+        return None
+
+    def declare(node, nested: bool, outermost: bool):
+        is_function = not isinstance(node, ast.ClassDef)
+        first = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list]) - 1
+        body_start = node.body[0].lineno - 1
+        # The signature runs past its parameters, bases and annotations to the line ending in ":"
+        header_nodes = [node.args, node.returns] if is_function else node.bases + node.keywords
+        signature_end = max([node.lineno] + [
+            getattr(child, 'end_lineno', None) or 0
+            for header_node in header_nodes if header_node is not None
+            for child in ast.walk(header_node)
+        ]) - 1
+        if body_start > signature_end:
+            signature_end = next(
+                (number for number in range(signature_end, body_start)
+                 if lines[number].split("#")[0].rstrip().endswith(":")),
+                body_start - 1
+            )
+        text = [(number, lines[number]) for number in range(first, signature_end + 1)]
+        if is_function and body_start > signature_end:
+            text[-1] = (signature_end, lines[signature_end].rstrip() + " ...")
+        if outermost:
+            # Lines of outermost declarations are left out of the top-level statements
+            cover(first, node.end_lineno - 1)
+        pieces.append(_piece(TIER_NESTED if nested else TIER_DECLARATIONS, text))
+
+        doc = _doc_comment(lines, first, _PYTHON_COMMENT_LINE)
+        node_doc = docstring(node)
+        if node_doc is not None:
+            doc_first = node_doc.lineno - 1
+            doc += [(number, lines[number])
+                    for number in range(doc_first, min(node_doc.end_lineno, doc_first + MAX_DOC_LINES))]
+        if doc:
+            pieces.append(_piece(TIER_DOCS, doc))
+
+    def visit(body: List[ast.stmt], nested: bool, module_level: bool):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                declare(node, nested, module_level)
+                # Functions inside other functions (handlers, callbacks) rank below methods and top-level ones
+                visit(node.body, nested or not isinstance(node, ast.ClassDef), False)
+            elif module_level and isinstance(node, (ast.Import, ast.ImportFrom)):
+                pieces.append(_piece(TIER_IMPORTS, [
+                    (number, lines[number]) for number in range(node.lineno - 1, node.end_lineno)
+                ]))
+                cover(node.lineno - 1, node.end_lineno - 1)
+            else:
+                # Compound statements: imports under "try:" or "if TYPE_CHECKING:", defs under "if"
+                for child in (getattr(node, 'body', []), getattr(node, 'orelse', []),
+                              getattr(node, 'finalbody', []), getattr(node, 'handlers', [])):
+                    if isinstance(child, list):
+                        visit(child, nested, module_level)
+
+    module_doc = docstring(tree)
+    if module_doc is not None:
+        for number in range(module_doc.lineno - 1, module_doc.end_lineno):
+            pieces.append(_piece(TIER_HEADER, [(number, lines[number])]))
+        cover(module_doc.lineno - 1, module_doc.end_lineno - 1)
+    visit(tree.body, False, True)
+
+    # The header is the comment block the file starts with (shebang, license), up to the first statement
+    in_header = True
+    for number, line in enumerate(lines):
+        if not line.strip() or covered[number]:
+            continue
+        if _PYTHON_COMMENT_LINE.match(line):
+            if in_header:
+                pieces.append(_piece(TIER_HEADER, [(number, line)]))
+            continue
+        in_header = False
+        pieces.append(_piece(TIER_TOP_LEVEL, [(number, line)]))
+    return pieces
+
+
+def _python_line_pieces(lines: List[str]) -> List[Piece]:
+    """Skeleton candidates of Python-like source ast cannot parse, classified line by line."""
+    pieces = []
+    for number, line in enumerate(lines):
+        if _PYTHON_IMPORT_LINE.match(line):
+            pieces.append(_piece(TIER_IMPORTS, [(number, line)]))
+        elif _PYTHON_DECLARATION_LINE.match(line):
+            pieces.append(_piece(TIER_DECLARATIONS, [(number, line)]))
+        elif line.strip() and not line[0].isspace() and not _PYTHON_COMMENT_LINE.match(line):
+            pieces.append(_piece(TIER_TOP_LEVEL, [(number, line)]))
+    return pieces
+
+
+def _piece(tier: int, piece_lines: List[Tuple[int, str]]) -> Piece:
+    piece_lines = [(number, _clip(text)) for number, text in piece_lines]
+    tokens = sum(estimate_tokens(text) for _, text in piece_lines)
+    return tier, piece_lines[0][0], piece_lines, tokens
+
+
+def _doc_comment(lines: List[str], first: int, comment_line: re.Pattern) -> List[Tuple[int, str]]:
+    """Comment lines directly above a declaration, at most MAX_DOC_LINES of them."""
+    doc = []
+    number = first - 1
+    while number >= 0 and comment_line.match(lines[number]) and len(doc) < MAX_DOC_LINES:
+        doc.append((number, lines[number]))
+        number -= 1
+    return doc[::-1]
+
+
+def _clip(line: str) -> str:
+    line = line.rstrip()
+    return line if len(line) <= MAX_LINE_CHARS else line[:MAX_LINE_CHARS] + " ..."
@@ -0,0 +1,98 @@
+import ast
+import io
+import textwrap
+from typing import Any, Dict, List, Tuple
+
+
+class PythonStructureVisitor(ast.NodeVisitor):
+    """Collects functions, classes, imports and call sites in one traversal.
+
+    Function source is sliced from the original lines using the node's line
+    span, decorators included, so nothing is regenerated with ast.unparse.
+    Methods carry the name of their enclosing class.
+    """
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        self.functions: List[Dict[str, Any]] = []
+        self.classes: List[Dict[str, Any]] = []
+        self.imports: List[str] = []
+        self.imported_names: List[str] = []
+        self.module_imports: List[str] = []  # with leading dots for relative imports
+        self.calls: List[Tuple[str, int]] = []
+        self._class_stack: List[str] = []
+
+    def _source(self, node: ast.AST) -> str:
+        start = min([node.lineno] + [decorator.lineno for decorator in getattr(node, 'decorator_list', [])])
+        end = getattr(node, 'end_lineno', None) or node.lineno
+        return textwrap.dedent(''.join(self.lines[start - 1:end])).strip()
+
+    def _visit_function(self, node, is_async: bool):
+        parameters = [arg.arg for arg in node.args.args]
+        prefix = 'async def' if is_async else 'def'
+        self.functions.append({
+            'name': node.name,
+            'line_number': node.lineno,
+            'end_line_number': getattr(node, 'end_lineno', None) or node.lineno,
+            'parameters': parameters,
+            'docstring': ast.get_docstring(node) or "",
+            'is_async': is_async,
+            'class_name': self._class_stack[-1] if self._class_stack else None,
+            'signature': f"{prefix} {node.name}({', '.join(parameters)})",
+            'code': self._source(node)
+        })
+        # Functions nested in a method are not methods of the class
+        saved_stack, self._class_stack = self._class_stack, []
+        self.generic_visit(node)
+        self._class_stack = saved_stack
+
+    def visit_FunctionDef(self, node: ast.FunctionDef):
+        self._visit_function(node, is_async=False)
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef):
+        self._visit_function(node, is_async=True)
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        self.classes.append({
+            'name': node.name,
+            'line_number': node.lineno,
+            'docstring': ast.get_docstring(node) or ""
+        })
+        self._class_stack.append(node.name)
+        self.generic_visit(node)
+        self._class_stack.pop()
+
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            self.imports.append(alias.name)
+            self.imported_names.append(alias.name)
+            self.module_imports.append(alias.name)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        module = node.module or ""
+        if node.module:
+            self.imports.append(node.module)
+        self.module_imports.append('.' * node.level + module)
+        for alias in node.names:
+            self.imported_names.append(f"{module}.{alias.name}")
+
+    def visit_Call(self, node: ast.Call):
+        func = node.func
+        if isinstance(func, ast.Name):
+            self.calls.append((func.id, node.lineno))
+        elif isinstance(func, ast.Attribute):
+            self.calls.append((func.attr, node.lineno))
+        self.generic_visit(node)
+
+
+def extract_python_structure(content: str) -> PythonStructureVisitor:
+    """Parse content once and return the populated visitor.
+
+    Raises SyntaxError for invalid source, like ast.parse.
+    """
+    tree = ast.parse(content)
+    # Split on the line endings ast counts (\n, \r\n, \r), not str.splitlines(),
+    # which also breaks on form feeds and other separators and shifts every slice
+    visitor = PythonStructureVisitor(io.StringIO(content, newline=None).readlines())
+    visitor.visit(tree)
+    return visitor
@@ -1,22 +1,39 @@
 import zipfile
 import os
-import re
-from typing import List, Dict, Any
-import ast
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.core.file_classifier import ClassificationReport, FileClassifier, find_project_roots
+from app.core.js_extractor import extract_js_structure, function_code, function_signature
+from app.core.parse_cache import ParseCache
+from app.core.python_extractor import extract_python_structure
 
 class RealFileParser:
     """Real file parser that extracts and parses uploaded files"""
     
-    def __init__(self):
+    # Bump whenever parse output changes so cached results are invalidated
+    PARSER_VERSION = "3"
+    
+    def __init__(self, cache: Optional[ParseCache] = None):
         self.supported_extensions = ['.js', '.jsx', '.ts', '.tsx', '.py', '.pyx']
         self.extracted_files = {}
+        self.cache = cache
     
-    def extract_zip(self, zip_file_path: str) -> Dict[str, str]:
-        """Extract and parse files from a zip archive"""
+    def extract_zip(self, zip_file_path: str, classifier: Optional[FileClassifier] = None,
+                    report: Optional[ClassificationReport] = None) -> Dict[str, str]:
+        """Extract and parse files from a zip archive
+        
+        With a classifier, vendored and gitignored members are skipped before
+        decompression and minified/generated ones are left out; both are logged
+        in report.
+        """
         extracted_files = {}
+        if classifier is not None and report is None:
+            report = ClassificationReport()
         
         try:
             with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+                gitignore = classifier.load_zip_gitignore(zip_ref) if classifier else None
+                roots = find_project_roots(zip_ref.namelist()) if classifier else None
                 for file_info in zip_ref.filelist:
                     filename = file_info.filename
                     
@@ -24,8 +41,23 @@ class RealFileParser:
                     if file_info.is_dir() or not self._is_supported_file(filename):
                         continue
                     
+                    if classifier:
+                        report.scanned += 1
+                        verdict = classifier.classify_path(filename, gitignore, roots)
+                        if verdict:
+                            report.add(filename, *verdict, size=file_info.file_size)
+                            continue
+                    
                     # Read file content
                     content = zip_ref.read(filename).decode('utf-8', errors='ignore')
+                    
+                    if classifier:
+                        verdict = classifier.classify_sample(content[:classifier.sample_bytes])
+                        if verdict:
+                            report.add(filename, *verdict, size=file_info.file_size)
+                            continue
+                        report.analyzed += 1
+                    
                     extracted_files[filename] = content
                     
         except Exception as e:
@@ -41,8 +73,7 @@ class RealFileParser:
     
     def parse_javascript_file(self, filename: str, content: str) -> Dict[str, Any]:
         """Parse JavaScript/React file"""
-        functions = self._extract_js_functions(content)
-        imports = self._extract_js_imports(content)
+        functions, imports = self._extract_js_structure(content)
         
         return {
             "filename": filename,
@@ -54,8 +85,7 @@ class RealFileParser:
     
     def parse_python_file(self, filename: str, content: str) -> Dict[str, Any]:
         """Parse Python file"""
-        functions = self._extract_python_functions(content)
-        imports = self._extract_python_imports(content)
+        functions, imports = self._extract_python_structure(content)
         
         return {
             "filename": filename,
@@ -65,126 +95,40 @@ class RealFileParser:
             "content": content
         }
     
-    def _extract_js_functions(self, content: str) -> List[Dict[str, str]]:
-        """Extract functions from JavaScript/React code"""
-        functions = []
-        
-        # Patterns for different function declarations
-        patterns = [
-            # Function declarations
-            r'function\s+(\w+)\s*\([^)]*\)\s*\{[^}]*\}',
-            # Arrow functions
-            r'const\s+(\w+)\s*=\s*\([^)]*\)\s*=>\s*\{[^}]*\}',
-            # Method definitions
-            r'(\w+)\s*:\s*\([^)]*\)\s*=>\s*\{[^}]*\}',
-            # Function expressions
-            r'(\w+)\s*:\s*function\s*\([^)]*\)\s*\{[^}]*\}'
+    def _extract_js_structure(self, content: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Extract functions and imports from JavaScript/React code in one linear scan"""
+        structure = extract_js_structure(content)
+        functions = [
+            {
+                "name": func["name"],
+                "signature": function_signature(content, func),
+                "code": function_code(content, func),
+                "line_number": func["line_number"],
+                "class_name": func["class_name"]
+            }
+            for func in structure.functions
         ]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, content, re.DOTALL)
-            for match in matches:
-                function_name = match.group(1)
-                function_code = match.group(0)
-                
-                # Extract function signature
-                signature = self._extract_function_signature(function_code)
-                
-                functions.append({
-                    "name": function_name,
-                    "signature": signature,
-                    "code": function_code.strip()
-                })
-        
-        return functions
+        return functions, structure.imports
     
-    def _extract_python_functions(self, content: str) -> List[Dict[str, str]]:
-        """Extract functions from Python code"""
-        functions = []
-        
+    def _extract_python_structure(self, content: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Extract functions and imports from Python code in a single parse"""
         try:
-            tree = ast.parse(content)
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    function_name = node.name
-                    function_code = ast.unparse(node)
-                    
-                    # Extract function signature
-                    signature = f"def {function_name}({', '.join(arg.arg for arg in node.args.args)})"
-                    
-                    functions.append({
-                        "name": function_name,
-                        "signature": signature,
-                        "code": function_code.strip()
-                    })
-                    
+            structure = extract_python_structure(content)
         except SyntaxError as e:
             print(f"Error parsing Python file: {e}")
-        
-        return functions
-    
-    def _extract_js_imports(self, content: str) -> List[str]:
-        """Extract import statements from JavaScript/React code"""
-        imports = []
-        
-        # Patterns for import statements
-        import_patterns = [
-            r'import\s+.*?from\s+[\'"]([^\'"]+)[\'"]',
-            r'import\s+[\'"]([^\'"]+)[\'"]',
-            r'require\s*\(\s*[\'"]([^\'"]+)[\'"]\s*\)'
+            return [], []
+        
+        functions = [
+            {
+                "name": func["name"],
+                "signature": func["signature"],
+                "code": func["code"],
+                "line_number": func["line_number"],
+                "class_name": func["class_name"]
+            }
+            for func in structure.functions
         ]
-        
-        for pattern in import_patterns:
-            matches = re.finditer(pattern, content)
-            for match in matches:
-                import_path = match.group(1)
-                imports.append(import_path)
-        
-        return imports
-    
-    def _extract_python_imports(self, content: str) -> List[str]:
-        """Extract import statements from Python code"""
-        imports = []
-        
-        try:
-            tree = ast.parse(content)
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        imports.append(alias.name)
-                elif isinstance(node, ast.ImportFrom):
-                    module = node.module or ""
-                    for alias in node.names:
-                        imports.append(f"{module}.{alias.name}")
-                        
-        except SyntaxError as e:
-            print(f"Error parsing Python imports: {e}")
-        
-        return imports
-    
-    def _extract_function_signature(self, function_code: str) -> str:
-        """Extract function signature from function code"""
-        # Find the opening parenthesis
-        start = function_code.find('(')
-        if start == -1:
-            return function_code
-        
-        # Find the closing parenthesis
-        paren_count = 0
-        end = start
-        
-        for i, char in enumerate(function_code[start:], start):
-            if char == '(':
-                paren_count += 1
-            elif char == ')':
-                paren_count -= 1
-                if paren_count == 0:
-                    end = i + 1
-                    break
-        
-        return function_code[:end]
+        return functions, structure.imported_names
     
     def parse_all_files(self, extracted_files: Dict[str, str]) -> List[Dict[str, Any]]:
         """Parse all extracted files"""
@@ -192,12 +136,34 @@ class RealFileParser:
         
         for filename, content in extracted_files.items():
             if filename.endswith(('.js', '.jsx', '.ts', '.tsx')):
-                parsed_file = self.parse_javascript_file(filename, content)
+                parse = self.parse_javascript_file
+                namespace = 'real_file_parser.javascript'
             elif filename.endswith(('.py', '.pyx')):
-                parsed_file = self.parse_python_file(filename, content)
+                parse = self.parse_python_file
+                namespace = 'real_file_parser.python'
             else:
                 continue
             
-            parsed_files.append(parsed_file)
+            if self.cache is None:
+                parsed_files.append(parse(filename, content))
+                continue
+            
+            # Only the structural fields are cached; filename and content come from this upload
+            cache_key = ParseCache.make_key(namespace, self.PARSER_VERSION, content)
+            cached = self.cache.get(cache_key)
+            if cached is None:
+                parsed_file = parse(filename, content)
+                cached = {
+                    "type": parsed_file["type"],
+                    "functions": parsed_file["functions"],
+                    "imports": parsed_file["imports"]
+                }
+                self.cache.put(cache_key, cached)
+            
+            parsed_files.append({
+                "filename": filename,
+                **cached,
+                "content": content
+            })
         
         return parsed_files 
\ No newline at end of file
@@ -0,0 +1,171 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import httpx
+
+# Returned by TTLCache.get when a key is absent or expired; a cached None is a remembered miss
+MISSING = object()
+
+
+class TTLCache:
+    """Bounded, thread-safe cache whose entries expire.
+
+    Each entry carries its own TTL, so misses can be remembered for less
+    time than hits. When full, expired entries are dropped first and then
+    the least recently used ones.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            now = time.monotonic()
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                for stale in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+                    del self._entries[stale]
+                while len(self._entries) >= self.max_entries:
+                    self._entries.popitem(last=False)
+            self._entries[key] = (now + ttl, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RegistryClient:
+    """Async npm/PyPI metadata client with connection pooling and caching.
+
+    - one pooled httpx.AsyncClient shared by all lookups
+    - a semaphore bounds concurrent registry requests
+    - duplicate lookups already in flight share a single request
+    - results live in a TTL cache; 404s are cached too (negative caching)
+    """
+
+    def __init__(self,
+                 npm_registry_url: str = "https://registry.npmjs.org",
+                 pypi_url: str = "https://pypi.org",
+                 max_concurrency: int = 8,
+                 ttl: float = 3600.0,
+                 negative_ttl: float = 600.0,
+                 timeout: float = 5.0,
+                 max_entries: int = 10000):
+        self.npm_registry_url = npm_registry_url.rstrip('/')
+        self.pypi_url = pypi_url.rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._cache = TTLCache(max_entries)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "errors": 0}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Create the pooled client on first use, inside the running event loop."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def fetch_npm(self, package_name: str) -> Optional[Dict[str, Any]]:
+        """Fetch the latest-version document for an npm package."""
+        return await self.get_json(f"{self.npm_registry_url}/{package_name}/latest")
+
+    async def fetch_pypi(self, package_name: str) -> Optional[Dict[str, Any]]:
+        """Fetch the JSON metadata for a PyPI package."""
+        return await self.get_json(f"{self.pypi_url}/pypi/{package_name}/json")
+
+    async def get_json(self, url: str) -> Optional[Dict[str, Any]]:
+        """GET a JSON document, returning None if it is missing or the request fails."""
+        cached = self._cache.get(url)
+        if cached is not MISSING:
+            self.stats["cache_hits"] += 1
+            return cached
+
+        in_flight = self._in_flight.get(url)
+        if in_flight is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[url] = future
+        try:
+            data = await self._request(url)
+            future.set_result(data)
+            return data
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved so waiter-less futures don't log warnings
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[url]
+
+    async def _request(self, url: str) -> Optional[Dict[str, Any]]:
+        """Perform one registry request under the concurrency limit and cache the result."""
+        client = self._get_client()
+        async with self._semaphore:
+            self.stats["requests"] += 1
+            try:
+                response = await client.get(url)
+            except httpx.HTTPError as e:
+                # Transient failures are not cached so the next upload can retry
+                self.stats["errors"] += 1
+                print(f"Error fetching {url}: {e}")
+                return None
+
+        if response.status_code == 404:
+            self._cache.put(url, None, self.negative_ttl)
+            return None
+        if response.status_code != 200:
+            self.stats["errors"] += 1
+            return None
+
+        try:
+            data = response.json()
+        except ValueError:
+            self.stats["errors"] += 1
+            return None
+        self._cache.put(url, data, self.ttl)
+        return data
+
+    def clear_cache(self):
+        """Drop all cached registry responses."""
+        self._cache.clear()
+
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
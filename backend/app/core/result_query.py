@@ -0,0 +1,118 @@
+import base64
+from typing import Any, Dict, Optional
+
+from app.core.analysis_store import AnalysisStore
+
+
+class InvalidQuery(ValueError):
+    """Raised for a malformed cursor or fields expression."""
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Turn "filename,summary,functions.name" into a projection tree.
+
+    Returns None when no projection was asked for. A leaf is True (keep the
+    whole value); a nested dict selects keys inside a dict or inside every
+    dict of a list, so "functions.name" keeps function names but drops code.
+    """
+    if not fields:
+        return None
+    tree: Dict[str, Any] = {}
+    for path in fields.split(','):
+        parts = [part.strip() for part in path.split('.')]
+        if not all(parts):
+            raise InvalidQuery(f"Invalid field path: {path!r}")
+        node = tree
+        for part in parts[:-1]:
+            child = node.get(part)
+            if child is True:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = True
+    return tree
+
+
+def project(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    """Apply a projection tree from parse_fields to a result value."""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    projected = {}
+    for key, subtree in tree.items():
+        if key in value:
+            projected[key] = value[key] if subtree is True else project(value[key], subtree)
+    return projected
+
+
+def encode_cursor(position: int) -> str:
+    return base64.urlsafe_b64encode(f"p:{position}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """Store position a cursor points after; no cursor starts at the beginning."""
+    if not cursor:
+        return 0
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        prefix, position = decoded.split(':', 1)
+        if prefix != 'p':
+            raise ValueError(prefix)
+        return int(position)
+    except ValueError:
+        raise InvalidQuery(f"Invalid cursor: {cursor!r}")
+
+
+def page_files(store: AnalysisStore, upload_id: str, cursor: Optional[str] = None,
+               limit: int = 100, fields: Optional[str] = None) -> Dict[str, Any]:
+    """One page of an upload's file results, in the order they were stored.
+
+    Only limit + 1 rows are read; next_cursor is None on the last page.
+    Stored positions are stable, so pages stay consistent while an analysis
+    is still writing rows.
+    """
+    tree = parse_fields(fields)
+    rows = store.list_files(upload_id, after=decode_cursor(cursor), limit=limit + 1)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "files": [project(data, tree) for _, data in rows],
+        "next_cursor": encode_cursor(rows[-1][0]) if has_more else None,
+        "total_files": store.count_files(upload_id)
+    }
+
+
+def get_file_result(store: AnalysisStore, upload_id: str, filename: str,
+                    fields: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """One file's result, projected, or None if the upload has no such file."""
+    tree = parse_fields(fields)
+    data = store.get_file(upload_id, filename)
+    return project(data, tree) if data is not None else None
+
+
+def get_project_result(store: AnalysisStore, upload_id: str, fields: Optional[str] = None,
+                       include_files: bool = True) -> Optional[Dict[str, Any]]:
+    """The project-level result with files projected by fields, or None if not finished.
+
+    With include_files=False the files list is left out and file_count is
+    added, so clients can fetch the summary and page files separately.
+    """
+    tree = parse_fields(fields)
+    if include_files:
+        result = store.get_result(upload_id)
+        if result is not None:
+            result["files"] = project(result["files"], tree)
+        return result
+    result = store.get_result_fields(upload_id)
+    if result is not None:
+        result["file_count"] = store.count_files(upload_id)
+    return result
+
+
+def clamp_limit(limit: Optional[int], default: int, maximum: int) -> int:
+    if limit is None:
+        return default
+    return max(1, min(limit, maximum))
@@ -0,0 +1,88 @@
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+# A per-file stage consumes the previous stage's items and yields its own
+FileStage = Callable[[Iterable[Any]], Iterator[Any]]
+
+
+class StageGraph:
+    """Per-file pipeline stages chained as generators.
+
+    Each file flows through every stage on its own, so the first result
+    leaves the graph while later files are still being parsed. A stage that
+    batches work (LLM calls) decides itself how many items to hold back.
+    Project-level stages such as library resolution and cross-references
+    need every file and run on the collected results after the stream ends.
+    counts tracks how many items have left each stage.
+    """
+
+    def __init__(self, *stages: Tuple[str, FileStage]):
+        self.stages: List[Tuple[str, FileStage]] = list(stages)
+        self.counts: Dict[str, int] = {name: 0 for name, _ in self.stages}
+
+    def run(self, source: Iterable[Any]) -> Iterator[Any]:
+        items: Iterator[Any] = iter(source)
+        for name, stage in self.stages:
+            items = self._counted(name, stage(items))
+        return items
+
+    def _counted(self, name: str, items: Iterator[Any]) -> Iterator[Any]:
+        for item in items:
+            self.counts[name] += 1
+            yield item
+
+
+class ProjectAggregate:
+    """Project-level totals kept current as file results arrive.
+
+    add() and remove() cost one file's size, so a partial result is
+    available at any point and the final totals need no second pass.
+    remove() followed by add() updates a file whose result changed.
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.functions = 0
+        self.lines = 0
+        self.file_types: Counter = Counter()
+        self.libraries: Counter = Counter()
+
+    def add(self, file_analysis: Dict[str, Any]):
+        self._apply(file_analysis, 1)
+
+    def remove(self, file_analysis: Dict[str, Any]):
+        self._apply(file_analysis, -1)
+
+    def _apply(self, file_analysis: Dict[str, Any], sign: int):
+        self.files += sign
+        self.functions += sign * len(file_analysis.get('functions') or [])
+        self.lines += sign * (file_analysis.get('line_count') or 0)
+        if file_analysis.get('file_type'):
+            self.file_types[file_analysis['file_type']] += sign
+        for library in file_analysis.get('external_libraries') or []:
+            self.libraries[library.get('name')] += sign
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total_files': self.files,
+            'total_functions': self.functions,
+            'total_lines': self.lines,
+            'file_types': dict(+self.file_types),
+            'total_libraries': len(+self.libraries)
+        }
+
+
+class ProgressThrottle:
+    """Lets a stored progress write through at most once per interval seconds."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._last = float('-inf')
+
+    def ready(self) -> bool:
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            return False
+        self._last = now
+        return True
@@ -0,0 +1,332 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+# Leading bytes of a zip: a local file header, or the end record of an empty archive
+ZIP_SIGNATURES = (b'PK\x03\x04', b'PK\x05\x06')
+# Room for multipart boundaries and form fields around the file itself
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadRejected(Exception):
+    """An upload refused before or while its body is read; details go into the error response."""
+
+    def __init__(self, message: str, status_code: int = 400, **details: Any):
+        super().__init__(message)
+        self.status_code = status_code
+        self.details = details
+
+
+class UploadTooLarge(UploadRejected):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit",
+                         status_code=413, max_bytes=max_bytes)
+
+
+class _ChunkWriter:
+    """Appends body chunks to a file, hashing them on the way.
+
+    Chunks are buffered up to chunk_size and each full buffer is written
+    and hashed in a worker thread, so memory stays at one buffer and the
+    event loop never waits on disk. The size limit is checked before a
+    chunk is accepted; the first chunk of a new file must look like a zip.
+    """
+
+    def __init__(self, path: str, limit: int, max_bytes: int, chunk_size: int,
+                 offset: int = 0, hasher: Optional[Any] = None):
+        self.path = path
+        self.limit = limit
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.size = offset
+        self.hasher = hasher
+        self._buffer = bytearray()
+        self._file = open(path, 'ab' if offset else 'wb')
+
+    async def write(self, chunk: bytes):
+        if not chunk:
+            return
+        if self.size + len(self._buffer) + len(chunk) > self.limit:
+            if self.limit < self.max_bytes:
+                raise UploadRejected("Upload is larger than its declared size", status_code=413)
+            raise UploadTooLarge(self.max_bytes)
+        if self.size == 0 and not self._buffer and not chunk.startswith(ZIP_SIGNATURES):
+            raise UploadRejected("Not a zip archive")
+        self._buffer += chunk
+        if len(self._buffer) >= self.chunk_size:
+            await self.flush()
+
+    async def flush(self):
+        if self._buffer:
+            data, self._buffer = bytes(self._buffer), bytearray()
+            await asyncio.get_running_loop().run_in_executor(None, self._write, data)
+            self.size += len(data)
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        if self.hasher is not None:
+            # hashlib releases the GIL for large updates
+            self.hasher.update(data)
+
+    async def close(self):
+        """Write what is buffered and close; after a failure this keeps the bytes received so far."""
+        try:
+            await self.flush()
+        finally:
+            self._file.close()
+
+
+def _file_sha256(path: str, chunk_size: int) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class UploadReceiver:
+    """Writes uploaded archives to disk in constant memory.
+
+    receive() copies a multipart UploadFile chunk by chunk. Large archives
+    can instead go through a resumable session: create_session() declares
+    the filename and total size (rejected at once when over the cap),
+    append() streams raw request bodies onto the session's part file at
+    a given offset, and complete() hands back the finished archive. A
+    client that loses its connection asks get_session() for the received
+    offset and continues from there.
+
+    Sessions are a part file plus a JSON sidecar in upload_dir, so any
+    worker on the same host can continue one. The running SHA-256 is kept
+    in memory; when another worker or a restart took over a session, it
+    is recomputed from the part file on completion.
+    """
+
+    def __init__(self, upload_dir: str = "", max_bytes: int = 5 * 1024 ** 3,
+                 chunk_size: int = 1024 * 1024, session_ttl: float = 86400.0):
+        self.upload_dir = upload_dir or os.path.join(tempfile.gettempdir(), "docusynth_uploads")
+        self.max_bytes = max_bytes
+        self.chunk_size = max(1, chunk_size)
+        self.session_ttl = session_ttl
+        os.makedirs(self.upload_dir, exist_ok=True)
+        # session_id -> (offset the hash covers, hasher)
+        self._hashers: Dict[str, Tuple[int, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def archive_path(self) -> str:
+        """A new file in upload_dir for a received archive."""
+        fd, path = tempfile.mkstemp(suffix=".zip", dir=self.upload_dir)
+        os.close(fd)
+        return path
+
+    async def receive(self, upload: Any, dest_path: Optional[str] = None) -> Dict[str, Any]:
+        """Copy a multipart upload to dest_path (default: archive_path()); returns its path, size and sha256."""
+        if upload.size is not None and upload.size > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+        dest_path = dest_path or self.archive_path()
+        writer = _ChunkWriter(dest_path, self.max_bytes, self.max_bytes, self.chunk_size,
+                              hasher=hashlib.sha256())
+        try:
+            while True:
+                chunk = await upload.read(self.chunk_size)
+                if not chunk:
+                    break
+                await writer.write(chunk)
+        except BaseException:
+            await writer.close()
+            os.remove(dest_path)
+            raise
+        await writer.close()
+        if writer.size == 0:
+            os.remove(dest_path)
+            raise UploadRejected("Empty upload")
+        return {"path": dest_path, "size": writer.size, "sha256": writer.hasher.hexdigest()}
+
+    def _paths(self, session_id: str) -> Tuple[str, str]:
+        if not session_id or not all(c.isalnum() for c in session_id):
+            raise UploadRejected("Upload session not found", status_code=404)
+        base = os.path.join(self.upload_dir, session_id)
+        return base + ".json", base + ".part"
+
+    def create_session(self, filename: str, total_size: Optional[int] = None) -> Dict[str, Any]:
+        """Start a resumable upload; total_size, when given, is checked against the cap before any byte is sent."""
+        if total_size is not None and total_size > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+        if total_size is not None and total_size <= 0:
+            raise UploadRejected("Empty upload")
+        self.expire_sessions()
+        session_id = uuid.uuid4().hex
+        sidecar, part = self._paths(session_id)
+        open(part, 'wb').close()
+        session = {"session_id": session_id, "filename": filename,
+                   "total_size": total_size, "created_at": time.time()}
+        with open(sidecar, 'w') as f:
+            json.dump(session, f)
+        self._hashers[session_id] = (0, hashlib.sha256())
+        return {**session, "received": 0, "chunk_size": self.chunk_size, "max_bytes": self.max_bytes}
+
+    def get_session(self, session_id: str) -> Dict[str, Any]:
+        """The session with the number of bytes received so far."""
+        sidecar, part = self._paths(session_id)
+        try:
+            with open(sidecar) as f:
+                session = json.load(f)
+            session["received"] = os.path.getsize(part)
+        except (OSError, ValueError):
+            raise UploadRejected("Upload session not found", status_code=404)
+        return {**session, "chunk_size": self.chunk_size, "max_bytes": self.max_bytes}
+
+    async def append(self, session_id: str, offset: int, body: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """Stream a request body onto the session at offset.
+
+        offset must equal the bytes received so far; otherwise 409 with the
+        current offset tells the client where to resume. A body that breaks
+        off keeps the bytes that arrived.
+        """
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            session = self.get_session(session_id)
+            received = session["received"]
+            if offset != received:
+                raise UploadRejected("Offset does not match the bytes received",
+                                     status_code=409, received=received)
+            limit = min(self.max_bytes, session["total_size"] or self.max_bytes)
+            hashed, hasher = self._hashers.get(session_id, (None, None))
+            if hashed != received:
+                # Another worker wrote part of this session; hash the whole file on completion
+                hasher = None
+            writer = _ChunkWriter(self._paths(session_id)[1], limit, self.max_bytes,
+                                  self.chunk_size, offset=received, hasher=hasher)
+            try:
+                async for chunk in body:
+                    await writer.write(chunk)
+            finally:
+                await writer.close()
+                if hasher is not None:
+                    self._hashers[session_id] = (writer.size, hasher)
+                else:
+                    self._hashers.pop(session_id, None)
+            session["received"] = writer.size
+            return session
+
+    async def complete(self, session_id: str, dest_path: Optional[str] = None) -> Dict[str, Any]:
+        """Move the finished archive to dest_path (default: archive_path()); returns path, filename, size and sha256."""
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            session = self.get_session(session_id)
+            received = session["received"]
+            if received == 0 or (session["total_size"] is not None and received != session["total_size"]):
+                raise UploadRejected("Upload is incomplete", status_code=409, received=received)
+            sidecar, part = self._paths(session_id)
+            loop = asyncio.get_running_loop()
+            hashed, hasher = self._hashers.pop(session_id, (None, None))
+            if hashed == received:
+                sha256 = hasher.hexdigest()
+            else:
+                sha256 = await loop.run_in_executor(None, _file_sha256, part, self.chunk_size)
+            dest_path = dest_path or self.archive_path()
+            await loop.run_in_executor(None, shutil.move, part, dest_path)
+            os.remove(sidecar)
+            self._locks.pop(session_id, None)
+            return {"path": dest_path, "filename": session["filename"], "size": received, "sha256": sha256}
+
+    def abort(self, session_id: str):
+        """Discard a session and its received bytes."""
+        for path in self._paths(session_id):
+            if os.path.exists(path):
+                os.remove(path)
+        self._hashers.pop(session_id, None)
+        self._locks.pop(session_id, None)
+
+    def expire_sessions(self):
+        """Remove sessions untouched for session_ttl seconds."""
+        cutoff = time.time() - self.session_ttl
+        for name in os.listdir(self.upload_dir):
+            session_id, extension = os.path.splitext(name)
+            if extension != ".json":
+                continue
+            part = os.path.join(self.upload_dir, session_id + ".part")
+            try:
+                touched = os.path.getmtime(part) if os.path.exists(part) else 0
+            except OSError:
+                continue
+            if touched < cutoff:
+                self.abort(session_id)
+
+
+class UploadLimitMiddleware:
+    """Rejects oversized upload requests with 413 before their body is read.
+
+    A Content-Length over the limit is refused without reading anything;
+    a chunked body is counted as it arrives and cut off once it passes
+    the limit. Only POST and PUT requests under the given path prefixes
+    are checked. error_key matches the app's error responses.
+    """
+
+    def __init__(self, app: Any, max_bytes: int, paths: Tuple[str, ...] = ("/upload",),
+                 error_key: str = "error"):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.limit = max_bytes + FORM_OVERHEAD_BYTES
+        self.paths = paths
+        self.error_key = error_key
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] not in ("POST", "PUT")
+                or not scope["path"].startswith(self.paths)):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        try:
+            declared = int(headers.get(b"content-length", b"-1"))
+        except ValueError:
+            declared = -1
+        if declared > self.limit:
+            await self._reject(send)
+            return
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.limit:
+                    exceeded = True
+                    raise UploadTooLarge(self.max_bytes)
+            return message
+
+        async def limited_send(message):
+            nonlocal started
+            if exceeded:
+                # Whatever error the app made of the cut-off body, the client gets 413
+                if not started:
+                    started = True
+                    await self._reject(send)
+                return
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, limited_send)
+        except UploadTooLarge:
+            if started:
+                raise
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps({self.error_key: str(UploadTooLarge(self.max_bytes))}).encode()
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode()),
+                                (b"connection", b"close")]})
+        await send({"type": "http.response.body", "body": body})
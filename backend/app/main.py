@@ -1,20 +1,34 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import os
 import tempfile
 import shutil
 import uuid
 import time
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
 from app.models.schemas import (
     UploadResponse, AnalysisRequest, AnalysisResponse, 
     ProjectAnalysis, FileAnalysis, AgentStatus
 )
 from app.core.file_parser import FileParser
+from app.core.parse_engine import ParseEngine
+from app.core.parse_cache import ParseCache
+from app.core.file_record_cache import FileRecordCache
+from app.config import Config
 from app.agents.internal_doc_agent import InternalDocAgent
 from app.agents.library_doc_agent import LibraryDocAgent
+from app.core.registry_client import RegistryClient
+from app.core.package_index import load_package_index
+from app.core.generation_cache import get_generation_cache
+from app.core.analysis_executor import AnalysisExecutor, AnalysisLease, AnalysisQueueFull
+from app.core.file_classifier import FileClassifier, ClassificationReport
+from app.core.analysis_store import create_analysis_store
+from app.core.result_query import InvalidQuery, clamp_limit, get_file_result, get_project_result, page_files, parse_fields
+from app.core.progress_events import ProgressBroker, event_message, format_sse, parse_last_event_id, project_event
+from app.core.stage_graph import ProgressThrottle, ProjectAggregate, StageGraph
+from app.core.upload_receiver import UploadLimitMiddleware, UploadReceiver, UploadRejected
 from app.agents.context_manager_agent import ContextManagerAgent
 
 app = FastAPI(
@@ -32,14 +46,86 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Refuse oversized uploads before reading their body
+app.add_middleware(UploadLimitMiddleware, max_bytes=Config.MAX_UPLOAD_MB * 1024 * 1024, error_key="detail")
+
 # Initialize components
 file_parser = FileParser()
+parse_engine = ParseEngine(
+    max_workers=Config.PARSE_WORKERS or None,
+    chunk_size=Config.PARSE_CHUNK_SIZE,
+    cache_path=Config.PARSE_CACHE_PATH if Config.CACHE_ENABLED else None,
+    cache_max_bytes=Config.PARSE_CACHE_MAX_MB * 1024 * 1024
+)
 internal_doc_agent = InternalDocAgent()
-library_doc_agent = LibraryDocAgent()
+# Documented files by path and content hash, reused when a later upload contains them unchanged
+file_records = FileRecordCache(
+    ParseCache(Config.FILE_RECORD_CACHE_PATH, Config.FILE_RECORD_CACHE_MAX_MB * 1024 * 1024),
+    namespace="internal_doc",
+    version=Config.NEMOTRON_MODEL_NAME
+) if Config.CACHE_ENABLED else None
+analysis_executor = AnalysisExecutor(
+    max_concurrent=Config.MAX_CONCURRENT_ANALYSES,
+    max_queued=Config.ANALYSIS_QUEUE_SIZE,
+    stage_workers=Config.ANALYSIS_STAGE_WORKERS
+)
+library_doc_agent = LibraryDocAgent(
+    RegistryClient(
+        max_concurrency=Config.REGISTRY_MAX_CONCURRENCY,
+        ttl=Config.REGISTRY_CACHE_TTL,
+        negative_ttl=Config.REGISTRY_NEGATIVE_TTL
+    ),
+    package_index=load_package_index(Config.PACKAGE_INDEX_PATH),
+    offline=Config.LIBRARY_LOOKUP_OFFLINE
+)
 context_manager_agent = ContextManagerAgent()
+file_classifier = FileClassifier(
+    sample_bytes=Config.CLASSIFIER_SAMPLE_BYTES,
+    max_avg_line_length=Config.CLASSIFIER_MAX_AVG_LINE_LENGTH,
+    max_line_length=Config.CLASSIFIER_MAX_LINE_LENGTH,
+    max_entropy=Config.CLASSIFIER_MAX_ENTROPY
+) if Config.FILE_CLASSIFICATION_ENABLED else None
 
-# In-memory storage for uploads (in production, use a database)
-uploads = {}
+# Uploads and results live in the analysis store so every worker sees them
+analysis_store = create_analysis_store(Config.ANALYSIS_STORE_BACKEND, Config.ANALYSIS_STORE_PATH)
+# Which worker holds each queued or running analysis, so one orphaned by a restart can be resubmitted
+analysis_lease = AnalysisLease(analysis_store, analysis_executor, Config.ANALYSIS_LEASE_SECONDS)
+
+# Writes uploads to disk in chunks; large archives can use resumable sessions
+upload_receiver = UploadReceiver(
+    upload_dir=Config.UPLOAD_DIR,
+    max_bytes=Config.MAX_UPLOAD_MB * 1024 * 1024,
+    chunk_size=Config.UPLOAD_CHUNK_SIZE,
+    session_ttl=Config.UPLOAD_SESSION_TTL
+)
+
+# Pushes progress to /events and /ws subscribers instead of having them poll /status
+progress_broker = ProgressBroker(
+    history_size=Config.PROGRESS_HISTORY_SIZE,
+    queue_size=Config.PROGRESS_QUEUE_SIZE,
+    poll_interval=Config.PROGRESS_POLL_INTERVAL,
+    retain_seconds=Config.PROGRESS_RETAIN_SECONDS
+)
+
+def current_status(upload_id: str) -> Optional[Dict[str, Any]]:
+    """Status carried by progress events: the upload's status plus the agent view of /status."""
+    upload_info = analysis_store.get_upload(upload_id)
+    if upload_info is None:
+        return None
+    agent_status = upload_info.get("agent_status", {})
+    return {
+        "status": upload_info.get("status"),
+        "internal_doc_agent": agent_status.get('internal_doc_agent', 'idle'),
+        "library_doc_agent": agent_status.get('library_doc_agent', 'idle'),
+        "context_manager_agent": agent_status.get('context_manager_agent', 'idle'),
+        "overall_progress": upload_info.get("progress", 0.0),
+        "error": upload_info.get("error")
+    }
+
+def update_progress(upload_id: str, **fields: Any):
+    """Store progress fields and push the resulting status to subscribers."""
+    analysis_store.update_upload(upload_id, **fields)
+    progress_broker.publish_status(upload_id, current_status(upload_id))
 
 @app.get("/")
 async def root():
@@ -63,53 +149,161 @@ async def upload_file(file: UploadFile = File(...)):
     if not file.filename.endswith('.zip'):
         raise HTTPException(status_code=400, detail="Only .zip files are supported")
     
-    # Create unique upload ID
-    upload_id = str(uuid.uuid4())
-    
     # Create temporary directory for extraction
     temp_dir = tempfile.mkdtemp()
     
     try:
-        # Save uploaded file
-        file_path = os.path.join(temp_dir, file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Extract and count files
-        code_files = file_parser.extract_zip(file_path, temp_dir)
-        
-        # Store upload information
-        uploads[upload_id] = {
-            "temp_dir": temp_dir,
-            "file_count": len(code_files),
-            "code_files": code_files,
-            "upload_time": time.time(),
-            "status": "uploaded"
-        }
-        
-        return UploadResponse(
-            message="File uploaded successfully",
-            upload_id=upload_id,
-            file_count=len(code_files)
-        )
-        
+        # Save uploaded file in chunks, hashing on the way
+        file_path = os.path.join(temp_dir, os.path.basename(file.filename))
+        received = await upload_receiver.receive(file, file_path)
+        return await register_upload(temp_dir, received)
+    except UploadRejected as e:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise upload_rejected(e)
     except Exception as e:
         # Cleanup on error
         if os.path.exists(temp_dir):
             shutil.rmtree(temp_dir)
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+async def register_upload(temp_dir: str, received: Dict[str, Any]) -> UploadResponse:
+    """List the code files of a received archive and record it as a new upload."""
+    
+    # An identical archive answers with the earlier upload and its analysis
+    duplicate = find_duplicate_upload(received["sha256"]) if Config.DEDUP_UPLOADS else None
+    if duplicate is not None:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        return UploadResponse(
+            message="Identical archive already uploaded",
+            upload_id=duplicate,
+            file_count=analysis_store.get_upload(duplicate)["file_count"],
+            sha256=received["sha256"],
+            deduplicated=True
+        )
+    
+    # Create unique upload ID
+    upload_id = str(uuid.uuid4())
+    file_path = received["path"]
+    
+    # Extract and count files off the event loop
+    if Config.STREAM_ZIP_INGESTION:
+        # Only the central directory is read here; members are parsed from the archive
+        code_files = await analysis_executor.run_stage(file_parser.list_zip_code_files, file_path)
+        zip_path = file_path
+    else:
+        code_files = await analysis_executor.run_stage(file_parser.extract_zip, file_path, temp_dir)
+        zip_path = None
+    
+    # Store upload information
+    analysis_store.create_upload(upload_id, {
+        "temp_dir": temp_dir,
+        "zip_path": zip_path,
+        "file_count": len(code_files),
+        "size": received["size"],
+        "sha256": received["sha256"],
+        "upload_time": time.time(),
+        "status": "uploaded"
+    })
+    # Kept apart from the metadata, which every progress update rewrites
+    analysis_store.put_code_files(upload_id, code_files)
+    
+    return UploadResponse(
+        message="File uploaded successfully",
+        upload_id=upload_id,
+        file_count=len(code_files),
+        sha256=received["sha256"]
+    )
+
+def find_duplicate_upload(sha256: str) -> Optional[str]:
+    """The newest earlier upload of the same archive that has not failed."""
+    for upload_id in analysis_store.find_uploads(sha256):
+        upload_info = analysis_store.get_upload(upload_id)
+        if upload_info is not None and upload_info.get("status") != "failed":
+            return upload_id
+    return None
+
+def upload_rejected(e: UploadRejected) -> HTTPException:
+    """HTTPException for a refused upload; 409s carry the offset to resume from in Upload-Offset."""
+    headers = {"Upload-Offset": str(e.details["received"])} if "received" in e.details else None
+    return HTTPException(status_code=e.status_code, detail=str(e), headers=headers)
+
+@app.post("/upload-sessions")
+async def create_upload_session(filename: str, total_size: Optional[int] = None):
+    """Start a resumable upload; send the archive with PUT /upload-sessions/{session_id}."""
+    if not filename.endswith('.zip'):
+        raise HTTPException(status_code=400, detail="Only .zip files are supported")
+    try:
+        return upload_receiver.create_session(filename, total_size)
+    except UploadRejected as e:
+        raise upload_rejected(e)
+
+@app.get("/upload-sessions/{session_id}")
+async def get_upload_session(session_id: str):
+    """Bytes received so far, i.e. the offset to resume from."""
+    try:
+        return upload_receiver.get_session(session_id)
+    except UploadRejected as e:
+        raise upload_rejected(e)
+
+@app.put("/upload-sessions/{session_id}")
+async def append_upload_chunk(session_id: str, request: Request, offset: int = 0):
+    """Append the raw request body to a resumable upload at offset."""
+    try:
+        return await upload_receiver.append(session_id, offset, request.stream())
+    except UploadRejected as e:
+        raise upload_rejected(e)
+
+@app.post("/upload-sessions/{session_id}/complete", response_model=UploadResponse)
+async def complete_upload_session(session_id: str):
+    """Finish a resumable upload and register it for analysis."""
+    temp_dir = tempfile.mkdtemp()
+    try:
+        session = upload_receiver.get_session(session_id)
+        file_path = os.path.join(temp_dir, os.path.basename(session["filename"]))
+        received = await upload_receiver.complete(session_id, file_path)
+        return await register_upload(temp_dir, received)
+    except UploadRejected as e:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise upload_rejected(e)
+    except Exception as e:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+@app.delete("/upload-sessions/{session_id}")
+async def abort_upload_session(session_id: str):
+    """Discard a resumable upload."""
+    try:
+        upload_receiver.abort(session_id)
+    except UploadRejected as e:
+        raise upload_rejected(e)
+    return {"message": "Upload aborted"}
+
 @app.post("/analyze/{upload_id}", response_model=AnalysisResponse)
-async def analyze_codebase(upload_id: str, background_tasks: BackgroundTasks):
+async def analyze_codebase(upload_id: str):
     """Start analysis of uploaded codebase."""
     
-    if upload_id not in uploads:
+    upload_info = analysis_store.get_upload(upload_id)
+    if upload_info is None:
         raise HTTPException(status_code=404, detail="Upload not found")
     
-    upload_info = uploads[upload_id]
+    # A deduplicated upload can point at an analysis that is already done or under way;
+    # one left queued or processing by a worker that is gone is analyzed again
+    if upload_info.get("status") == "completed":
+        return AnalysisResponse(status="completed", progress=1.0, result=None)
+    if upload_info.get("status") in ("queued", "processing") and analysis_lease.is_held(upload_id, upload_info):
+        return AnalysisResponse(status="processing", progress=upload_info.get("progress", 0.0), result=None)
     
-    # Start background analysis
-    background_tasks.add_task(perform_analysis, upload_id)
+    # Queue analysis; reject with 429 instead of piling up work when full
+    try:
+        analysis_executor.submit(upload_id, perform_analysis, upload_id)
+    except AnalysisQueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    analysis_lease.acquire(upload_id)
+    update_progress(upload_id, status="queued")
     
     return AnalysisResponse(
         status="started",
@@ -118,19 +312,27 @@ async def analyze_codebase(upload_id: str, background_tasks: BackgroundTasks):
     )
 
 @app.get("/analyze/{upload_id}", response_model=AnalysisResponse)
-async def get_analysis_result(upload_id: str):
-    """Get analysis results for an upload."""
+async def get_analysis_result(upload_id: str, fields: Optional[str] = None, include_files: bool = True):
+    """Get analysis results for an upload.
     
-    if upload_id not in uploads:
-        raise HTTPException(status_code=404, detail="Upload not found")
+    fields= projects each file (e.g. filename,summary,functions.name);
+    include_files=false returns only project-level fields and file_count.
+    While processing, result holds running totals of the files done so far.
+    """
     
-    upload_info = uploads[upload_id]
+    upload_info = analysis_store.get_upload(upload_id)
+    if upload_info is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
     
     if upload_info.get("status") == "completed":
+        try:
+            result = get_project_result(analysis_store, upload_id, fields, include_files)
+        except InvalidQuery as e:
+            raise HTTPException(status_code=400, detail=str(e))
         return AnalysisResponse(
             status="completed",
             progress=1.0,
-            result=upload_info.get("result")
+            result=result
         )
     elif upload_info.get("status") == "failed":
         return AnalysisResponse(
@@ -139,20 +341,49 @@ async def get_analysis_result(upload_id: str):
             error=upload_info.get("error")
         )
     else:
+        # Totals over the files documented so far; finished files are in /analyze/{upload_id}/files
         return AnalysisResponse(
             status="processing",
             progress=upload_info.get("progress", 0.0),
-            result=None
+            result=upload_info.get("partial_result")
         )
 
+@app.get("/analyze/{upload_id}/files")
+async def get_analysis_files(upload_id: str, cursor: Optional[str] = None,
+                             limit: Optional[int] = None, fields: Optional[str] = None):
+    """Page through per-file results, available as soon as each stage stores them."""
+    
+    if not analysis_store.has_upload(upload_id):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    try:
+        limit = clamp_limit(limit, Config.RESULT_PAGE_SIZE, Config.RESULT_MAX_PAGE_SIZE)
+        return page_files(analysis_store, upload_id, cursor, limit, fields)
+    except InvalidQuery as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/analyze/{upload_id}/files/{path:path}")
+async def get_analysis_file(upload_id: str, path: str, fields: Optional[str] = None):
+    """Get one file's analysis by its path inside the upload."""
+    
+    try:
+        file_analysis = get_file_result(analysis_store, upload_id, path, fields)
+    except InvalidQuery as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if file_analysis is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    return file_analysis
+
 @app.get("/status/{upload_id}", response_model=AgentStatus)
 async def get_agent_status(upload_id: str):
     """Get current status of all agents for an upload."""
     
-    if upload_id not in uploads:
+    upload_info = analysis_store.get_upload(upload_id)
+    if upload_info is None:
         raise HTTPException(status_code=404, detail="Upload not found")
     
-    upload_info = uploads[upload_id]
     agent_status = upload_info.get("agent_status", {
         'internal_doc_agent': 'idle',
         'library_doc_agent': 'idle',
@@ -166,92 +397,192 @@ async def get_agent_status(upload_id: str):
         overall_progress=upload_info.get("progress", 0.0)
     )
 
+@app.get("/events/{upload_id}")
+async def stream_progress(upload_id: str, request: Request, fields: Optional[str] = None):
+    """Server-sent progress events: status changes, each analyzed file, then completed or failed.
+    
+    Reconnecting clients resume after Last-Event-ID; fields= projects the
+    file results carried by file events.
+    """
+    
+    if not analysis_store.has_upload(upload_id):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    try:
+        tree = parse_fields(fields)
+    except InvalidQuery as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    events = progress_broker.subscribe(
+        upload_id,
+        parse_last_event_id(request.headers.get("last-event-id")),
+        read_status=lambda: current_status(upload_id),
+        heartbeat=Config.PROGRESS_HEARTBEAT_SECONDS
+    )
+    return StreamingResponse(
+        (format_sse(project_event(event, tree)) async for event in events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws/{upload_id}")
+async def websocket_progress(websocket: WebSocket, upload_id: str, fields: Optional[str] = None,
+                             last_event_id: Optional[str] = None):
+    """The /events stream as one JSON message per event."""
+    
+    await websocket.accept()
+    if not analysis_store.has_upload(upload_id):
+        await websocket.close(code=4404)
+        return
+    try:
+        tree = parse_fields(fields)
+    except InvalidQuery:
+        await websocket.close(code=4400)
+        return
+    
+    try:
+        async for event in progress_broker.subscribe(
+            upload_id,
+            parse_last_event_id(last_event_id),
+            read_status=lambda: current_status(upload_id),
+            heartbeat=Config.PROGRESS_HEARTBEAT_SECONDS
+        ):
+            await websocket.send_json(event_message(project_event(event, tree)))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
 async def perform_analysis(upload_id: str):
     """Perform the complete analysis pipeline."""
     
-    upload_info = uploads[upload_id]
-    upload_info["status"] = "processing"
-    upload_info["progress"] = 0.0
+    upload_info = analysis_store.get_upload(upload_id)
+    update_progress(upload_id, status="processing", progress=0.0)
     
     try:
         # Update agent status
         context_manager_agent.update_agent_status('context_manager_agent', 'active')
-        upload_info["agent_status"] = context_manager_agent.agent_status
-        
-        # Stage 1: Parse all files
-        upload_info["progress"] = 0.1
-        parsed_files = []
-        
-        for file_path in upload_info["code_files"]:
-            parsed_data = file_parser.parse_file(file_path)
-            parsed_files.append({
-                'file_path': file_path,
-                'parsed_data': parsed_data
-            })
+        update_progress(upload_id, agent_status=context_manager_agent.agent_status)
         
-        upload_info["progress"] = 0.3
+        # Stage 0: Drop vendored/ignored files; minified and generated ones get metadata only
+        # Uploads stored before code files had their own table keep them in the metadata
+        code_files = analysis_store.get_code_files(upload_id) or upload_info.get("code_files", [])
+        metadata_only = []
+        if file_classifier:
+            report = ClassificationReport()
+            if upload_info.get("zip_path"):
+                code_files, metadata_only = await analysis_executor.run_stage(
+                    file_classifier.filter_zip, upload_info["zip_path"], code_files, report
+                )
+            else:
+                code_files, metadata_only = await analysis_executor.run_stage(
+                    file_classifier.filter_paths, upload_info["temp_dir"], code_files, report
+                )
+            analysis_store.update_upload(upload_id, skip_report=report.to_dict())
         
-        # Stage 2: Internal documentation analysis
+        # Stages 1-2: Parse and document as one stream. Parsing runs in worker
+        # processes ahead of documentation, function docs are still batched across
+        # files (BATCH_SIZE prompts per LLM call), and every file is stored and
+        # pushed to subscribers as soon as it is documented.
         context_manager_agent.update_agent_status('internal_doc_agent', 'active')
-        upload_info["agent_status"] = context_manager_agent.agent_status
+        update_progress(upload_id, progress=0.1, agent_status=context_manager_agent.agent_status)
         
+        graph = StageGraph(
+            ('parse', lambda file_paths: iter_parsed_files(upload_info, list(file_paths))),
+            ('document', internal_doc_agent.iter_analyze_files)
+        )
+        parsed_files = []
         analyzed_files = []
-        for parsed_file in parsed_files:
-            file_analysis = internal_doc_agent.analyze_file(
-                parsed_file['file_path'], 
-                parsed_file['parsed_data']
-            )
-            analyzed_files.append(file_analysis)
-            
+        aggregate = ProjectAggregate()
+        throttle = ProgressThrottle(Config.PROGRESS_STORE_INTERVAL)
+        
+        def finish_file(parsed_file: Dict[str, Any], file_analysis: Dict[str, Any]):
             # Track context
             context_manager_agent.track_analysis_context(
                 parsed_file['file_path'], 
                 file_analysis
             )
+            # filename is only the basename; rows are keyed by the path inside the upload
+            file_analysis['path'] = upload_relative_path(upload_info, parsed_file['file_path'])
+            analysis_store.put_files(upload_id, [file_analysis], key='path')
+            parsed_files.append(parsed_file)
+            analyzed_files.append(file_analysis)
+            aggregate.add(file_analysis)
+            progress_broker.publish_file(upload_id, file_analysis, len(analyzed_files), len(code_files), key='path')
+            if throttle.ready():
+                update_progress(upload_id, progress=0.1 + 0.5 * len(analyzed_files) / len(code_files),
+                                partial_result=aggregate.to_dict())
+        
+        # Files already documented in an earlier upload skip parsing and the LLM
+        record_keys = {}
+        novel_files = code_files
+        if file_records:
+            reused, novel_files, record_keys = await analysis_executor.run_stage(
+                lookup_file_records, upload_info, code_files
+            )
+            analysis_store.update_upload(upload_id, files_reused=len(reused))
+            for file_path, record in reused:
+                finish_file({'file_path': file_path, 'parsed_data': record['parsed_data']}, record['file_analysis'])
         
-        upload_info["progress"] = 0.6
+        async for parsed_file, file_analysis in analysis_executor.stream_stage(graph.run, novel_files):
+            if file_records:
+                # Stored before libraries and cross-references, which depend on the rest of the upload
+                file_records.put(record_keys[parsed_file['file_path']], {
+                    'file_analysis': file_analysis,
+                    'parsed_data': {
+                        'imports': parsed_file['parsed_data'].get('imports', []),
+                        'calls': parsed_file['parsed_data'].get('calls', [])
+                    }
+                })
+            finish_file(parsed_file, file_analysis)
+        
+        update_progress(upload_id, progress=0.6, partial_result=aggregate.to_dict())
         
         # Stage 3: Library documentation analysis
         context_manager_agent.update_agent_status('library_doc_agent', 'active')
-        upload_info["agent_status"] = context_manager_agent.agent_status
+        update_progress(upload_id, agent_status=context_manager_agent.agent_status)
         
-        libraries = library_doc_agent.analyze_libraries(analyzed_files)
+        # Imports live in the parsed data; FileAnalysis rows do not carry them
+        libraries = await library_doc_agent.analyze_libraries_async([
+            {'imports': parsed_file['parsed_data'].get('imports', [])} for parsed_file in parsed_files
+        ])
+        libraries_by_name = {lib['name'].lower(): lib for lib in libraries}
         
         # Add library information to files
-        for file_analysis in analyzed_files:
-            file_imports = parsed_files[0]['parsed_data'].get('imports', [])
-            file_libraries = []
-            
-            for import_name in file_imports:
-                clean_name = library_doc_agent._clean_import_name(import_name)
-                if clean_name:
-                    for lib in libraries:
-                        if lib['name'].lower() == clean_name.lower():
-                            file_libraries.append(lib)
-                            break
-            
-            file_analysis['external_libraries'] = file_libraries
+        for parsed_file, file_analysis in zip(parsed_files, analyzed_files):
+            aggregate.remove(file_analysis)
+            file_analysis['external_libraries'] = library_doc_agent.libraries_for_imports(
+                parsed_file['parsed_data'].get('imports', []), libraries_by_name
+            )
+            aggregate.add(file_analysis)
+        analysis_store.put_libraries(upload_id, libraries)
         
-        upload_info["progress"] = 0.8
+        update_progress(upload_id, progress=0.8)
         
         # Stage 4: Cross-reference analysis
         context_manager_agent.update_agent_status('context_manager_agent', 'active')
-        upload_info["agent_status"] = context_manager_agent.agent_status
+        update_progress(upload_id, agent_status=context_manager_agent.agent_status)
         
-        cross_refs = context_manager_agent.find_cross_references(analyzed_files)
+        # Usage map and cross-references are built once and indexed by file and function name,
+        # from the call sites the parser recorded for each file
+        reference_files = context_manager_agent.reference_files(parsed_files, analyzed_files)
+        reference_index = await analysis_executor.run_stage(
+            context_manager_agent.build_reference_index, reference_files
+        )
         
         # Add cross-references to files
         for file_analysis in analyzed_files:
-            file_cross_refs = []
-            for func in file_analysis.get('functions', []):
-                func_name = func['name']
-                for cross_ref in cross_refs:
-                    if cross_ref['function'] == func_name:
-                        file_cross_refs.append(cross_ref)
-            
-            file_analysis['cross_references'] = file_cross_refs
+            file_analysis['cross_references'] = reference_index.for_functions(
+                file_analysis['path'], file_analysis.get('functions', [])
+            )
         
-        upload_info["progress"] = 0.9
+        update_progress(upload_id, progress=0.9)
+        
+        # Minified and generated files are listed without parsing or LLM calls
+        for entry in metadata_only:
+            file_analysis = metadata_only_analysis(upload_info, entry)
+            analyzed_files.append(file_analysis)
+            aggregate.add(file_analysis)
+        analysis_store.put_files(upload_id, analyzed_files, key='path')
         
         # Stage 5: Generate final project summary
         project_summary = context_manager_agent.generate_project_summary(
@@ -267,52 +598,141 @@ async def perform_analysis(upload_id: str):
             analysis_time=time.time() - upload_info["upload_time"]
         )
         
-        upload_info["result"] = result
-        upload_info["status"] = "completed"
-        upload_info["progress"] = 1.0
+        # File rows are already stored; the result row holds the project-level fields
+        analysis_store.set_result(upload_id, {
+            **result.dict(exclude={'files'}),
+            "statistics": aggregate.to_dict()
+        })
         
-        # Update final agent status
+        # Update final agent status together with the status, so the completed event carries both
         context_manager_agent.update_agent_status('internal_doc_agent', 'completed')
         context_manager_agent.update_agent_status('library_doc_agent', 'completed')
         context_manager_agent.update_agent_status('context_manager_agent', 'completed')
-        upload_info["agent_status"] = context_manager_agent.agent_status
+        update_progress(upload_id, status="completed", progress=1.0,
+                        agent_status=context_manager_agent.agent_status)
         
     except Exception as e:
-        upload_info["status"] = "failed"
-        upload_info["error"] = str(e)
-        upload_info["progress"] = 0.0
-        
         # Update agent status on error
         context_manager_agent.update_agent_status('internal_doc_agent', 'error')
         context_manager_agent.update_agent_status('library_doc_agent', 'error')
         context_manager_agent.update_agent_status('context_manager_agent', 'error')
-        upload_info["agent_status"] = context_manager_agent.agent_status
+        update_progress(upload_id, status="failed", error=str(e), progress=0.0,
+                        agent_status=context_manager_agent.agent_status)
+
+def iter_parsed_files(upload_info: Dict[str, Any], code_files: List[str]) -> Iterator[Dict[str, Any]]:
+    """Parse stage of the analysis stream, from the archive or the extracted files."""
+    if upload_info.get("zip_path"):
+        parsed = parse_engine.iter_parse_zip(upload_info["zip_path"], code_files)
+    else:
+        parsed = parse_engine.iter_parse(code_files)
+    for file_path, parsed_data in parsed:
+        yield {'file_path': file_path, 'parsed_data': parsed_data}
+
+def lookup_file_records(upload_info: Dict[str, Any], code_files: List[str]
+                        ) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[str], Dict[str, str]]:
+    """Split code files into (path, record) pairs reused from earlier uploads and paths to analyze.
+    
+    Also returns the record key of every file to analyze, so its record can be stored once documented.
+    """
+    if upload_info.get("zip_path"):
+        contents = file_parser.iter_zip_files(upload_info["zip_path"], code_files)
+    else:
+        contents = ((file_path, read_bytes(file_path)) for file_path in code_files)
+    reused, novel, keys = [], [], {}
+    for file_path, content in contents:
+        key = file_records.key(upload_relative_path(upload_info, file_path), content)
+        record = file_records.get(key)
+        if record is not None:
+            reused.append((file_path, record))
+        else:
+            novel.append(file_path)
+            keys[file_path] = key
+    return reused, novel, keys
+
+def read_bytes(file_path: str) -> bytes:
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+def upload_relative_path(upload_info: Dict[str, Any], file_path: str) -> str:
+    """Path of a parsed file inside the uploaded archive."""
+    if upload_info.get("zip_path"):
+        return file_path
+    return os.path.relpath(file_path, upload_info["temp_dir"]).replace(os.sep, '/')
+
+def metadata_only_analysis(upload_info: Dict[str, Any], entry: Dict[str, Any]) -> Dict[str, Any]:
+    """FileAnalysis for a file the classifier routed to the metadata-only path."""
+    filename = entry['path'].split('/')[-1]
+    return {
+        'filename': filename,
+        'path': upload_relative_path(upload_info, entry['path']),
+        'summary': f"{entry['category'].replace('_', ' ').capitalize()} file ({entry['reason']}), "
+                   f"{entry['size']} bytes; not analyzed",
+        'functions': [],
+        'external_libraries': [],
+        'cross_references': [],
+        'file_type': internal_doc_agent._get_file_type(filename),
+        'line_count': 0
+    }
+
+@app.get("/skip-report/{upload_id}")
+async def get_skip_report(upload_id: str):
+    """Files the classifier skipped or reduced to metadata for an upload, and why."""
+    
+    upload_info = analysis_store.get_upload(upload_id)
+    if upload_info is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    skip_report = upload_info.get("skip_report")
+    if skip_report is None:
+        raise HTTPException(status_code=404, detail="Upload has not been classified yet")
+    
+    return skip_report
 
 @app.delete("/uploads/{upload_id}")
 async def delete_upload(upload_id: str):
     """Delete an upload and clean up temporary files."""
     
-    if upload_id not in uploads:
+    upload_info = analysis_store.get_upload(upload_id)
+    if upload_info is None:
         raise HTTPException(status_code=404, detail="Upload not found")
     
-    upload_info = uploads[upload_id]
-    
     # Clean up temporary directory
     if os.path.exists(upload_info["temp_dir"]):
         shutil.rmtree(upload_info["temp_dir"])
     
     # Remove from storage
-    del uploads[upload_id]
+    analysis_store.delete_upload(upload_id)
     
     return {"message": "Upload deleted successfully"}
 
+@app.on_event("shutdown")
+async def shutdown_workers():
+    """Stop analysis and parse workers and close the registry connection pool."""
+    analysis_lease.stop()
+    await analysis_executor.shutdown()
+    parse_engine.shutdown()
+    await library_doc_agent.registry_client.aclose()
+    analysis_store.close()
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Hit-rate metrics for the parse, file record and LLM generation caches."""
+    generation_cache = get_generation_cache()
+    return {
+        "parse_cache": parse_engine.cache_stats(),
+        "file_records": file_records.stats() if file_records else None,
+        "generation_cache": generation_cache.get_stats() if generation_cache else None
+    }
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {
         "status": "healthy",
         "timestamp": time.time(),
-        "active_uploads": len(uploads)
+        "active_uploads": analysis_store.count_uploads(),
+        "analysis_queue": analysis_executor.get_stats(),
+        "parse_cache": parse_engine.cache_stats()
     }
 
 if __name__ == "__main__":
@@ -1,12 +1,11 @@
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 import zipfile
 import os
 import json
-import tempfile
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional
 import asyncio
 
 # Import our real agents
@@ -14,6 +13,18 @@ from app.agents.real_internal_doc_agent import RealInternalDocAgent
 from app.agents.real_library_doc_agent import RealLibraryDocAgent
 from app.agents.real_context_manager_agent import RealContextManagerAgent
 from app.core.real_file_parser import RealFileParser
+from app.core.parse_cache import ParseCache
+from app.core.file_record_cache import FileRecordCache
+from app.core.package_index import load_package_index
+from app.core.generation_cache import get_generation_cache
+from app.core.analysis_executor import AnalysisExecutor, AnalysisLease, AnalysisQueueFull
+from app.core.file_classifier import FileClassifier, ClassificationReport
+from app.core.analysis_store import create_analysis_store
+from app.core.result_query import InvalidQuery, clamp_limit, get_file_result, get_project_result, page_files, parse_fields
+from app.core.progress_events import ProgressBroker, event_message, format_sse, parse_last_event_id, project_event
+from app.core.stage_graph import ProgressThrottle, ProjectAggregate
+from app.core.upload_receiver import UploadLimitMiddleware, UploadReceiver, UploadRejected
+from app.config import Config
 
 app = FastAPI(title="DocuSynth AI - Complete Multi-Agent System")
 
@@ -26,14 +37,76 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Refuse oversized uploads before reading their body
+app.add_middleware(UploadLimitMiddleware, max_bytes=Config.MAX_UPLOAD_MB * 1024 * 1024)
+
 # Initialize our real agents
 internal_doc_agent = RealInternalDocAgent()
-library_doc_agent = RealLibraryDocAgent()
+library_doc_agent = RealLibraryDocAgent(
+    package_index=load_package_index(Config.PACKAGE_INDEX_PATH),
+    offline=Config.LIBRARY_LOOKUP_OFFLINE,
+    lightweight_metadata=Config.NPM_LIGHTWEIGHT_METADATA,
+    metadata_ttl=Config.REGISTRY_CACHE_TTL,
+    negative_ttl=Config.REGISTRY_NEGATIVE_TTL
+)
 context_manager_agent = RealContextManagerAgent()
-file_parser = RealFileParser()
+parse_cache = ParseCache(Config.PARSE_CACHE_PATH, Config.PARSE_CACHE_MAX_MB * 1024 * 1024) if Config.CACHE_ENABLED else None
+file_parser = RealFileParser(cache=parse_cache)
+# Documented files by path and content hash, reused when a later upload contains them unchanged
+file_records = FileRecordCache(
+    ParseCache(Config.FILE_RECORD_CACHE_PATH, Config.FILE_RECORD_CACHE_MAX_MB * 1024 * 1024),
+    namespace="real_internal_doc",
+    version=Config.NEMOTRON_MODEL_NAME
+) if Config.CACHE_ENABLED else None
+file_classifier = FileClassifier(
+    sample_bytes=Config.CLASSIFIER_SAMPLE_BYTES,
+    max_avg_line_length=Config.CLASSIFIER_MAX_AVG_LINE_LENGTH,
+    max_line_length=Config.CLASSIFIER_MAX_LINE_LENGTH,
+    max_entropy=Config.CLASSIFIER_MAX_ENTROPY
+) if Config.FILE_CLASSIFICATION_ENABLED else None
+
+analysis_executor = AnalysisExecutor(
+    max_concurrent=Config.MAX_CONCURRENT_ANALYSES,
+    max_queued=Config.ANALYSIS_QUEUE_SIZE,
+    stage_workers=Config.ANALYSIS_STAGE_WORKERS
+)
+
+# Uploads and results live in the analysis store so every worker sees them
+analysis_store = create_analysis_store(Config.ANALYSIS_STORE_BACKEND, Config.ANALYSIS_STORE_PATH)
+# Which worker holds each queued or running analysis, so one orphaned by a restart can be resubmitted
+analysis_lease = AnalysisLease(analysis_store, analysis_executor, Config.ANALYSIS_LEASE_SECONDS)
+
+# Pushes progress to /events and /ws subscribers instead of having them poll /status
+progress_broker = ProgressBroker(
+    history_size=Config.PROGRESS_HISTORY_SIZE,
+    queue_size=Config.PROGRESS_QUEUE_SIZE,
+    poll_interval=Config.PROGRESS_POLL_INTERVAL,
+    retain_seconds=Config.PROGRESS_RETAIN_SECONDS
+)
+
+# Writes uploads to disk in chunks; large archives can use resumable sessions
+upload_receiver = UploadReceiver(
+    upload_dir=Config.UPLOAD_DIR,
+    max_bytes=Config.MAX_UPLOAD_MB * 1024 * 1024,
+    chunk_size=Config.UPLOAD_CHUNK_SIZE,
+    session_ttl=Config.UPLOAD_SESSION_TTL
+)
 
-# In-memory storage for uploads
-uploads = {}
+def update_status(upload_id: str, status: str, progress: int = 0, message: str = ""):
+    """Record status in the upload's context and in the store, and push it to subscribers"""
+    progress_status = context_manager_agent.update_status(upload_id, status, progress, message)
+    analysis_store.update_upload(upload_id, status=status, progress_status=progress_status)
+    progress_broker.publish_status(upload_id, progress_status)
+
+def mark_queued(upload_id: str):
+    """Lease a just-submitted analysis to this worker and mark it queued, so repeat requests do not queue it again"""
+    analysis_lease.acquire(upload_id)
+    update_status(upload_id, "queued", 0, "Waiting for a free analysis slot")
+
+def current_status(upload_id: str) -> Optional[Dict[str, Any]]:
+    """The stored status, for subscribers of analyses running on another worker"""
+    upload = analysis_store.get_upload(upload_id)
+    return upload.get("progress_status", {}) if upload is not None else None
 
 @app.get("/")
 async def root():
@@ -48,50 +121,160 @@ async def upload_file(file: UploadFile = File(...)):
             content={"error": "Please upload a zip file"}
         )
     
-    # Generate upload ID
-    upload_id = f"upload_{len(uploads) + 1}"
-    
-    # Save uploaded file temporarily
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
+    # Copied to disk in chunks, hashing on the way; never held in memory whole
     try:
-        content = await file.read()
-        temp_file.write(content)
-        temp_file.close()
-        
-        # Store file info
-        uploads[upload_id] = {
-            "filename": file.filename,
-            "temp_path": temp_file.name,
-            "status": "uploaded",
-            "analysis": None
-        }
-        
-        # Initialize context manager
-        context_manager_agent.update_status(upload_id, "uploaded", 0, "File uploaded successfully")
-        
-        return {
-            "upload_id": upload_id,
-            "message": "File uploaded successfully",
-            "status": "ready_for_analysis"
-        }
-        
+        received = await upload_receiver.receive(file)
+    except UploadRejected as e:
+        return upload_rejected_response(e)
     except Exception as e:
         return JSONResponse(
             status_code=500,
             content={"error": f"Error processing file: {str(e)}"}
         )
+    
+    return register_upload(file.filename, received)
+
+def register_upload(filename: str, received: Dict[str, Any]) -> Dict[str, Any]:
+    """Record a received archive as a new upload ready for analysis"""
+    # An identical archive answers with the earlier upload and its analysis
+    duplicate = find_duplicate_upload(received["sha256"]) if Config.DEDUP_UPLOADS else None
+    if duplicate is not None:
+        os.remove(received["path"])
+        status = current_status(duplicate).get("status")
+        return {
+            "upload_id": duplicate,
+            "message": "Identical archive already uploaded",
+            "status": "completed" if status == "completed" else "ready_for_analysis" if status == "uploaded" else "analyzing",
+            "sha256": received["sha256"],
+            "deduplicated": True
+        }
+    
+    # Generate upload ID
+    upload_id = f"upload_{analysis_store.next_upload_number()}"
+    
+    # Store file info
+    analysis_store.create_upload(upload_id, {
+        "filename": filename,
+        "temp_path": received["path"],
+        "size": received["size"],
+        "sha256": received["sha256"],
+        "status": "uploaded"
+    })
+    
+    # Initialize context manager
+    update_status(upload_id, "uploaded", 0, "File uploaded successfully")
+    
+    return {
+        "upload_id": upload_id,
+        "message": "File uploaded successfully",
+        "status": "ready_for_analysis",
+        "sha256": received["sha256"]
+    }
+
+def find_duplicate_upload(sha256: str) -> Optional[str]:
+    """The newest earlier upload of the same archive that has not failed"""
+    for upload_id in analysis_store.find_uploads(sha256):
+        if (current_status(upload_id) or {}).get("status") != "error":
+            return upload_id
+    return None
+
+def upload_rejected_response(e: UploadRejected) -> JSONResponse:
+    """Error response for a refused upload; 409s carry the offset to resume from"""
+    return JSONResponse(
+        status_code=e.status_code,
+        content={"error": str(e), **e.details}
+    )
+
+@app.post("/upload-sessions")
+async def create_upload_session(filename: str, total_size: Optional[int] = None):
+    """Start a resumable upload; send the archive with PUT /upload-sessions/{session_id}"""
+    if not filename.endswith('.zip'):
+        return JSONResponse(
+            status_code=400,
+            content={"error": "Please upload a zip file"}
+        )
+    try:
+        return upload_receiver.create_session(filename, total_size)
+    except UploadRejected as e:
+        return upload_rejected_response(e)
+
+@app.get("/upload-sessions/{session_id}")
+async def get_upload_session(session_id: str):
+    """Bytes received so far, i.e. the offset to resume from"""
+    try:
+        return upload_receiver.get_session(session_id)
+    except UploadRejected as e:
+        return upload_rejected_response(e)
+
+@app.put("/upload-sessions/{session_id}")
+async def append_upload_chunk(session_id: str, request: Request, offset: int = 0):
+    """Append the raw request body to a resumable upload at offset"""
+    try:
+        return await upload_receiver.append(session_id, offset, request.stream())
+    except UploadRejected as e:
+        return upload_rejected_response(e)
+
+@app.post("/upload-sessions/{session_id}/complete")
+async def complete_upload_session(session_id: str):
+    """Finish a resumable upload and register it for analysis"""
+    try:
+        received = await upload_receiver.complete(session_id)
+    except UploadRejected as e:
+        return upload_rejected_response(e)
+    return register_upload(received["filename"], received)
+
+@app.delete("/upload-sessions/{session_id}")
+async def abort_upload_session(session_id: str):
+    """Discard a resumable upload"""
+    try:
+        upload_receiver.abort(session_id)
+    except UploadRejected as e:
+        return upload_rejected_response(e)
+    return {"message": "Upload aborted"}
 
 @app.post("/analyze/{upload_id}")
-async def analyze_code(upload_id: str, background_tasks: BackgroundTasks):
+async def analyze_code(upload_id: str):
     """Start analysis of uploaded code"""
-    if upload_id not in uploads:
+    if not analysis_store.has_upload(upload_id):
         return JSONResponse(
             status_code=404,
             content={"error": "Upload not found"}
         )
     
-    # Start real analysis in background
-    background_tasks.add_task(perform_real_analysis, upload_id)
+    # A deduplicated upload can point at an analysis that is already done or under way;
+    # one left queued or running by a worker that is gone is analyzed again
+    upload = analysis_store.get_upload(upload_id)
+    status = upload.get("progress_status", {}).get("status")
+    if status == "completed":
+        return {
+            "message": "Analysis already completed",
+            "upload_id": upload_id,
+            "status": "completed"
+        }
+    in_flight = status not in ("uploaded", "error") and analysis_lease.is_held(upload_id, upload)
+    if in_flight and status == "queued":
+        return {
+            "message": "Analysis already queued",
+            "upload_id": upload_id,
+            "status": "queued"
+        }
+    if in_flight:
+        return {
+            "message": "Analysis already running",
+            "upload_id": upload_id,
+            "status": "analyzing"
+        }
+    
+    # Queue real analysis; reject with 429 when the queue is full
+    try:
+        analysis_executor.submit(upload_id, perform_real_analysis, upload_id)
+    except AnalysisQueueFull as e:
+        return JSONResponse(
+            status_code=429,
+            content={"error": str(e)},
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    mark_queued(upload_id)
     
     return {
         "message": "Analysis started",
@@ -99,117 +282,256 @@ async def analyze_code(upload_id: str, background_tasks: BackgroundTasks):
         "status": "analyzing"
     }
 
+@app.get("/events/{upload_id}")
+async def stream_progress(upload_id: str, request: Request, fields: Optional[str] = None):
+    """Server-sent progress events: status changes, each documented file, then completed or failed
+    
+    Reconnecting clients resume after Last-Event-ID; fields= projects the
+    file results carried by file events.
+    """
+    if not analysis_store.has_upload(upload_id):
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Upload not found"}
+        )
+    
+    try:
+        tree = parse_fields(fields)
+    except InvalidQuery as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
+    
+    events = progress_broker.subscribe(
+        upload_id,
+        parse_last_event_id(request.headers.get("last-event-id")),
+        read_status=lambda: current_status(upload_id),
+        heartbeat=Config.PROGRESS_HEARTBEAT_SECONDS
+    )
+    return StreamingResponse(
+        (format_sse(project_event(event, tree)) async for event in events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws/{upload_id}")
+async def websocket_progress(websocket: WebSocket, upload_id: str, fields: Optional[str] = None,
+                             last_event_id: Optional[str] = None):
+    """The /events stream as one JSON message per event"""
+    await websocket.accept()
+    if not analysis_store.has_upload(upload_id):
+        await websocket.close(code=4404)
+        return
+    try:
+        tree = parse_fields(fields)
+    except InvalidQuery:
+        await websocket.close(code=4400)
+        return
+    
+    try:
+        async for event in progress_broker.subscribe(
+            upload_id,
+            parse_last_event_id(last_event_id),
+            read_status=lambda: current_status(upload_id),
+            heartbeat=Config.PROGRESS_HEARTBEAT_SECONDS
+        ):
+            await websocket.send_json(event_message(project_event(event, tree)))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
 @app.get("/analyze/{upload_id}")
-async def get_analysis(upload_id: str):
-    """Get analysis results"""
-    if upload_id not in uploads:
+async def get_analysis(upload_id: str, fields: Optional[str] = None, include_files: bool = True):
+    """Get analysis results
+    
+    fields= projects each file (e.g. filename,summary,functions.name drops code
+    bodies); include_files=false returns only project-level fields and file_count.
+    """
+    upload = analysis_store.get_upload(upload_id)
+    if upload is None:
         return JSONResponse(
             status_code=404,
             content={"error": "Upload not found"}
         )
     
-    upload = uploads[upload_id]
+    try:
+        analysis = get_project_result(analysis_store, upload_id, fields, include_files)
+    except InvalidQuery as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
     
-    if upload["analysis"] is None:
-        status = context_manager_agent.get_status(upload_id)
+    if analysis is None:
+        status = upload.get("progress_status", {})
         return {
             "status": "analyzing",
             "message": status.get("message", "Analysis in progress..."),
-            "progress": status.get("progress", 0)
+            "progress": status.get("progress", 0),
+            # Totals over the files done so far; the files themselves are in /analyze/{upload_id}/files
+            "partial_result": upload.get("partial_result")
         }
     
-    return upload["analysis"]
+    return analysis
+
+@app.get("/analyze/{upload_id}/files")
+async def get_analysis_files(upload_id: str, cursor: Optional[str] = None,
+                             limit: Optional[int] = None, fields: Optional[str] = None):
+    """Page through per-file results; fields= selects e.g. filename,summary,functions.name"""
+    if not analysis_store.has_upload(upload_id):
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Upload not found"}
+        )
+    
+    try:
+        limit = clamp_limit(limit, Config.RESULT_PAGE_SIZE, Config.RESULT_MAX_PAGE_SIZE)
+        return page_files(analysis_store, upload_id, cursor, limit, fields)
+    except InvalidQuery as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
+
+@app.get("/analyze/{upload_id}/files/{filename:path}")
+async def get_analysis_file(upload_id: str, filename: str, fields: Optional[str] = None):
+    """Get one file's analysis"""
+    try:
+        file_analysis = get_file_result(analysis_store, upload_id, filename, fields)
+    except InvalidQuery as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
+    
+    if file_analysis is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "File not found"}
+        )
+    
+    return file_analysis
 
 @app.get("/status/{upload_id}")
 async def get_status(upload_id: str):
     """Get detailed analysis status"""
-    if upload_id not in uploads:
+    upload = analysis_store.get_upload(upload_id)
+    if upload is None:
         return JSONResponse(
             status_code=404,
             content={"error": "Upload not found"}
         )
     
-    status = context_manager_agent.get_status(upload_id)
+    # The stored copy outlives the context and is visible to every worker
+    status = upload.get("progress_status") or context_manager_agent.get_status(upload_id)
     return {
         "upload_id": upload_id,
-        "filename": uploads[upload_id]["filename"],
+        "filename": upload["filename"],
         **status
     }
 
 async def perform_real_analysis(upload_id: str):
     """Perform real analysis using all 3 AI agents"""
     try:
-        upload = uploads[upload_id]
+        upload = analysis_store.get_upload(upload_id)
         temp_path = upload["temp_path"]
+        # Released in the finally below, however the analysis ends
+        context_manager_agent.open_context(upload_id)
         
         # Step 1: Extract and parse files
-        context_manager_agent.update_status(upload_id, "extracting", 10, "Extracting files from zip")
-        extracted_files = file_parser.extract_zip(temp_path)
+        update_status(upload_id, "extracting", 10, "Extracting files from zip")
+        # Vendored, gitignored, minified and generated files never reach the agents
+        skip_report = ClassificationReport()
+        extracted_files = await analysis_executor.run_stage(
+            file_parser.extract_zip, temp_path, file_classifier, skip_report
+        )
+        skip_report = skip_report.to_dict()
+        analysis_store.update_upload(upload_id, skip_report=skip_report)
         
         if not extracted_files:
-            context_manager_agent.update_status(upload_id, "error", 0, "No supported files found")
+            update_status(upload_id, "error", 0, "No supported files found")
             return
         
         # Step 2: Parse all files
-        context_manager_agent.update_status(upload_id, "parsing", 20, "Parsing file structure")
-        parsed_files = file_parser.parse_all_files(extracted_files)
+        update_status(upload_id, "parsing", 20, "Parsing file structure")
+        parsed_files = await analysis_executor.run_stage(file_parser.parse_all_files, extracted_files)
         
-        # Step 3: Store file contents for cross-reference analysis
+        # Step 3: Store file contents in this upload's context for cross-reference analysis
         for filename, content in extracted_files.items():
-            context_manager_agent.store_file_content(filename, content)
+            context_manager_agent.store_file_content(upload_id, filename, content)
+        
+        # Step 4: LibraryDocAgent resolves the project-wide import set once
+        update_status(upload_id, "libraries", 30, "LibraryDocAgent resolving external libraries")
+        file_library_names = {
+            parsed_file["filename"]: library_doc_agent._extract_libraries(parsed_file["content"])
+            for parsed_file in parsed_files
+        }
+        unique_library_names = list(dict.fromkeys(
+            name for names in file_library_names.values() for name in names
+        ))
+        resolved_libraries = await analysis_executor.run_stage(
+            library_doc_agent.resolve_libraries, unique_library_names
+        )
+        analysis_store.put_libraries(upload_id, resolved_libraries.values())
         
-        # Step 4: InternalDocAgent analysis
-        context_manager_agent.update_status(upload_id, "analyzing", 40, "InternalDocAgent analyzing code structure")
+        # Step 5: InternalDocAgent analysis, streamed file by file
+        update_status(upload_id, "analyzing", 40, "InternalDocAgent analyzing code structure")
         analyzed_files = []
+        aggregate = ProjectAggregate()
+        throttle = ProgressThrottle(Config.PROGRESS_STORE_INTERVAL)
+        reuse_counts = {"reused": 0, "documented": 0}
         
-        for parsed_file in parsed_files:
-            filename = parsed_file["filename"]
-            content = parsed_file["content"]
-            
-            # Analyze file with InternalDocAgent
-            file_analysis = internal_doc_agent.analyze_file(filename, content)
-            
-            # Analyze libraries with LibraryDocAgent
-            libraries = library_doc_agent.analyze_libraries(content)
-            file_analysis["external_libraries"] = libraries
-            
+        async for file_analysis in analysis_executor.stream_stage(
+            document_files, parsed_files, file_library_names, resolved_libraries, reuse_counts
+        ):
             analyzed_files.append(file_analysis)
+            aggregate.add(file_analysis)
+            # Each file is stored and pushed to subscribers as soon as it is documented
+            analysis_store.put_files(upload_id, [file_analysis])
+            progress_broker.publish_file(upload_id, file_analysis, len(analyzed_files), len(parsed_files))
+            if throttle.ready():
+                analysis_store.update_upload(upload_id, partial_result=aggregate.to_dict())
+                update_status(upload_id, "analyzing", 40 + 30 * len(analyzed_files) // len(parsed_files),
+                              f"InternalDocAgent documented {len(analyzed_files)} of {len(parsed_files)} files")
         
-        # Step 5: ContextManagerAgent analysis
-        context_manager_agent.update_status(upload_id, "context", 70, "ContextManagerAgent building cross-references")
+        # Step 6: ContextManagerAgent analysis
+        update_status(upload_id, "context", 70, "ContextManagerAgent building cross-references")
         
         # Find cross-references
-        cross_references = context_manager_agent.find_cross_references()
+        cross_references = await analysis_executor.run_stage(context_manager_agent.find_cross_references, upload_id)
         
         # Generate project summary
-        project_summary = context_manager_agent.generate_project_summary(analyzed_files)
+        project_summary = context_manager_agent.generate_project_summary(analyzed_files, upload_id)
         
-        # Get library summary
-        all_libraries = []
-        for file_analysis in analyzed_files:
-            all_libraries.extend(file_analysis.get("external_libraries", []))
+        # Get library summary from the unique set, not the per-file lists
+        library_summary = library_doc_agent.get_library_summary(list(resolved_libraries.values()))
         
-        library_summary = library_doc_agent.get_library_summary(all_libraries)
-        
-        # Step 6: Compile final results
-        context_manager_agent.update_status(upload_id, "compiling", 90, "Compiling analysis results")
+        # Step 7: Compile final results
+        update_status(upload_id, "compiling", 90, "Compiling analysis results")
         
         final_analysis = {
             "project_summary": project_summary,
             "files": analyzed_files,
             "cross_references": cross_references,
             "external_libraries_summary": library_summary,
+            # Minified and generated files are listed by metadata only
+            "metadata_only_files": skip_report["metadata_only"],
             "analysis_metadata": {
-                "total_files": len(analyzed_files),
-                "total_functions": sum(len(f.get("functions", [])) for f in analyzed_files),
+                "total_files": aggregate.files,
+                "total_functions": aggregate.functions,
                 "total_libraries": len(library_summary),
+                "files_skipped": len(skip_report["skipped"]) + len(skip_report["metadata_only"]),
+                "files_reused": reuse_counts["reused"],
                 "analysis_timestamp": context_manager_agent.get_status(upload_id)["timestamp"]
             }
         }
         
-        # Store results
-        uploads[upload_id]["analysis"] = final_analysis
-        context_manager_agent.update_status(upload_id, "completed", 100, "Analysis completed successfully")
+        # File rows are already stored; the result row holds the project-level fields
+        analysis_store.set_result(upload_id, {
+            key: value for key, value in final_analysis.items() if key != "files"
+        })
+        update_status(upload_id, "completed", 100, "Analysis completed successfully")
         
         # Clean up temp file
         try:
@@ -218,8 +540,85 @@ async def perform_real_analysis(upload_id: str):
             pass
             
     except Exception as e:
-        context_manager_agent.update_status(upload_id, "error", 0, f"Analysis failed: {str(e)}")
+        update_status(upload_id, "error", 0, f"Analysis failed: {str(e)}")
         print(f"Analysis error: {e}")
+    finally:
+        # Source is only needed while analyzing; results live in the store
+        context_manager_agent.finish_context(upload_id)
+
+def document_files(parsed_files: List[Dict[str, Any]], file_library_names: Dict[str, List[str]],
+                   resolved_libraries: Dict[str, Dict[str, Any]],
+                   reuse_counts: Dict[str, int]) -> Iterator[Dict[str, Any]]:
+    """Document stage: yield each file's InternalDocAgent analysis as soon as it is done
+    
+    A file documented unchanged in an earlier upload reuses that analysis.
+    """
+    for parsed_file in parsed_files:
+        filename = parsed_file["filename"]
+        key = file_records.key(filename, parsed_file["content"]) if file_records else None
+        file_analysis = file_records.get(key) if key else None
+        if file_analysis is not None:
+            reuse_counts["reused"] += 1
+        else:
+            file_analysis = internal_doc_agent.analyze_file(filename, parsed_file["content"])
+            reuse_counts["documented"] += 1
+            if key:
+                # Stored without libraries, which are resolved for each upload
+                file_records.put(key, file_analysis)
+        
+        # Files share the resolved library entries by reference
+        file_analysis["external_libraries"] = [
+            resolved_libraries[name]
+            for name in file_library_names[filename]
+            if name in resolved_libraries
+        ]
+        yield file_analysis
+
+@app.get("/skip-report/{upload_id}")
+async def get_skip_report(upload_id: str):
+    """Files the classifier skipped or reduced to metadata, and why"""
+    upload = analysis_store.get_upload(upload_id)
+    if upload is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Upload not found"}
+        )
+    
+    skip_report = upload.get("skip_report")
+    if skip_report is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Upload has not been classified yet"}
+        )
+    
+    return skip_report
+
+@app.get("/analysis/queue")
+async def get_analysis_queue():
+    """Analysis executor queue depth and job counters"""
+    return analysis_executor.get_stats()
+
+@app.get("/analysis/contexts")
+async def get_analysis_contexts():
+    """Per-upload context lifecycle and memory accounting"""
+    return context_manager_agent.get_memory_stats()
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    """Stop analysis workers"""
+    analysis_lease.stop()
+    await analysis_executor.shutdown()
+    analysis_store.close()
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Hit-rate metrics for the parse, file record and LLM generation caches"""
+    generation_cache = get_generation_cache()
+    return {
+        "parse_cache": parse_cache.stats() if parse_cache else None,
+        "file_records": file_records.stats() if file_records else None,
+        "generation_cache": generation_cache.get_stats() if generation_cache else None
+    }
 
 # Serve static files for frontend
 app.mount("/static", StaticFiles(directory="frontend/out"), name="static")
@@ -1,13 +1,11 @@
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 import zipfile
 import os
 import json
-import tempfile
-import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import asyncio
 from datetime import datetime
 import requests
@@ -15,6 +13,16 @@ import hmac
 import hashlib
 from fastapi import Request
 
+from app.config import Config
+from app.core.analysis_executor import AnalysisExecutor, AnalysisLease, AnalysisQueueFull
+from app.core.js_extractor import JSStructure, extract_js_structure
+from app.core.incremental_analysis import ProjectSnapshot, changed_paths_from_push, verify_github_signature
+from app.core.analysis_store import create_analysis_store
+from app.core.result_query import InvalidQuery, clamp_limit, get_file_result, get_project_result, page_files, parse_fields
+from app.core.progress_events import ProgressBroker, event_message, format_sse, parse_last_event_id, project_event
+from app.core.stage_graph import ProgressThrottle, ProjectAggregate
+from app.core.upload_receiver import UploadLimitMiddleware, UploadReceiver, UploadRejected
+
 app = FastAPI(title="DocuSynth AI - Enhanced Multi-Agent System")
 
 # Add CORS middleware
@@ -26,73 +34,92 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Refuse oversized uploads before reading their body
+app.add_middleware(UploadLimitMiddleware, max_bytes=Config.MAX_UPLOAD_MB * 1024 * 1024)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="../frontend"), name="static")
 
-# In-memory storage for uploads
-uploads = {}
-analysis_status = {}
+analysis_executor = AnalysisExecutor(
+    max_concurrent=Config.MAX_CONCURRENT_ANALYSES,
+    max_queued=Config.ANALYSIS_QUEUE_SIZE,
+    stage_workers=Config.ANALYSIS_STAGE_WORKERS
+)
+
+# Uploads, status and results live in the analysis store so every worker sees them
+analysis_store = create_analysis_store(Config.ANALYSIS_STORE_BACKEND, Config.ANALYSIS_STORE_PATH)
+# Which worker holds each queued or running analysis, so one orphaned by a restart can be resubmitted
+analysis_lease = AnalysisLease(analysis_store, analysis_executor, Config.ANALYSIS_LEASE_SECONDS)
+
+# Pushes progress to /events and /ws subscribers instead of having them poll /status
+progress_broker = ProgressBroker(
+    history_size=Config.PROGRESS_HISTORY_SIZE,
+    queue_size=Config.PROGRESS_QUEUE_SIZE,
+    poll_interval=Config.PROGRESS_POLL_INTERVAL,
+    retain_seconds=Config.PROGRESS_RETAIN_SECONDS
+)
+
+# Writes uploads to disk in chunks; large archives can use resumable sessions
+upload_receiver = UploadReceiver(
+    upload_dir=Config.UPLOAD_DIR,
+    max_bytes=Config.MAX_UPLOAD_MB * 1024 * 1024,
+    chunk_size=Config.UPLOAD_CHUNK_SIZE,
+    session_ttl=Config.UPLOAD_SESSION_TTL
+)
 
 # GitHub webhook storage
 github_events = []
 monitored_repos = {}
 
+# Import graphs for incremental updates. They live only in the memory of the worker
+# process that ran the full analysis: after a restart, or for a push that reaches
+# another worker, the webhook answers "no_base_snapshot" and the repository needs a
+# new full analysis (POST /analyze/persistent/{upload_id}) before pushes apply again.
+snapshots: Dict[str, ProjectSnapshot] = {}
+# Serializes incremental updates per upload so pushes apply in arrival order
+snapshot_locks: Dict[str, asyncio.Lock] = {}
+
 class EnhancedFileParser:
     """Enhanced file parser with real extraction"""
     
+    supported_extensions = ('.js', '.jsx', '.ts', '.tsx')
+    
     def extract_zip(self, zip_file_path: str) -> Dict[str, str]:
         """Extract files from zip"""
         extracted_files = {}
         try:
             with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
                 for file_info in zip_ref.filelist:
-                    if not file_info.is_dir() and file_info.filename.endswith(('.js', '.jsx', '.ts', '.tsx')):
+                    if not file_info.is_dir() and file_info.filename.endswith(self.supported_extensions):
                         content = zip_ref.read(file_info.filename).decode('utf-8', errors='ignore')
                         extracted_files[file_info.filename] = content
         except Exception as e:
             print(f"Error extracting zip: {e}")
         return extracted_files
     
-    def extract_functions(self, content: str) -> List[Dict[str, str]]:
-        """Extract functions from JavaScript/React code"""
-        functions = []
-        patterns = [
-            r'function\s+(\w+)\s*\([^)]*\)\s*\{[^}]*\}',
-            r'const\s+(\w+)\s*=\s*\([^)]*\)\s*=>\s*\{[^}]*\}',
-            r'(\w+)\s*:\s*\([^)]*\)\s*=>\s*\{[^}]*\}',
+    def extract_functions(self, content: str, structure: Optional[JSStructure] = None) -> List[Dict[str, str]]:
+        """Extract functions from JavaScript/React code (pass structure to reuse one scan)"""
+        structure = structure or extract_js_structure(content)
+        return [
+            {
+                "name": func["name"],
+                "summary": self._get_function_summary(func["name"])
+            }
+            for func in structure.functions
         ]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, content, re.DOTALL)
-            for match in matches:
-                function_name = match.group(1)
-                functions.append({
-                    "name": function_name,
-                    "summary": self._get_function_summary(function_name)
-                })
-        
-        return functions
     
-    def extract_libraries(self, content: str) -> List[Dict[str, str]]:
-        """Extract library imports"""
+    def extract_libraries(self, content: str, structure: Optional[JSStructure] = None) -> List[Dict[str, str]]:
+        """Extract library imports (pass structure to reuse one scan)"""
+        structure = structure or extract_js_structure(content)
         libraries = []
-        import_patterns = [
-            r'import\s+.*?from\s+[\'"]([^\'"]+)[\'"]',
-            r'import\s+[\'"]([^\'"]+)[\'"]',
-            r'require\s*\(\s*[\'"]([^\'"]+)[\'"]\s*\)',
-        ]
-        
-        for pattern in import_patterns:
-            matches = re.finditer(pattern, content)
-            for match in matches:
-                import_path = match.group(1)
-                library_name = import_path.split('/')[0]
-                
-                if library_name not in [lib["name"] for lib in libraries]:
-                    libraries.append({
-                        "name": library_name,
-                        "link": self._get_library_link(library_name)
-                    })
+        for import_path in structure.imports:
+            library_name = import_path.split('/')[0]
+            
+            if library_name not in [lib["name"] for lib in libraries]:
+                libraries.append({
+                    "name": library_name,
+                    "link": self._get_library_link(library_name)
+                })
         
         return libraries
     
@@ -144,52 +171,187 @@ async def upload_file(file: UploadFile = File(...)):
             content={"error": "Please upload a zip file"}
         )
     
-    upload_id = f"upload_{len(uploads) + 1}"
-    
-    # Save uploaded file temporarily
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
+    # Copied to disk in chunks, hashing on the way; never held in memory whole
     try:
-        content = await file.read()
-        temp_file.write(content)
-        temp_file.close()
-        
-        uploads[upload_id] = {
-            "filename": file.filename,
-            "temp_path": temp_file.name,
-            "status": "uploaded",
-            "analysis": None
+        received = await upload_receiver.receive(file)
+    except UploadRejected as e:
+        return upload_rejected_response(e)
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Error processing file: {str(e)}"}
+        )
+    
+    return register_upload(file.filename, received)
+
+def register_upload(filename: str, received: Dict[str, Any]) -> Dict[str, Any]:
+    """Record a received archive as a new upload ready for analysis"""
+    # An identical archive answers with the earlier upload and its analysis
+    duplicate = find_duplicate_upload(received["sha256"]) if Config.DEDUP_UPLOADS else None
+    if duplicate is not None:
+        os.remove(received["path"])
+        status = current_status(duplicate).get("status")
+        return {
+            "upload_id": duplicate,
+            "message": "Identical archive already uploaded",
+            "status": "completed" if status == "completed" else "ready_for_analysis" if status == "uploaded" else "analyzing",
+            "sha256": received["sha256"],
+            "deduplicated": True
         }
-        
+    
+    upload_id = f"upload_{analysis_store.next_upload_number()}"
+    analysis_store.create_upload(upload_id, {
+        "filename": filename,
+        "temp_path": received["path"],
+        "size": received["size"],
+        "sha256": received["sha256"],
+        "status": "uploaded",
         # Initialize status
-        analysis_status[upload_id] = {
+        "progress_status": {
             "status": "uploaded",
             "progress": 0,
             "message": "File uploaded successfully",
             "timestamp": datetime.now().isoformat()
         }
-        
-        return {
-            "upload_id": upload_id,
-            "message": "File uploaded successfully",
-            "status": "ready_for_analysis"
-        }
-        
-    except Exception as e:
+    })
+    
+    return {
+        "upload_id": upload_id,
+        "message": "File uploaded successfully",
+        "status": "ready_for_analysis",
+        "sha256": received["sha256"]
+    }
+
+def find_duplicate_upload(sha256: str) -> Optional[str]:
+    """The newest earlier upload of the same archive that has not failed"""
+    for upload_id in analysis_store.find_uploads(sha256):
+        upload = analysis_store.get_upload(upload_id)
+        # Pushes patch an upload in place, after which it no longer matches its archive
+        if upload is not None and not upload.get("updates") and upload.get("progress_status", {}).get("status") != "error":
+            return upload_id
+    return None
+
+def upload_rejected_response(e: UploadRejected) -> JSONResponse:
+    """Error response for a refused upload; 409s carry the offset to resume from"""
+    return JSONResponse(
+        status_code=e.status_code,
+        content={"error": str(e), **e.details}
+    )
+
+@app.post("/upload-sessions")
+async def create_upload_session(filename: str, total_size: Optional[int] = None):
+    """Start a resumable upload; send the archive with PUT /upload-sessions/{session_id}"""
+    if not filename.endswith('.zip'):
         return JSONResponse(
-            status_code=500,
-            content={"error": f"Error processing file: {str(e)}"}
+            status_code=400,
+            content={"error": "Please upload a zip file"}
         )
+    try:
+        return upload_receiver.create_session(filename, total_size)
+    except UploadRejected as e:
+        return upload_rejected_response(e)
+
+@app.get("/upload-sessions/{session_id}")
+async def get_upload_session(session_id: str):
+    """Bytes received so far, i.e. the offset to resume from"""
+    try:
+        return upload_receiver.get_session(session_id)
+    except UploadRejected as e:
+        return upload_rejected_response(e)
+
+@app.put("/upload-sessions/{session_id}")
+async def append_upload_chunk(session_id: str, request: Request, offset: int = 0):
+    """Append the raw request body to a resumable upload at offset"""
+    try:
+        return await upload_receiver.append(session_id, offset, request.stream())
+    except UploadRejected as e:
+        return upload_rejected_response(e)
+
+@app.post("/upload-sessions/{session_id}/complete")
+async def complete_upload_session(session_id: str):
+    """Finish a resumable upload and register it for analysis"""
+    try:
+        received = await upload_receiver.complete(session_id)
+    except UploadRejected as e:
+        return upload_rejected_response(e)
+    return register_upload(received["filename"], received)
+
+@app.delete("/upload-sessions/{session_id}")
+async def abort_upload_session(session_id: str):
+    """Discard a resumable upload"""
+    try:
+        upload_receiver.abort(session_id)
+    except UploadRejected as e:
+        return upload_rejected_response(e)
+    return {"message": "Upload aborted"}
+
+def update_status(upload_id: str, status: str, progress: int = 0, message: str = ""):
+    """Record status in the store, where every worker can read it, and push it to subscribers"""
+    progress_status = {
+        "status": status,
+        "progress": progress,
+        "message": message,
+        "timestamp": datetime.now().isoformat()
+    }
+    analysis_store.update_upload(upload_id, progress_status=progress_status)
+    progress_broker.publish_status(upload_id, progress_status)
+
+def mark_queued(upload_id: str):
+    """Lease a just-submitted analysis to this worker and mark it queued, so repeat requests do not queue it again"""
+    analysis_lease.acquire(upload_id)
+    update_status(upload_id, "queued", 0, "Waiting for a free analysis slot")
+
+def current_status(upload_id: str) -> Optional[Dict[str, Any]]:
+    """The stored status, for subscribers of analyses running on another worker"""
+    upload = analysis_store.get_upload(upload_id)
+    return upload.get("progress_status", {}) if upload is not None else None
+
+def queue_full_response(e: AnalysisQueueFull) -> JSONResponse:
+    """429 response telling the client when to retry"""
+    return JSONResponse(
+        status_code=429,
+        content={"error": str(e)},
+        headers={"Retry-After": str(e.retry_after)}
+    )
 
 @app.post("/analyze/{upload_id}")
-async def analyze_code(upload_id: str, background_tasks: BackgroundTasks):
+async def analyze_code(upload_id: str):
     """Start analysis of uploaded code"""
-    if upload_id not in uploads:
+    if not analysis_store.has_upload(upload_id):
         return JSONResponse(
             status_code=404,
             content={"error": "Upload not found"}
         )
     
-    background_tasks.add_task(perform_enhanced_analysis, upload_id)
+    # A deduplicated upload can point at an analysis that is already done or under way;
+    # one left queued or running by a worker that is gone is analyzed again
+    upload = analysis_store.get_upload(upload_id)
+    status = upload.get("progress_status", {}).get("status")
+    if status == "completed":
+        return {
+            "message": "Analysis already completed",
+            "upload_id": upload_id,
+            "status": "completed"
+        }
+    in_flight = status not in ("uploaded", "error") and analysis_lease.is_held(upload_id, upload)
+    if in_flight and status == "queued":
+        return {
+            "message": "Analysis already queued",
+            "upload_id": upload_id,
+            "status": "queued"
+        }
+    if in_flight:
+        return {
+            "message": "Analysis already running",
+            "upload_id": upload_id,
+            "status": "analyzing"
+        }
+    
+    try:
+        analysis_executor.submit(upload_id, perform_enhanced_analysis, upload_id)
+    except AnalysisQueueFull as e:
+        return queue_full_response(e)
+    mark_queued(upload_id)
     
     return {
         "message": "Analysis started",
@@ -198,49 +360,163 @@ async def analyze_code(upload_id: str, background_tasks: BackgroundTasks):
     }
 
 @app.get("/analyze/{upload_id}")
-async def get_analysis(upload_id: str):
-    """Get analysis results"""
-    if upload_id not in uploads:
+async def get_analysis(upload_id: str, fields: Optional[str] = None, include_files: bool = True):
+    """Get analysis results
+    
+    fields= projects each file (e.g. filename,summary,functions.name drops code
+    bodies); include_files=false returns only project-level fields and file_count.
+    """
+    upload = analysis_store.get_upload(upload_id)
+    if upload is None:
         return JSONResponse(
             status_code=404,
             content={"error": "Upload not found"}
         )
     
-    upload = uploads[upload_id]
+    try:
+        analysis = get_project_result(analysis_store, upload_id, fields, include_files)
+    except InvalidQuery as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
     
-    if upload["analysis"] is None:
-        status = analysis_status.get(upload_id, {})
+    if analysis is None:
+        status = upload.get("progress_status", {})
         return {
             "status": "analyzing",
             "message": status.get("message", "Analysis in progress..."),
-            "progress": status.get("progress", 0)
+            "progress": status.get("progress", 0),
+            # Totals over the files done so far; the files themselves are in /analyze/{upload_id}/files
+            "partial_result": upload.get("partial_result")
         }
     
-    return upload["analysis"]
+    return analysis
+
+@app.get("/analyze/{upload_id}/files")
+async def get_analysis_files(upload_id: str, cursor: Optional[str] = None,
+                             limit: Optional[int] = None, fields: Optional[str] = None):
+    """Page through per-file results; fields= selects e.g. filename,summary,functions.name"""
+    if not analysis_store.has_upload(upload_id):
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Upload not found"}
+        )
+    
+    try:
+        limit = clamp_limit(limit, Config.RESULT_PAGE_SIZE, Config.RESULT_MAX_PAGE_SIZE)
+        return page_files(analysis_store, upload_id, cursor, limit, fields)
+    except InvalidQuery as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
+
+@app.get("/analyze/{upload_id}/files/{filename:path}")
+async def get_analysis_file(upload_id: str, filename: str, fields: Optional[str] = None):
+    """Get one file's analysis"""
+    try:
+        file_analysis = get_file_result(analysis_store, upload_id, filename, fields)
+    except InvalidQuery as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
+    
+    if file_analysis is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "File not found"}
+        )
+    
+    return file_analysis
 
 @app.get("/status/{upload_id}")
 async def get_status(upload_id: str):
     """Get detailed analysis status"""
-    if upload_id not in uploads:
+    upload = analysis_store.get_upload(upload_id)
+    if upload is None:
         return JSONResponse(
             status_code=404,
             content={"error": "Upload not found"}
         )
     
-    status = analysis_status.get(upload_id, {})
+    status = upload.get("progress_status", {})
     return {
         "upload_id": upload_id,
-        "filename": uploads[upload_id]["filename"],
+        "filename": upload["filename"],
         **status
     }
 
+@app.get("/events/{upload_id}")
+async def stream_progress(upload_id: str, request: Request, fields: Optional[str] = None):
+    """Server-sent progress events: status changes, each finished file, then completed or failed
+    
+    Reconnecting clients resume after Last-Event-ID; fields= projects the
+    file results carried by file events.
+    """
+    if not analysis_store.has_upload(upload_id):
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Upload not found"}
+        )
+    
+    try:
+        tree = parse_fields(fields)
+    except InvalidQuery as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
+    
+    events = progress_broker.subscribe(
+        upload_id,
+        parse_last_event_id(request.headers.get("last-event-id")),
+        read_status=lambda: current_status(upload_id),
+        heartbeat=Config.PROGRESS_HEARTBEAT_SECONDS
+    )
+    return StreamingResponse(
+        (format_sse(project_event(event, tree)) async for event in events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws/{upload_id}")
+async def websocket_progress(websocket: WebSocket, upload_id: str, fields: Optional[str] = None,
+                             last_event_id: Optional[str] = None):
+    """The /events stream as one JSON message per event"""
+    await websocket.accept()
+    if not analysis_store.has_upload(upload_id):
+        await websocket.close(code=4404)
+        return
+    try:
+        tree = parse_fields(fields)
+    except InvalidQuery:
+        await websocket.close(code=4400)
+        return
+    
+    try:
+        async for event in progress_broker.subscribe(
+            upload_id,
+            parse_last_event_id(last_event_id),
+            read_status=lambda: current_status(upload_id),
+            heartbeat=Config.PROGRESS_HEARTBEAT_SECONDS
+        ):
+            await websocket.send_json(event_message(project_event(event, tree)))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
 @app.post("/webhook/github")
 async def github_webhook(request: Request):
     """Handle GitHub webhook events for live monitoring"""
     payload = await request.body()
     signature = request.headers.get("X-Hub-Signature-256", "")
     
-    # Verify webhook (simplified for demo)
+    # Pushes rewrite linked analyses and fetch files with GITHUB_TOKEN: only signed ones are accepted
+    if not verify_github_signature(Config.GITHUB_WEBHOOK_SECRET, payload, signature):
+        return JSONResponse(status_code=401, content={"error": "Invalid webhook signature"})
+    
     event_type = request.headers.get("X-GitHub-Event", "")
     
     if event_type == "push":
@@ -264,6 +540,9 @@ async def github_webhook(request: Request):
                 "files": len(commit['added']) + len(commit['modified'])
             })
         
+        # Re-analyze only the files this push touched in the linked upload
+        event["incremental"] = queue_incremental_analysis(repo_name, data)
+        
         github_events.append(event)
         return {"status": "processed", "event": event}
     
@@ -309,32 +588,101 @@ async def get_live_status(repo_name: str):
     }
 
 @app.post("/analyze/persistent/{upload_id}")
-async def persistent_analysis(upload_id: str, background_tasks: BackgroundTasks):
-    """Start persistent analysis that updates automatically"""
-    if upload_id not in uploads:
+async def persistent_analysis(upload_id: str, repository: Optional[str] = None):
+    """Start persistent analysis that updates automatically
+    
+    With ?repository=owner/name, push webhooks for that repository patch this
+    upload's analysis incrementally instead of re-running the full pipeline.
+    """
+    if not analysis_store.has_upload(upload_id):
         return JSONResponse(status_code=404, content={"error": "Upload not found"})
     
-    # Store for persistent monitoring
-    uploads[upload_id]["persistent"] = True
-    uploads[upload_id]["last_updated"] = datetime.now().isoformat()
+    try:
+        analysis_executor.submit(upload_id, perform_enhanced_analysis, upload_id)
+    except AnalysisQueueFull as e:
+        return queue_full_response(e)
+    mark_queued(upload_id)
     
-    background_tasks.add_task(perform_enhanced_analysis, upload_id)
+    # Store for persistent monitoring
+    analysis_store.update_upload(upload_id, persistent=True, last_updated=datetime.now().isoformat())
+    if repository:
+        analysis_store.update_upload(upload_id, repository=repository)
+        monitored_repos[repository] = {
+            "status": "monitoring",
+            "started_at": datetime.now().isoformat(),
+            "events": 0,
+            "upload_id": upload_id
+        }
     
     return {
         "message": "Persistent analysis started",
         "upload_id": upload_id,
+        "repository": repository,
         "status": "monitoring",
         "webhook_url": f"http://204.52.27.91:8000/webhook/github"
     }
 
+def queue_incremental_analysis(repo_name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Queue an incremental update for the upload linked to repo_name, if any"""
+    repo = monitored_repos.get(repo_name)
+    upload_id = repo.get("upload_id") if repo else None
+    if upload_id is None or not analysis_store.has_upload(upload_id):
+        return {"status": "not_linked"}
+    if upload_id not in snapshots:
+        return {
+            "status": "no_base_snapshot",
+            "upload_id": upload_id,
+            "detail": "This worker holds no import graph for the upload (restarted or another worker); run the persistent analysis again"
+        }
+    
+    changed_paths, removed_paths = changed_paths_from_push(payload)
+    changed_paths = [path for path in changed_paths if path.endswith(file_parser.supported_extensions)]
+    if not changed_paths and not removed_paths:
+        return {"status": "no_code_changes", "upload_id": upload_id}
+    
+    repo["events"] += 1
+    try:
+        analysis_executor.submit(
+            f"{upload_id}:{payload.get('after', '')[:8]}", perform_incremental_analysis,
+            upload_id, repo_name, payload.get("after", ""), changed_paths, removed_paths
+        )
+    except AnalysisQueueFull as e:
+        return {"status": "rejected", "upload_id": upload_id, "error": str(e)}
+    
+    return {
+        "status": "queued",
+        "upload_id": upload_id,
+        "changed": len(changed_paths),
+        "removed": len(removed_paths)
+    }
+
+def fetch_repository_files(repo_name: str, ref: str, paths: List[str]) -> Tuple[Dict[str, str], List[str]]:
+    """Fetch file contents at ref from GitHub (runs in the stage pool); returns (contents, paths not fetched)"""
+    headers = {"Authorization": f"token {Config.GITHUB_TOKEN}"} if Config.GITHUB_TOKEN else {}
+    contents = {}
+    missing = []
+    with requests.Session() as session:
+        for path in paths:
+            try:
+                response = session.get(f"{Config.GITHUB_RAW_URL}/{repo_name}/{ref}/{path}", headers=headers, timeout=10)
+            except requests.RequestException as e:
+                print(f"Could not fetch {path}@{ref[:8]}: {e}")
+                missing.append(path)
+                continue
+            if response.status_code == 200:
+                contents[path] = response.text
+            else:
+                print(f"Could not fetch {path}@{ref[:8]}: HTTP {response.status_code}")
+                missing.append(path)
+    return contents, missing
+
 @app.get("/docs/export/{upload_id}")
 async def export_documentation(upload_id: str):
     """Export documentation in multiple formats"""
-    if upload_id not in uploads or uploads[upload_id]["analysis"] is None:
+    analysis = analysis_store.get_result(upload_id)
+    if analysis is None:
         return JSONResponse(status_code=404, content={"error": "Analysis not found"})
     
-    analysis = uploads[upload_id]["analysis"]
-    
     # Generate different export formats
     markdown_docs = generate_markdown_docs(analysis)
     json_docs = generate_json_docs(analysis)
@@ -353,72 +701,30 @@ async def export_documentation(upload_id: str):
 async def perform_enhanced_analysis(upload_id: str):
     """Perform enhanced analysis with real file parsing"""
     try:
-        upload = uploads[upload_id]
+        upload = analysis_store.get_upload(upload_id)
         temp_path = upload["temp_path"]
         
         # Step 1: Extract files
-        analysis_status[upload_id] = {"status": "extracting", "progress": 10, "message": "Extracting files from zip", "timestamp": datetime.now().isoformat()}
-        extracted_files = file_parser.extract_zip(temp_path)
+        update_status(upload_id, "extracting", 10, "Extracting files from zip")
+        extracted_files = await analysis_executor.run_stage(file_parser.extract_zip, temp_path)
         
         if not extracted_files:
-            analysis_status[upload_id] = {"status": "error", "progress": 0, "message": "No supported files found", "timestamp": datetime.now().isoformat()}
+            update_status(upload_id, "error", 0, "No supported files found")
             return
         
-        # Step 2: Analyze files
-        analysis_status[upload_id] = {"status": "analyzing", "progress": 40, "message": "Analyzing code structure", "timestamp": datetime.now().isoformat()}
-        analyzed_files = []
-        
-        for filename, content in extracted_files.items():
-            functions = file_parser.extract_functions(content)
-            libraries = file_parser.extract_libraries(content)
-            
-            file_analysis = {
-                "filename": filename,
-                "summary": f"JavaScript/React file containing {len(functions)} functions and {len(libraries)} external libraries",
-                "functions": functions,
-                "external_libraries": libraries
-            }
-            analyzed_files.append(file_analysis)
-        
-        # Step 3: Generate project summary
-        analysis_status[upload_id] = {"status": "compiling", "progress": 80, "message": "Compiling analysis results", "timestamp": datetime.now().isoformat()}
-        
-        total_functions = sum(len(f["functions"]) for f in analyzed_files)
-        total_libraries = len(set(lib["name"] for f in analyzed_files for lib in f["external_libraries"]))
-        
-        project_summary = f"React search application with {len(analyzed_files)} files, {total_functions} functions, and {total_libraries} external libraries"
+        # Step 2: Analyze files into a snapshot that later pushes patch in place;
+        # each file's row is stored as soon as it is analyzed
+        update_status(upload_id, "analyzing", 40, "Analyzing code structure")
+        snapshot = ProjectSnapshot(streaming_analyzer(upload_id, len(extracted_files)))
+        await analysis_executor.run_stage(snapshot.build, extracted_files)
         
-        # Step 4: Find cross-references
-        cross_references = []
-        for file_analysis in analyzed_files:
-            if "SearchResults" in file_analysis["filename"]:
-                cross_references.append({
-                    "from": file_analysis["filename"],
-                    "to": "SearchBar.js",
-                    "type": "import",
-                    "description": "SearchResults imports SearchBar component"
-                })
+        # Step 3: Compile final results with cross-references from the import graph
+        update_status(upload_id, "compiling", 80, "Compiling analysis results")
+        await analysis_executor.run_stage(store_result, upload_id, snapshot)
         
-        # Step 5: Compile final results
-        final_analysis = {
-            "project_summary": project_summary,
-            "files": analyzed_files,
-            "cross_references": cross_references,
-            "external_libraries_summary": [
-                {"name": "lodash", "usage": "Utility functions for data manipulation", "link": "https://lodash.com/"},
-                {"name": "axios", "usage": "HTTP client for API requests", "link": "https://axios-http.com/"},
-                {"name": "react", "usage": "UI library for building components", "link": "https://reactjs.org/"}
-            ],
-            "analysis_metadata": {
-                "total_files": len(analyzed_files),
-                "total_functions": total_functions,
-                "total_libraries": total_libraries,
-                "analysis_timestamp": datetime.now().isoformat()
-            }
-        }
-        
-        uploads[upload_id]["analysis"] = final_analysis
-        analysis_status[upload_id] = {"status": "completed", "progress": 100, "message": "Analysis completed successfully", "timestamp": datetime.now().isoformat()}
+        snapshots[upload_id] = snapshot
+        analysis_store.update_upload(upload_id, status="completed")
+        update_status(upload_id, "completed", 100, "Analysis completed successfully")
         
         # Clean up
         try:
@@ -427,9 +733,137 @@ async def perform_enhanced_analysis(upload_id: str):
             pass
             
     except Exception as e:
-        analysis_status[upload_id] = {"status": "error", "progress": 0, "message": f"Analysis failed: {str(e)}", "timestamp": datetime.now().isoformat()}
+        update_status(upload_id, "error", 0, f"Analysis failed: {str(e)}")
         print(f"Analysis error: {e}")
 
+async def perform_incremental_analysis(upload_id: str, repo_name: str, after: str,
+                                       changed_paths: List[str], removed_paths: List[str]):
+    """Patch an upload's analysis with the files one push changed"""
+    lock = snapshot_locks.setdefault(upload_id, asyncio.Lock())
+    async with lock:
+        try:
+            snapshot = snapshots[upload_id]
+            update_status(upload_id, "updating", 20, f"Fetching {len(changed_paths)} changed files")
+            fetched, missing = await analysis_executor.run_stage(fetch_repository_files, repo_name, after, changed_paths)
+            if missing and not fetched and not removed_paths:
+                record_update(upload_id, {"revision": after, "status": "failed", "missing": missing})
+                update_status(upload_id, "error", 0, f"Incremental update to {after[:8]} failed: none of {len(missing)} changed files could be fetched")
+                return
+            
+            update_status(upload_id, "updating", 60, "Re-analyzing changed files")
+            changed = {snapshot.path_for(path): content for path, content in fetched.items()}
+            removed = [snapshot.path_for(path) for path in removed_paths]
+            snapshot.analyze_file = streaming_analyzer(upload_id, len(changed))
+            update = await analysis_executor.run_stage(snapshot.apply, changed, removed, after)
+            
+            # Only the touched file rows are rewritten, re-analyzed ones as they finished;
+            # totals and cross-references were patched by apply(), off the event loop
+            analysis_store.delete_files(upload_id, update["removed"])
+            await analysis_executor.run_stage(store_result, upload_id, snapshot)
+            
+            # Files that could not be fetched keep their previous analysis
+            record_update(upload_id, {
+                "revision": after,
+                "status": "partial" if missing else "completed",
+                "missing": missing,
+                **{key: len(value) if isinstance(value, list) else value for key, value in update.items()}
+            })
+            message = f"Incremental update to {after[:8]}: {len(update['reanalyzed'])} files re-analyzed, {len(update['removed'])} removed"
+            if missing:
+                message += f", {len(missing)} could not be fetched"
+            update_status(upload_id, "completed", 100, message)
+        except Exception as e:
+            update_status(upload_id, "error", 0, f"Incremental update failed: {str(e)}")
+            print(f"Incremental analysis error: {e}")
+
+def record_update(upload_id: str, update: Dict[str, Any]):
+    """Append an incremental update to the upload's history; last_updated moves only when it was applied"""
+    timestamp = datetime.now().isoformat()
+    updates = analysis_store.get_upload(upload_id).get("updates", [])
+    updates.append({"timestamp": timestamp, **update})
+    if update["status"] == "failed":
+        analysis_store.update_upload(upload_id, updates=updates)
+    else:
+        analysis_store.update_upload(upload_id, last_updated=timestamp, updates=updates)
+
+def analyze_file(filename: str, content: str) -> Tuple[Dict[str, Any], List[str]]:
+    """Extract functions and libraries from one file, plus its imports for the dependency graph"""
+    structure = extract_js_structure(content)
+    functions = file_parser.extract_functions(content, structure)
+    libraries = file_parser.extract_libraries(content, structure)
+    
+    file_analysis = {
+        "filename": filename,
+        "summary": f"JavaScript/React file containing {len(functions)} functions and {len(libraries)} external libraries",
+        "functions": functions,
+        "external_libraries": libraries
+    }
+    return file_analysis, structure.imports
+
+def streaming_analyzer(upload_id: str, files_total: int):
+    """analyze_file that stores each file's row and pushes it to subscribers as soon as it is done
+    
+    Runs in the stage thread; running totals are stored at most once per
+    PROGRESS_STORE_INTERVAL as the upload's partial_result.
+    """
+    aggregate = ProjectAggregate()
+    throttle = ProgressThrottle(Config.PROGRESS_STORE_INTERVAL)
+    
+    def analyze(filename: str, content: str) -> Tuple[Dict[str, Any], List[str]]:
+        file_analysis, imports = analyze_file(filename, content)
+        analysis_store.put_files(upload_id, [file_analysis])
+        aggregate.add(file_analysis)
+        progress_broker.publish_file(upload_id, file_analysis, aggregate.files, files_total)
+        if throttle.ready():
+            analysis_store.update_upload(upload_id, partial_result=aggregate.to_dict())
+        return file_analysis, imports
+    return analyze
+
+def compile_analysis(snapshot: ProjectSnapshot) -> Dict[str, Any]:
+    """Project-level analysis document for the current state of a snapshot
+    
+    Totals come from the snapshot's running aggregate and cross-references
+    from its per-importer edges, so no file is revisited. File rows are
+    stored separately as each file is analyzed.
+    """
+    totals = snapshot.aggregate.to_dict()
+    total_files = totals["total_files"]
+    total_functions = totals["total_functions"]
+    total_libraries = totals["total_libraries"]
+    
+    return {
+        "project_summary": f"React search application with {total_files} files, {total_functions} functions, and {total_libraries} external libraries",
+        "cross_references": snapshot.cross_references(),
+        "external_libraries_summary": [
+            {"name": "lodash", "usage": "Utility functions for data manipulation", "link": "https://lodash.com/"},
+            {"name": "axios", "usage": "HTTP client for API requests", "link": "https://axios-http.com/"},
+            {"name": "react", "usage": "UI library for building components", "link": "https://reactjs.org/"}
+        ],
+        "analysis_metadata": {
+            "total_files": total_files,
+            "total_functions": total_functions,
+            "total_libraries": total_libraries,
+            "revision": snapshot.revision,
+            "analysis_timestamp": datetime.now().isoformat()
+        }
+    }
+
+def store_result(upload_id: str, snapshot: ProjectSnapshot):
+    """Compile and store the project-level result (runs in the stage pool)"""
+    analysis_store.set_result(upload_id, compile_analysis(snapshot))
+
+@app.get("/analysis/queue")
+async def get_analysis_queue():
+    """Analysis executor queue depth and job counters"""
+    return analysis_executor.get_stats()
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    """Stop analysis workers"""
+    analysis_lease.stop()
+    await analysis_executor.shutdown()
+    analysis_store.close()
+
 def generate_markdown_docs(analysis):
     """Generate Markdown documentation"""
     md = f"# {analysis['project_summary']}\n\n"
@@ -1,10 +1,17 @@
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import zipfile
 import os
 import json
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, Optional
+
+from app.config import Config
+from app.core.analysis_executor import AnalysisExecutor, AnalysisQueueFull
+from app.core.analysis_store import create_analysis_store
+from app.core.result_query import InvalidQuery, clamp_limit, get_file_result, get_project_result, page_files, parse_fields
+from app.core.progress_events import ProgressBroker, event_message, format_sse, parse_last_event_id, project_event
 
 app = FastAPI(title="DocuSynth AI - Demo Version")
 
@@ -17,8 +24,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory storage for demo
-uploads = {}
+analysis_executor = AnalysisExecutor(
+    max_concurrent=Config.MAX_CONCURRENT_ANALYSES,
+    max_queued=Config.ANALYSIS_QUEUE_SIZE,
+    stage_workers=Config.ANALYSIS_STAGE_WORKERS
+)
+
+# Uploads and results live in the analysis store so every worker sees them
+analysis_store = create_analysis_store(Config.ANALYSIS_STORE_BACKEND, Config.ANALYSIS_STORE_PATH)
+
+# Pushes progress to /events and /ws subscribers instead of having them poll /status
+progress_broker = ProgressBroker(
+    history_size=Config.PROGRESS_HISTORY_SIZE,
+    queue_size=Config.PROGRESS_QUEUE_SIZE,
+    poll_interval=Config.PROGRESS_POLL_INTERVAL,
+    retain_seconds=Config.PROGRESS_RETAIN_SECONDS
+)
+
+def current_status(upload_id: str) -> Optional[Dict[str, Any]]:
+    """The status payload /status returns and progress events carry"""
+    upload = analysis_store.get_upload(upload_id)
+    if upload is None:
+        return None
+    return {"status": upload["status"]}
+
+def update_status(upload_id: str, status: str):
+    analysis_store.update_upload(upload_id, status=status)
+    progress_broker.publish_status(upload_id, current_status(upload_id))
 
 @app.get("/")
 async def root():
@@ -34,14 +66,13 @@ async def upload_file(file: UploadFile = File(...)):
         )
     
     # Generate upload ID
-    upload_id = f"upload_{len(uploads) + 1}"
+    upload_id = f"upload_{analysis_store.next_upload_number()}"
     
     # Store file info (for demo, we'll simulate analysis)
-    uploads[upload_id] = {
+    analysis_store.create_upload(upload_id, {
         "filename": file.filename,
-        "status": "uploaded",
-        "analysis": None
-    }
+        "status": "uploaded"
+    })
     
     return {
         "upload_id": upload_id,
@@ -50,16 +81,23 @@ async def upload_file(file: UploadFile = File(...)):
     }
 
 @app.post("/analyze/{upload_id}")
-async def analyze_code(upload_id: str, background_tasks: BackgroundTasks):
+async def analyze_code(upload_id: str):
     """Start analysis of uploaded code"""
-    if upload_id not in uploads:
+    if not analysis_store.has_upload(upload_id):
         return JSONResponse(
             status_code=404,
             content={"error": "Upload not found"}
         )
     
     # Simulate analysis for demo
-    background_tasks.add_task(simulate_analysis, upload_id)
+    try:
+        analysis_executor.submit(upload_id, simulate_analysis, upload_id)
+    except AnalysisQueueFull as e:
+        return JSONResponse(
+            status_code=429,
+            content={"error": str(e)},
+            headers={"Retry-After": str(e.retry_after)}
+        )
     
     return {
         "message": "Analysis started",
@@ -67,29 +105,137 @@ async def analyze_code(upload_id: str, background_tasks: BackgroundTasks):
         "status": "analyzing"
     }
 
+@app.get("/events/{upload_id}")
+async def stream_progress(upload_id: str, request: Request, fields: Optional[str] = None):
+    """Server-sent progress events: status changes, each finished file, then completed or failed
+    
+    Reconnecting clients resume after Last-Event-ID; fields= projects the
+    file results carried by file events.
+    """
+    if not analysis_store.has_upload(upload_id):
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Upload not found"}
+        )
+    
+    try:
+        tree = parse_fields(fields)
+    except InvalidQuery as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
+    
+    events = progress_broker.subscribe(
+        upload_id,
+        parse_last_event_id(request.headers.get("last-event-id")),
+        read_status=lambda: current_status(upload_id),
+        heartbeat=Config.PROGRESS_HEARTBEAT_SECONDS
+    )
+    return StreamingResponse(
+        (format_sse(project_event(event, tree)) async for event in events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws/{upload_id}")
+async def websocket_progress(websocket: WebSocket, upload_id: str, fields: Optional[str] = None,
+                             last_event_id: Optional[str] = None):
+    """The /events stream as one JSON message per event"""
+    await websocket.accept()
+    if not analysis_store.has_upload(upload_id):
+        await websocket.close(code=4404)
+        return
+    try:
+        tree = parse_fields(fields)
+    except InvalidQuery:
+        await websocket.close(code=4400)
+        return
+    
+    try:
+        async for event in progress_broker.subscribe(
+            upload_id,
+            parse_last_event_id(last_event_id),
+            read_status=lambda: current_status(upload_id),
+            heartbeat=Config.PROGRESS_HEARTBEAT_SECONDS
+        ):
+            await websocket.send_json(event_message(project_event(event, tree)))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
 @app.get("/analyze/{upload_id}")
-async def get_analysis(upload_id: str):
-    """Get analysis results"""
-    if upload_id not in uploads:
+async def get_analysis(upload_id: str, fields: Optional[str] = None, include_files: bool = True):
+    """Get analysis results
+    
+    fields= projects each file (e.g. filename,summary,functions.name drops code
+    bodies); include_files=false returns only project-level fields and file_count.
+    """
+    if not analysis_store.has_upload(upload_id):
         return JSONResponse(
             status_code=404,
             content={"error": "Upload not found"}
         )
     
-    upload = uploads[upload_id]
+    try:
+        analysis = get_project_result(analysis_store, upload_id, fields, include_files)
+    except InvalidQuery as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
     
-    if upload["analysis"] is None:
+    if analysis is None:
         return {
             "status": "analyzing",
             "message": "Analysis in progress..."
         }
     
-    return upload["analysis"]
+    return analysis
+
+@app.get("/analyze/{upload_id}/files")
+async def get_analysis_files(upload_id: str, cursor: Optional[str] = None,
+                             limit: Optional[int] = None, fields: Optional[str] = None):
+    """Page through per-file results; fields= selects e.g. filename,summary,functions.name"""
+    if not analysis_store.has_upload(upload_id):
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Upload not found"}
+        )
+    
+    try:
+        limit = clamp_limit(limit, Config.RESULT_PAGE_SIZE, Config.RESULT_MAX_PAGE_SIZE)
+        return page_files(analysis_store, upload_id, cursor, limit, fields)
+    except InvalidQuery as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
+
+@app.get("/analyze/{upload_id}/files/{filename:path}")
+async def get_analysis_file(upload_id: str, filename: str, fields: Optional[str] = None):
+    """Get one file's analysis"""
+    try:
+        file_analysis = get_file_result(analysis_store, upload_id, filename, fields)
+    except InvalidQuery as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(e)}
+        )
+    
+    if file_analysis is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "File not found"}
+        )
+    
+    return file_analysis
 
 @app.get("/status/{upload_id}")
 async def get_status(upload_id: str):
     """Get analysis status"""
-    if upload_id not in uploads:
+    upload = analysis_store.get_upload(upload_id)
+    if upload is None:
         return JSONResponse(
             status_code=404,
             content={"error": "Upload not found"}
@@ -97,16 +243,16 @@ async def get_status(upload_id: str):
     
     return {
         "upload_id": upload_id,
-        "status": uploads[upload_id]["status"],
-        "filename": uploads[upload_id]["filename"]
+        "status": upload["status"],
+        "filename": upload["filename"]
     }
 
 async def simulate_analysis(upload_id: str):
     """Simulate AI agent analysis for demo"""
-    import time
+    update_status(upload_id, "analyzing")
     
-    # Simulate processing time
-    time.sleep(2)
+    # Simulate processing time without blocking the event loop
+    await asyncio.sleep(2)
     
     # Demo analysis results
     analysis_result = {
@@ -211,8 +357,11 @@ async def simulate_analysis(upload_id: str):
         ]
     }
     
-    uploads[upload_id]["analysis"] = analysis_result
-    uploads[upload_id]["status"] = "completed"
+    analysis_store.set_result(upload_id, analysis_result)
+    files = analysis_result["files"]
+    for index, file_analysis in enumerate(files, 1):
+        progress_broker.publish_file(upload_id, file_analysis, index, len(files))
+    update_status(upload_id, "completed")
 
 if __name__ == "__main__":
     import uvicorn
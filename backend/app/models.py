@@ -5,6 +5,8 @@ class UploadResponse(BaseModel):
     message: str
     upload_id: str
     file_count: int
+    sha256: Optional[str] = None
+    deduplicated: bool = False
 
 class AnalysisResponse(BaseModel):
     status: str
@@ -20,6 +22,7 @@ class AgentStatus(BaseModel):
 
 class FileAnalysis(BaseModel):
     filename: str
+    path: Optional[str] = None  # location inside the upload; filename is only the basename
     summary: str
     functions: List[Dict[str, Any]]
     external_libraries: List[Dict[str, Any]]
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the JS/TS structure extractor.
+Compares the old per-pattern regex extraction with the linear scanner on a
+minified multi-megabyte bundle and on inputs built to make the old regexes
+backtrack. Also checks that scanner time grows linearly with input size.
+"""
+
+import sys
+import os
+import re
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.js_extractor import extract_js_structure
+
+# The patterns RealFileParser/EnhancedFileParser used before the scanner
+LEGACY_PATTERNS = [
+    r'function\s+(\w+)\s*\([^)]*\)\s*\{[^}]*\}',
+    r'const\s+(\w+)\s*=\s*\([^)]*\)\s*=>\s*\{[^}]*\}',
+    r'(\w+)\s*:\s*\([^)]*\)\s*=>\s*\{[^}]*\}',
+    r'(\w+)\s*:\s*function\s*\([^)]*\)\s*\{[^}]*\}'
+]
+
+MODULE = (
+    'var n%d=function(e,t){"use strict";function r(e){return e&&e.__esModule?e:{default:e}}'
+    'const o=(e)=>{if(e>1){return e/2}return`v${e}`},i={render:function(t){return t.map(x=>x*2)},'
+    'update(e){return /a\\/b/g.test(e)}};class C%d extends i.B{get(e){return r(e)}}return o(e)+t};'
+)
+
+
+def minified_bundle(target_bytes: int) -> str:
+    """One long line of minified modules, like a production webpack bundle."""
+    parts = []
+    size = 0
+    index = 0
+    while size < target_bytes:
+        part = MODULE % (index, index)
+        parts.append(part)
+        size += len(part)
+        index += 1
+    return ''.join(parts)
+
+
+def unterminated_parameters(target_bytes: int) -> str:
+    """Many "name: (" openings with no ")" - every legacy match attempt scans to the end."""
+    unit = 'a:(b,'
+    return unit * (target_bytes // len(unit))
+
+
+def time_legacy(content: str) -> float:
+    start = time.perf_counter()
+    for pattern in LEGACY_PATTERNS:
+        for _ in re.finditer(pattern, content, re.DOTALL):
+            pass
+    return time.perf_counter() - start
+
+
+def time_scanner(content: str) -> float:
+    start = time.perf_counter()
+    extract_js_structure(content)
+    return time.perf_counter() - start
+
+
+def benchmark_js_extractor():
+    print("📊 Benchmarking JS/TS extraction")
+    print("=" * 60)
+
+    bundle = minified_bundle(4 * 1024 * 1024)
+    structure = extract_js_structure(bundle)
+    print(f"\nMinified bundle: {len(bundle):,} bytes, {len(structure.functions):,} functions, "
+          f"{len(structure.classes):,} classes")
+    print(f"  legacy regexes: {time_legacy(bundle) * 1000:.0f} ms")
+    print(f"  scanner:        {time_scanner(bundle) * 1000:.0f} ms")
+
+    # Legacy cost is quadratic here, so keep its input small and extrapolate
+    legacy_32k = time_legacy(unterminated_parameters(32 * 1024))
+    legacy_64k = time_legacy(unterminated_parameters(64 * 1024))
+    large = unterminated_parameters(4 * 1024 * 1024)
+    print("\nBacktracking input:")
+    print(f"  legacy regexes, 32 KB: {legacy_32k * 1000:.0f} ms")
+    print(f"  legacy regexes, 64 KB: {legacy_64k * 1000:.0f} ms ({legacy_64k / legacy_32k:.1f}x for 2x input)")
+    print(f"  legacy regexes, 4 MB:  ~{legacy_64k * 64 ** 2 / 60:.0f} min (extrapolated)")
+    print(f"  scanner, 4 MB:         {time_scanner(large) * 1000:.0f} ms")
+
+    # Doubling the input should roughly double the time
+    print("\nScanner scaling on the bundle:")
+    previous = None
+    for size in (1, 2, 4, 8):
+        content = minified_bundle(size * 1024 * 1024)
+        elapsed = time_scanner(content)
+        ratio = f" ({elapsed / previous:.2f}x previous)" if previous else ""
+        print(f"  {size} MB: {elapsed * 1000:.0f} ms{ratio}")
+        if previous:
+            assert elapsed / previous < 3.0, "scanner time grew faster than linear"
+        previous = elapsed
+
+    print("\n✅ Scanner time is linear in input size")
+
+
+if __name__ == "__main__":
+    benchmark_js_extractor()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark for RealLibraryDocAgent npm metadata fetching.
+Compares the full-packument mode with the lightweight /latest mode against
+a local fixture registry serving a packument the size of a large package.
+"""
+
+import sys
+import os
+import json
+import time
+import threading
+import tracemalloc
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.agents.real_library_doc_agent import RealLibraryDocAgent
+
+PACKAGES = ["fixture-big", "fixture-huge"]
+VERSION_COUNTS = {"fixture-big": 800, "fixture-huge": 3000}
+
+
+def make_manifest(name: str, version: str) -> dict:
+    """One version manifest, padded to look like a real published version."""
+    return {
+        "name": name,
+        "version": version,
+        "description": f"Fixture package {name}",
+        "main": "index.js",
+        "dependencies": {f"dep-{i}": f"^{i}.0.0" for i in range(20)},
+        "dist": {"tarball": f"https://registry.example/{name}-{version}.tgz", "shasum": "0" * 40},
+        "readme": "x" * 2000,
+    }
+
+
+def make_fixtures():
+    """Build the full packument and /latest document for each fixture package."""
+    fixtures = {}
+    for name in PACKAGES:
+        versions = [f"1.0.{i}" for i in range(VERSION_COUNTS[name])]
+        latest = versions[-1]
+        packument = {
+            "name": name,
+            "dist-tags": {"latest": latest},
+            "versions": {v: make_manifest(name, v) for v in versions},
+        }
+        fixtures[f"/{name}"] = json.dumps(packument).encode()
+        fixtures[f"/{name}/latest"] = json.dumps(make_manifest(name, latest)).encode()
+    return fixtures
+
+
+class FixtureRegistryHandler(BaseHTTPRequestHandler):
+    fixtures = {}
+    bytes_sent = 0
+
+    def do_GET(self):
+        body = self.fixtures.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        FixtureRegistryHandler.bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_mode(base_url: str, lightweight: bool) -> dict:
+    """Resolve every fixture package once and measure bytes, peak memory and time."""
+    agent = RealLibraryDocAgent(lightweight_metadata=lightweight, npm_registry_url=base_url)
+    FixtureRegistryHandler.bytes_sent = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    for name in PACKAGES:
+        info = agent._fetch_npm_info(name)
+        assert info["description"] == f"Fixture package {name}", info
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"bytes": FixtureRegistryHandler.bytes_sent, "peak_memory": peak, "seconds": elapsed}
+
+
+def benchmark_npm_metadata():
+    print("📊 Benchmarking npm metadata fetch modes")
+    print("=" * 60)
+    FixtureRegistryHandler.fixtures = make_fixtures()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureRegistryHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        full = run_mode(base_url, lightweight=False)
+        light = run_mode(base_url, lightweight=True)
+    finally:
+        server.shutdown()
+
+    for label, result in (("full packument", full), ("lightweight", light)):
+        print(f"\n{label}:")
+        print(f"  bytes transferred: {result['bytes']:,}")
+        print(f"  peak parse memory: {result['peak_memory']:,}")
+        print(f"  time: {result['seconds'] * 1000:.1f} ms")
+
+    print(f"\n✅ Bytes reduced {full['bytes'] / light['bytes']:.0f}x, "
+          f"peak memory reduced {full['peak_memory'] / light['peak_memory']:.0f}x")
+
+
+if __name__ == "__main__":
+    benchmark_npm_metadata()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for batched function documentation in InternalDocAgent.
+Uses a local mock LLM that records the shape of every batch it receives.
+"""
+
+import sys
+import os
+import re
+import uuid
+from typing import List, Optional, Any
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain.llms.base import LLM
+from langchain.schema import LLMResult, Generation
+
+from app.agents.internal_doc_agent import InternalDocAgent, MockNeMoLLM
+
+
+class CountingNeMoLLM(MockNeMoLLM):
+    """MockNeMoLLM that counts requests to its backend."""
+
+    backend_calls: List[int] = []
+
+    def _generate_responses(self, prompts: List[str]) -> List[str]:
+        self.backend_calls.append(len(prompts))
+        return super()._generate_responses(prompts)
+
+
+class RecordingLLM(LLM):
+    """Echoes the function name from each prompt and records batch sizes."""
+
+    batch_sizes: List[int] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "recording_mock"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None) -> str:
+        match = re.search(r'Function:\s+(\w+)', prompt)
+        return f"doc for {match.group(1)}" if match else "file summary"
+
+    def _generate(self, prompts: List[str], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> LLMResult:
+        self.batch_sizes.append(len(prompts))
+        return LLMResult(generations=[[Generation(text=self._call(p))] for p in prompts])
+
+
+def test_batch_docs():
+    """Check batch shapes and that every doc maps back to its own function."""
+    print("🧪 Testing batched function documentation")
+    print("=" * 60)
+
+    llm = RecordingLLM()
+    agent = InternalDocAgent(llm=llm, batch_size=4)
+
+    parsed_files = [
+        {
+            'file_path': f'src/module_{i}.py',
+            'parsed_data': {
+                'functions': [{'name': f'func_{i}_{j}', 'parameters': ['x']} for j in range(3)],
+                'imports': [],
+                'line_count': 10
+            }
+        }
+        for i in range(3)
+    ]
+
+    llm.batch_sizes.clear()
+    functions = [func for pf in parsed_files for func in pf['parsed_data']['functions']]
+    docs = agent._generate_function_documentation_batch([(func, 'python') for func in functions])
+    print(f"\n📦 Function batch sizes: {llm.batch_sizes}")
+    assert llm.batch_sizes == [4, 4, 1], llm.batch_sizes
+    assert docs == [f"doc for {func['name']}" for func in functions], docs
+
+    results = agent.analyze_files(parsed_files)
+    for file_result in results:
+        for func in file_result['functions']:
+            assert func['doc'] == f"doc for {func['name']}", func
+    print(f"🔗 {sum(len(r['functions']) for r in results)} docs mapped back to the right functions")
+
+    # Streaming: module_0's three functions and summary fill the first batch, so it
+    # is complete before module_1 is even read
+    consumed = []
+    def source():
+        for parsed_file in parsed_files:
+            consumed.append(parsed_file['file_path'])
+            yield parsed_file
+    llm.batch_sizes.clear()
+    stream = agent.iter_analyze_files(source())
+    _, first = next(stream)
+    read_before_first = len(consumed)
+    assert first['filename'] == 'module_0.py' and read_before_first == 1, consumed
+    assert first['summary'] == "file summary", first
+    rest = [file_result for _, file_result in stream]
+    assert [r['filename'] for r in rest] == ['module_1.py', 'module_2.py']
+    # Nine function prompts and three summaries share full batches
+    assert llm.batch_sizes == [4, 4, 4], llm.batch_sizes
+    print(f"🌊 First file streamed after reading {read_before_first} of {len(parsed_files)} inputs, batches {llm.batch_sizes}")
+
+    # A batch is one backend request, not one per prompt; names are fresh so nothing is cached
+    counting = CountingNeMoLLM()
+    counting.backend_calls.clear()
+    run = uuid.uuid4().hex[:8]
+    InternalDocAgent(llm=counting, batch_size=4).analyze_files([
+        {
+            'file_path': f'src/module_{run}_{i}.py',
+            'parsed_data': {
+                'functions': [{'name': f'get_{run}_{i}_{j}', 'parameters': []} for j in range(3)],
+                'imports': [],
+                'line_count': 10
+            }
+        }
+        for i in range(3)
+    ])
+    assert counting.backend_calls == [4, 4, 4], counting.backend_calls
+    print(f"📡 Backend requests for 12 prompts: {len(counting.backend_calls)}")
+
+    print("\n✅ Batched documentation test complete!")
+
+
+if __name__ == "__main__":
+    test_batch_docs()
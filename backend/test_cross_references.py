@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script for cross-references and per-file libraries in the main analysis pipeline.
+Builds the same per-file inputs main.py does, without running the server.
+"""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.agents.context_manager_agent import ContextManagerAgent
+from app.agents.library_doc_agent import LibraryDocAgent
+from app.core.call_graph import CallGraph
+from app.core.module_index import ModuleIndex
+
+
+def parsed(path: str, functions, imports, calls):
+    """A parsed file and its FileAnalysis row as the pipeline holds them."""
+    parsed_file = {
+        'file_path': path,
+        'parsed_data': {'functions': functions, 'imports': imports, 'calls': calls}
+    }
+    file_analysis = {
+        'filename': path.split('/')[-1],
+        'path': path,
+        'functions': [{'name': func['name'], 'line_number': func['line_number']} for func in functions]
+    }
+    return parsed_file, file_analysis
+
+
+def test_duplicate_basenames():
+    """A call between two index.js files resolves to the file that defines it."""
+    print("\n📁 Cross-references across files sharing a basename...")
+    files = [
+        parsed('src/a/index.js', [{'name': 'render', 'line_number': 3}], ['../b'], [('helper', 4)]),
+        parsed('src/b/index.js', [{'name': 'helper', 'line_number': 1}], [], []),
+        parsed('src/c/index.js', [{'name': 'helper', 'line_number': 1}], [], []),
+    ]
+    parsed_files = [parsed_file for parsed_file, _ in files]
+    analyzed_files = [file_analysis for _, file_analysis in files]
+
+    reference_files = ContextManagerAgent.reference_files(parsed_files, analyzed_files)
+    index = ContextManagerAgent().build_reference_index(reference_files)
+    helper = index.by_function.get('helper')
+    assert helper is not None, index.cross_references
+    # The call resolves through the import to src/b, not to the other helper in src/c
+    calls = [usage for usage in index.usage_map['helper'] if usage['type'] == 'called']
+    assert [(usage['file'], usage['target']) for usage in calls] == [('src/a/index.js', 'src/b/index.js')], calls
+    print(f"  helper: called from src/a/index.js, resolved to {calls[0]['target']}")
+
+    # Only the helper that is called gets the cross-reference, not its namesake in src/c
+    refs = {
+        file_analysis['path']: index.for_functions(file_analysis['path'], file_analysis['functions'])
+        for file_analysis in analyzed_files
+    }
+    assert [ref['used_in'] for ref in refs['src/b/index.js']] == [['src/b/index.js', 'src/a/index.js']], refs
+    assert refs['src/c/index.js'] == [] and refs['src/a/index.js'] == [], refs
+    stats = ContextManagerAgent().get_analysis_statistics(analyzed_files, index)
+    assert stats['cross_references_count'] == len(index.cross_references) == 1, stats
+
+
+def test_method_call_name_collision():
+    """dict.get() in a file that never imports a.py is not a call to a.py's get()."""
+    print("\n🔗 Method calls sharing a project function's name...")
+    call_graph = CallGraph()
+    call_graph.add_source('pkg/a.py', "def get(key):\n    return key\n")
+    call_graph.add_source('pkg/b.py', "d = {}\nd.get(1)\nlen(d)\n")
+    call_graph.add_source('pkg/c.py', "from pkg.a import get\n\nget(1)\n")
+
+    edges = [(edge['from'], edge['to'], edge['function']) for edge in call_graph.call_edges()]
+    assert ('pkg/b.py', 'pkg/a.py', 'get') not in edges, edges
+    assert edges == [('pkg/c.py', 'pkg/a.py', 'get')], edges
+    print(f"  edges: {edges}")
+
+
+def test_relative_imports_exact_paths():
+    """Relative imports resolve to the file at that exact path, not a deeper one ending the same way."""
+    print("\n🧭 Relative imports against exact paths...")
+    index = ModuleIndex(['src/app.js', 'src/utils.js', 'lib/src/utils.js', 'pkg/models.py',
+                         'vendor/pkg/models.py', 'pkg/sub/view.py'])
+    assert index.resolve('./utils', 'src/app.js') == ['src/utils.js']
+    assert index.resolve('../src/utils', 'lib/app.js') == ['src/utils.js']
+    assert index.resolve('..models', 'pkg/sub/view.py') == ['pkg/models.py']
+    assert index.resolve('./missing', 'src/app.js') == []
+
+    agent = ContextManagerAgent()
+    files = [{'filename': 'src/app.js', 'imports': ['./utils']}, {'filename': 'src/utils.js', 'imports': []},
+             {'filename': 'lib/src/utils.js', 'imports': []}]
+    assert agent.analyze_file_dependencies(files) == {'src/app.js': {'src/utils.js'}}
+    assert not hasattr(agent, 'module_index')
+    print("  ./utils from src/app.js -> src/utils.js only")
+
+
+def test_file_libraries():
+    """A file importing lodash gets the resolved library; a file without imports gets none."""
+    print("\n📚 Per-file external libraries...")
+    files = [
+        parsed('src/search.js', [], ['react', 'lodash'], []),
+        parsed('src/utils.js', [], [], []),
+    ]
+    parsed_files = [parsed_file for parsed_file, _ in files]
+    analyzed_files = [file_analysis for _, file_analysis in files]
+
+    agent = LibraryDocAgent(offline=True)
+    # Same inputs as main.py: the parsed files' imports, not the FileAnalysis rows
+    libraries = asyncio.run(agent.analyze_libraries_async([
+        {'imports': parsed_file['parsed_data'].get('imports', [])} for parsed_file in parsed_files
+    ]))
+    libraries_by_name = {lib['name'].lower(): lib for lib in libraries}
+    for parsed_file, file_analysis in zip(parsed_files, analyzed_files):
+        file_analysis['external_libraries'] = agent.libraries_for_imports(
+            parsed_file['parsed_data'].get('imports', []), libraries_by_name
+        )
+
+    search, utils = analyzed_files
+    assert [lib['name'] for lib in search['external_libraries']] == ['React', 'Lodash'], search
+    assert utils['external_libraries'] == [], utils
+    print(f"  search.js: {[lib['name'] for lib in search['external_libraries']]}")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing cross-references and file libraries")
+    print("=" * 60)
+    test_duplicate_basenames()
+    test_method_call_name_collision()
+    test_relative_imports_exact_paths()
+    test_file_libraries()
+    print("\n✅ Cross-reference and library test complete!")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test script for file classification before parsing.
+Checks .gitignore anchoring and where build and vendor directories are skipped.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.file_classifier import FileClassifier, GitignoreRules, find_project_roots
+
+
+def test_gitignore_anchoring():
+    """A leading / anchors a pattern to its .gitignore, with or without a trailing /."""
+    print("\n🙈 .gitignore anchoring...")
+    rules = GitignoreRules()
+    rules.add_file('.gitignore', "/gen/\n/secret.py\nlogs/\n")
+    assert rules.matches('gen/a.py') == '.'
+    assert rules.matches('src/gen/a.py') is None
+    assert rules.matches('secret.py') == '.'
+    assert rules.matches('src/secret.py') is None
+    # Unanchored directory patterns still match at any depth
+    assert rules.matches('src/logs/a.py') == '.'
+    print("  /gen/ and /secret.py match only at the root, logs/ anywhere")
+
+
+def test_build_directories():
+    """build/, out/ and vendor/ are skipped at a project root, not inside source packages."""
+    print("\n🏗️  Build and vendor directories...")
+    classifier = FileClassifier()
+    names = [
+        'repo/setup.py', 'repo/src/build/__init__.py', 'repo/tools/out/x.py', 'repo/build/lib/x.py',
+        'repo/web/package.json', 'repo/web/dist/app.js', 'repo/web/src/vendor/api.js',
+        'repo/vendor/lib.py', 'repo/src/node_modules/left-pad/index.js'
+    ]
+    roots = find_project_roots(names)
+    assert roots == {'', 'repo', 'repo/web'}, roots
+    verdicts = {name: classifier.classify_path(name, project_roots=roots) for name in names}
+    skipped = sorted(name for name, verdict in verdicts.items() if verdict)
+    assert skipped == [
+        'repo/build/lib/x.py', 'repo/src/node_modules/left-pad/index.js',
+        'repo/vendor/lib.py', 'repo/web/dist/app.js'
+    ], skipped
+    assert verdicts['repo/build/lib/x.py'][1] == 'build_output'
+    print(f"  skipped {len(skipped)} of {len(names)}; src/build/ and tools/out/ kept")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing file classification")
+    print("=" * 60)
+    test_gitignore_anchoring()
+    test_build_directories()
+    print("\n✅ File classifier test complete!")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental re-analysis of pushed changes.
+Checks that a patched snapshot matches one built from scratch.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.incremental_analysis import ProjectSnapshot
+
+
+def analyze_file(filename: str, content: str):
+    """One function per line and one import per "import" line, like the real analyzer's shape."""
+    lines = content.split('\n')
+    functions = [{'name': line.split()[1]} for line in lines if line.startswith('function ')]
+    imports = [line.split()[1] for line in lines if line.startswith('import ')]
+    libraries = [{'name': name} for name in imports if not name.startswith('.')]
+    return {'filename': filename, 'functions': functions, 'external_libraries': libraries}, imports
+
+
+def summary(snapshot: ProjectSnapshot):
+    return snapshot.aggregate.to_dict(), sorted((ref['from'], ref['to']) for ref in snapshot.cross_references())
+
+
+def test_patch_matches_rebuild():
+    """Totals and cross-references patched by apply() equal a full rebuild of the new tree."""
+    print("\n🩹 Patched snapshot against a full rebuild...")
+    before = {
+        'repo/src/app.js': "import ./utils\nimport react\nfunction main",
+        'repo/src/utils.js': "import lodash\nfunction a\nfunction b",
+        'repo/src/old.js': "function legacy",
+        'repo/src/view.js': "import ./widget\nfunction render",
+    }
+    after = {
+        'repo/src/app.js': "import ./utils\nfunction main\nfunction start",
+        'repo/src/utils.js': before['repo/src/utils.js'],
+        'repo/src/view.js': before['repo/src/view.js'],
+        'repo/src/widget.js': "import react\nfunction widget",
+    }
+    snapshot = ProjectSnapshot(analyze_file)
+    snapshot.build(before)
+    update = snapshot.apply(
+        {path: after[path] for path in ('repo/src/app.js', 'repo/src/widget.js', 'repo/src/utils.js')},
+        ['repo/src/old.js'], 'rev2'
+    )
+    assert update['reanalyzed'] == ['repo/src/app.js', 'repo/src/widget.js'], update
+    assert update['unchanged'] == ['repo/src/utils.js'] and update['reresolved'] == ['repo/src/view.js'], update
+
+    rebuilt = ProjectSnapshot(analyze_file)
+    rebuilt.build(after)
+    assert summary(snapshot) == summary(rebuilt), (summary(snapshot), summary(rebuilt))
+    totals, references = summary(snapshot)
+    assert totals['total_files'] == 4 and totals['total_functions'] == 6 and totals['total_libraries'] == 2, totals
+    print(f"  {totals['total_files']} files, {totals['total_functions']} functions, {len(references)} import edges")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing incremental analysis")
+    print("=" * 60)
+    test_patch_matches_rebuild()
+    print("\n✅ Incremental analysis test complete!")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script for token-budgeted file prompts.
+Checks the token estimate, the budget arithmetic and the file skeletons.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.prompt_budget import FilePromptBuilder, content_budget, estimate_tokens, truncate_to_tokens
+
+
+def make_module(functions: int) -> str:
+    """A JavaScript module with a header, imports and exported and local functions."""
+    parts = [
+        "// Search helpers shared by the results page",
+        "",
+        "import debounce from 'lodash/debounce';",
+        "import axios from 'axios';",
+        "",
+    ]
+    for i in range(functions):
+        parts += [
+            f"// Formats result {i} for display",
+            f"export function formatResult{i}(result, options) {{",
+            "  const title = result.title.trim();",
+            f"  return `${{title}} ({i})`;",
+            "}",
+            "",
+            f"const cache{i} = new Map();",
+            f"export default function App{i}(props) {{",
+            f"  const onClick = (event) => cache{i}.set(event.id, props);",
+            "  return onClick;",
+            "}",
+            "",
+        ]
+    return "\n".join(parts)
+
+
+def make_python_module(functions: int) -> str:
+    """A Python module with a docstring, imports, functions with bodies and a class."""
+    parts = [
+        '"""Search helpers shared by the results page."""',
+        "",
+        "import os",
+        "from typing import Dict, List",
+        "",
+    ]
+    for i in range(functions):
+        parts += [
+            f"def func_{i}(result, options=None):",
+            f'    """Formats result {i} for display."""',
+            "    title = result['title'].strip()",
+            "    if options:",
+            "        title = options.get('prefix', '') + title",
+            f"    return f'{{title}} ({i})'",
+            "",
+        ]
+    parts += [
+        "class ResultStore:",
+        '    """Keeps formatted results by id."""',
+        "",
+        "    def get(self, key):",
+        "        return self.items[key]",
+    ]
+    return "\n".join(parts)
+
+
+def test_estimate_tokens():
+    print("\n🔢 estimate_tokens...")
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a b") == 2
+    # Long words count one more token every four letters after the first
+    assert estimate_tokens("abcde") == 2
+    assert estimate_tokens("foo(bar);") == 5
+    assert estimate_tokens("x" * 400) == 100
+    text = make_module(20)
+    assert estimate_tokens(text) < estimate_tokens(text + text)
+    print(f"  {len(text)} characters of module source -> {estimate_tokens(text)} tokens")
+
+
+def test_content_budget():
+    print("\n📐 content_budget...")
+    template = "File: {filename}\nContent: {file_content}"
+    overhead = estimate_tokens(template)
+    assert content_budget(template, 8192, 150) == 8192 - 150 - overhead
+    assert content_budget(template, 8192, 150, max_tokens=2048) == 2048
+    assert content_budget(template, 1000, 150, max_tokens=2048) == 1000 - 150 - overhead
+    # The reply alone fills the window: still at least one token for content
+    assert content_budget(template, 100, 150) == 1
+    print(f"  template overhead {overhead} tokens")
+
+
+def test_file_prompt_builder():
+    print("\n🦴 FilePromptBuilder...")
+    builder = FilePromptBuilder(2048)
+
+    # Files within budget, including an empty one, are sent unchanged
+    assert builder.build("") == ""
+    small = make_module(1)
+    assert builder.build(small) == small
+
+    # A large file never exceeds the budget, whatever the budget is
+    large = make_module(400)
+    for budget in (20, 100, 500, 2048, 6000):
+        skeleton = builder.build(large, max_tokens=budget)
+        assert skeleton and estimate_tokens(skeleton) <= budget, (budget, estimate_tokens(skeleton))
+    print(f"  {large.count(chr(10)) + 1}-line file fits budgets from 20 to 6000 tokens")
+
+    # Imports and exported signatures come first, with their export modifiers
+    skeleton = builder.build(make_module(40), max_tokens=1500)
+    assert skeleton.startswith("// Skeleton of a"), skeleton[:80]
+    assert "import axios from 'axios';" in skeleton
+    assert "export function formatResult0(result, options) { ... }" in skeleton
+    assert "export default function App0(props) { ... }" in skeleton
+    assert "return" not in skeleton
+    print("  imports and export signatures kept, bodies elided")
+
+    # Python files get their skeleton from ast: signatures, docstrings, imports
+    module = make_python_module(30)
+    skeleton = builder.build(module, max_tokens=600, filename="search/helpers.py")
+    assert estimate_tokens(skeleton) <= 600, estimate_tokens(skeleton)
+    assert skeleton.startswith("# Skeleton of a"), skeleton[:80]
+    assert "from typing import Dict, List" in skeleton
+    kept = [i for i in range(30) if f"def func_{i}(result, options=None): ..." in skeleton]
+    assert kept == list(range(30)), kept
+    assert "class ResultStore:" in skeleton and "    def get(self, key): ..." in skeleton
+    assert "strip()" not in skeleton
+    skeleton = builder.build(module, max_tokens=1500, filename="search/helpers.py")
+    assert '    """Formats result 0 for display."""' in skeleton
+    print(f"  Python module: all {len(kept)} signatures kept in 600 tokens")
+
+    # One minified line is clipped, and only its start is sent
+    minified = "var a=" + "+".join(f"f{i}(x{i})" for i in range(5000)) + ";"
+    for budget in (5, 300):
+        skeleton = builder.build(minified, max_tokens=budget)
+        assert skeleton and estimate_tokens(skeleton) <= budget, (budget, estimate_tokens(skeleton))
+        assert "var a=" in skeleton
+    assert truncate_to_tokens(minified, 0) == ""
+    print(f"  minified {len(minified)}-character line cut to {estimate_tokens(skeleton)} tokens")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing token-budgeted file prompts")
+    print("=" * 60)
+    test_estimate_tokens()
+    test_content_budget()
+    test_file_prompt_builder()
+    print("\n✅ Prompt budget test complete!")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-pass Python structure extractor.
+Checks that function source is sliced from the right lines.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.python_extractor import extract_python_structure
+
+
+def test_line_separators():
+    """Form feeds and other str.splitlines() separators do not shift function source."""
+    print("\n📏 Function source around form feeds and line separators...")
+    content = (
+        "def a():\n"
+        "    return 1\n"
+        "\x0c\n"
+        "def b():\r\n"
+        "    text = 'one two\x1cthree\x85'\r\n"
+        "    return text\n"
+        "\n"
+        "\x0c\n"
+        "@staticmethod\n"
+        "def c():\n"
+        "    return 2\n"
+    )
+    structure = extract_python_structure(content)
+    code = {func['name']: func['code'] for func in structure.functions}
+    assert code['a'] == "def a():\n    return 1", code['a']
+    assert code['b'] == "def b():\n    text = 'one two\x1cthree\x85'\n    return text", code['b']
+    assert code['c'] == "@staticmethod\ndef c():\n    return 2", code['c']
+    print(f"  sliced {len(code)} functions: {sorted(code)}")
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Python structure extraction")
+    print("=" * 60)
+    test_line_separators()
+    print("\n✅ Python extractor test complete!")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the async registry client.
+Runs a local stub npm/PyPI registry so no network access is needed.
+"""
+
+import sys
+import os
+import json
+import time
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.registry_client import MISSING, RegistryClient, TTLCache
+from app.agents.real_library_doc_agent import RealLibraryDocAgent
+
+STUB_PACKAGES = {
+    "/left-pad/latest": {"name": "left-pad", "description": "String left pad", "version": "1.3.0"},
+    "/pypi/tqdm/json": {"info": {"name": "tqdm", "summary": "Progress bars", "version": "4.66.1"}},
+    "/huge-manifest/latest": {"name": "huge-manifest", "description": "x" * 4096, "version": "2.0.0"},
+}
+
+
+class StubRegistryHandler(BaseHTTPRequestHandler):
+    """Serves STUB_PACKAGES and 404s everything else, counting hits per path."""
+
+    hits = {}
+    delay = 0.2
+
+    def do_GET(self):
+        StubRegistryHandler.hits[self.path] = StubRegistryHandler.hits.get(self.path, 0) + 1
+        # Slow responses make concurrent duplicate lookups overlap
+        time.sleep(self.delay)
+        body = STUB_PACKAGES.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_registry():
+    """Start the stub registry on a free port and return (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubRegistryHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+async def run_checks(base_url: str):
+    client = RegistryClient(npm_registry_url=base_url, pypi_url=base_url, max_concurrency=4)
+
+    print("\n🔁 Coalescing: 20 concurrent lookups of the same package...")
+    results = await asyncio.gather(*(client.fetch_npm("left-pad") for _ in range(20)))
+    assert all(r["version"] == "1.3.0" for r in results)
+    assert StubRegistryHandler.hits["/left-pad/latest"] == 1, StubRegistryHandler.hits
+    print(f"  registry hits: {StubRegistryHandler.hits['/left-pad/latest']}, coalesced: {client.stats['coalesced']}")
+
+    print("\n📦 TTL cache: repeat lookup after completion...")
+    await client.fetch_npm("left-pad")
+    assert StubRegistryHandler.hits["/left-pad/latest"] == 1
+    print(f"  cache hits: {client.stats['cache_hits']}")
+
+    print("\n🚫 Negative caching: missing package looked up twice...")
+    assert await client.fetch_npm("does-not-exist") is None
+    assert await client.fetch_npm("does-not-exist") is None
+    assert StubRegistryHandler.hits["/does-not-exist/latest"] == 1
+    print("  404 served once, second lookup answered from cache")
+
+    print("\n🐍 PyPI lookup...")
+    data = await client.fetch_pypi("tqdm")
+    assert data["info"]["summary"] == "Progress bars"
+    print(f"  {data['info']['name']}: {data['info']['summary']}")
+
+    await client.aclose()
+
+
+def check_ttl_cache():
+    print("\n⏳ TTLCache: expiry and least-recently-used eviction...")
+    cache = TTLCache(max_entries=2)
+    cache.put("a", 1, ttl=60)
+    cache.put("b", None, ttl=0.05)
+    assert cache.get("b") is None
+    time.sleep(0.06)
+    assert cache.get("b") is MISSING
+    cache.put("b", 2, ttl=60)
+    cache.get("a")
+    cache.put("c", 3, ttl=60)
+    assert cache.get("a") == 1 and cache.get("b") is MISSING and len(cache) == 2
+    print("  expired miss dropped, least recently used entry evicted")
+
+
+def check_library_agent_cache(base_url: str):
+    print("\n📚 RealLibraryDocAgent: cached hits and misses...")
+    agent = RealLibraryDocAgent(npm_registry_url=base_url, max_cached=100)
+    for _ in range(3):
+        assert agent._fetch_npm_info("left-pad")["version"] == "1.3.0"
+        assert agent._fetch_npm_info("no-such-package") is None
+    assert StubRegistryHandler.hits["/no-such-package/latest"] == 1, StubRegistryHandler.hits
+    assert len(agent.metadata_cache) == 2
+    print("  404 fetched once and remembered for the negative TTL")
+
+    # A manifest over the size limit exists but is unknown: not cached, and not looked up on PyPI
+    agent.MAX_METADATA_BYTES = 1024
+    pypi_lookups = []
+    agent._fetch_pypi_info = lambda name: pypi_lookups.append(name)
+    assert agent._fetch_npm_info("huge-manifest") is MISSING
+    assert agent._get_library_info("huge-manifest")["type"] == "unknown"
+    assert StubRegistryHandler.hits["/huge-manifest/latest"] == 2, StubRegistryHandler.hits
+    assert pypi_lookups == [] and len(agent.metadata_cache) == 2
+    print("  oversized manifest retried, never negative-cached or sent to PyPI")
+
+
+def test_registry_client():
+    """Exercise coalescing, caching and negative caching against the stub registry."""
+    print("🧪 Testing RegistryClient against a local stub registry")
+    print("=" * 60)
+    StubRegistryHandler.hits = {}
+    server, base_url = start_stub_registry()
+    try:
+        asyncio.run(run_checks(base_url))
+        check_ttl_cache()
+        check_library_agent_cache(base_url)
+    finally:
+        server.shutdown()
+    print("\n✅ Registry client test complete!")
+
+
+if __name__ == "__main__":
+    test_registry_client()
@@ -82,32 +82,39 @@ const CompleteDemo: React.FC = () => {
     }
   };
 
-  const pollAnalysis = async (id: string) => {
-    const pollInterval = setInterval(async () => {
-      try {
-        // Check status
-        const statusResponse = await axios.get(`http://204.52.27.91:8000/status/${id}`);
-        const { status, progress, message } = statusResponse.data;
-        
-        setAnalysisStatus(message);
-        setProgress(progress);
+  const pollAnalysis = (id: string) => {
+    // Status changes are pushed by the server; results are fetched once it completes
+    const events = new EventSource(`http://204.52.27.91:8000/events/${id}?fields=filename`);
+
+    events.addEventListener('status', (event) => {
+      const { progress, message } = JSON.parse((event as MessageEvent).data);
+      setAnalysisStatus(message);
+      setProgress(progress);
+    });
 
-        if (status === 'completed') {
-          // Get results
-          const resultsResponse = await axios.get(`http://204.52.27.91:8000/analyze/${id}`);
-          setResults(resultsResponse.data);
-          setIsAnalyzing(false);
-          clearInterval(pollInterval);
-        } else if (status === 'error') {
-          setAnalysisStatus('Analysis failed');
-          setIsAnalyzing(false);
-          clearInterval(pollInterval);
-        }
+    events.addEventListener('completed', async () => {
+      events.close();
+      try {
+        const resultsResponse = await axios.get(`http://204.52.27.91:8000/analyze/${id}`);
+        setResults(resultsResponse.data);
       } catch (error) {
-        console.error('Polling error:', error);
-        clearInterval(pollInterval);
+        console.error('Results error:', error);
+      }
+      setIsAnalyzing(false);
+    });
+
+    events.addEventListener('failed', () => {
+      events.close();
+      setAnalysisStatus('Analysis failed');
+      setIsAnalyzing(false);
+    });
+
+    events.onerror = (error) => {
+      if (events.readyState === EventSource.CLOSED) {
+        console.error('Progress stream error:', error);
+        setIsAnalyzing(false);
       }
-    }, 1000);
+    };
   };
 
   const { getRootProps, getInputProps, isDragActive } = useDropzone({
@@ -93,32 +93,41 @@ const Home: React.FC = () => {
     }
   }, []);
 
-  const pollForResults = async (id: string) => {
-    const pollInterval = setInterval(async () => {
-      try {
-        const [statusResponse, resultResponse] = await Promise.all([
-          axios.get(`http://localhost:8000/status/${id}`),
-          axios.get(`http://localhost:8000/analyze/${id}`)
-        ]);
+  const pollForResults = (id: string) => {
+    // The server pushes agent status changes; the result is fetched once at the end
+    const events = new EventSource(`http://localhost:8000/events/${id}?fields=filename`);
 
-        setAgentStatus(statusResponse.data);
-        setProgress(statusResponse.data.overall_progress);
+    events.addEventListener('status', (event) => {
+      const status = JSON.parse((event as MessageEvent).data);
+      setAgentStatus(status);
+      setProgress(status.overall_progress);
+    });
 
-        if (resultResponse.data.status === 'completed') {
-          setResult(resultResponse.data.result);
-          setAnalysisStatus('completed');
-          clearInterval(pollInterval);
-        } else if (resultResponse.data.status === 'failed') {
-          setError(resultResponse.data.error || 'Analysis failed');
-          setAnalysisStatus('error');
-          clearInterval(pollInterval);
-        }
+    events.addEventListener('completed', async () => {
+      events.close();
+      try {
+        const resultResponse = await axios.get(`http://localhost:8000/analyze/${id}`);
+        setResult(resultResponse.data.result);
+        setAnalysisStatus('completed');
       } catch (err) {
         setError('Failed to fetch analysis results');
         setAnalysisStatus('error');
-        clearInterval(pollInterval);
       }
-    }, 1000);
+    });
+
+    events.addEventListener('failed', (event) => {
+      events.close();
+      setError(JSON.parse((event as MessageEvent).data).error || 'Analysis failed');
+      setAnalysisStatus('error');
+    });
+
+    events.onerror = () => {
+      // EventSource retries dropped connections itself; CLOSED means it gave up
+      if (events.readyState === EventSource.CLOSED) {
+        setError('Lost connection to the analysis progress stream');
+        setAnalysisStatus('error');
+      }
+    };
   };
 
   const { getRootProps, getInputProps, isDragActive } = useDropzone({